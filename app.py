@@ -4,7 +4,7 @@ from aiogram import Bot, Dispatcher
 from aiogram.client.session.middlewares.request_logging import logger
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ChatType
-from loader import db
+from loader import db, sessions, broadcast, voice_processor, voice_scheduler, chat_scheduler, ratelimit_redis
 
 
 def setup_handlers(dispatcher: Dispatcher) -> None:
@@ -17,9 +17,12 @@ def setup_handlers(dispatcher: Dispatcher) -> None:
 def setup_middlewares(dispatcher: Dispatcher, bot: Bot) -> None:
     """MIDDLEWARE"""
     from middlewares.throttling import ThrottlingMiddleware
+    from middlewares.user_context import UserContextMiddleware
 
     # Spamdan himoya qilish uchun klassik ichki o'rta dastur. So'rovlar orasidagi asosiy vaqtlar 0,5 soniya
-    dispatcher.message.middleware(ThrottlingMiddleware(slow_mode_delay=0.5))
+    dispatcher.message.middleware(ThrottlingMiddleware(slow_mode_delay=0.5, redis=ratelimit_redis))
+    # Foydalanuvchi va uning tilini har bir update uchun bir marta aniqlash (handlerlarga user/language sifatida uzatiladi)
+    dispatcher.message.outer_middleware(UserContextMiddleware(db=db))
 
 
 def setup_filters(dispatcher: Dispatcher) -> None:
@@ -44,6 +47,12 @@ async def database_connected():
     await db.create()
     # await db.drop_users()
     await db.create_table_users()
+    await db.create_table_chat_sessions()
+    await db.create_table_broadcasts()
+    await db.create_table_voice_transcripts()
+    await db.create_table_gemini_responses()
+    # Bot to'xtab qolganda tugallanmagan reklama bo'lsa, davom ettiramiz
+    await broadcast.resume()
 
 
 async def aiogram_on_startup_polling(dispatcher: Dispatcher, bot: Bot) -> None:
@@ -52,6 +61,9 @@ async def aiogram_on_startup_polling(dispatcher: Dispatcher, bot: Bot) -> None:
 
     logger.info("Database connected")
     await database_connected()
+    sessions.start()
+    voice_scheduler.start()
+    chat_scheduler.start()
 
     logger.info("Starting polling")
     await bot.delete_webhook(drop_pending_updates=True)
@@ -60,15 +72,69 @@ async def aiogram_on_startup_polling(dispatcher: Dispatcher, bot: Bot) -> None:
     await set_default_commands(bot=bot)
 
 
+async def aiogram_on_startup_webhook(dispatcher: Dispatcher, bot: Bot) -> None:
+    from data.config import WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET
+    from utils.set_bot_commands import set_default_commands
+    from utils.notify_admins import on_startup_notify
+
+    logger.info("Database connected")
+    await database_connected()
+    sessions.start()
+    voice_scheduler.start()
+    chat_scheduler.start()
+
+    await setup_aiogram(bot=bot, dispatcher=dispatcher)
+    logger.info("Setting webhook")
+    await bot.set_webhook(
+        url=WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+        secret_token=WEBHOOK_SECRET,
+        allowed_updates=dispatcher.resolve_used_update_types(),
+        drop_pending_updates=True,
+    )
+    await on_startup_notify(bot=bot)
+    await set_default_commands(bot=bot)
+
+
 async def aiogram_on_shutdown_polling(dispatcher: Dispatcher, bot: Bot):
     logger.info("Stopping polling")
+    await sessions.close()
+    await voice_scheduler.close()
+    await chat_scheduler.close()
+    await voice_processor.close()
     await bot.session.close()
     await dispatcher.storage.close()
 
 
+def run_webhook(dispatcher: Dispatcher, bot: Bot) -> None:
+    """WEBHOOK: aiohttp server orqali update'larni qabul qilish"""
+    from aiohttp import web
+    from aiogram.webhook.aiohttp_server import setup_application
+    from data.config import WEBHOOK_PATH, WEBHOOK_SECRET, WEBAPP_HOST, WEBAPP_PORT, WEBHOOK_WORKERS, WEBHOOK_QUEUE_SIZE
+    from utils.webhook import WebhookServer
+
+    if not WEBHOOK_SECRET:
+        raise RuntimeError("WEBHOOK_SECRET must be set to run in webhook mode")
+
+    dispatcher.startup.register(aiogram_on_startup_webhook)
+    dispatcher.shutdown.register(aiogram_on_shutdown_polling)
+
+    app = web.Application()
+    server = WebhookServer(
+        dispatcher=dispatcher,
+        bot=bot,
+        secret_token=WEBHOOK_SECRET,
+        workers=WEBHOOK_WORKERS,
+        queue_size=WEBHOOK_QUEUE_SIZE,
+    )
+    server.setup(app, path=WEBHOOK_PATH)
+    # dispatcher startup/shutdown hodisalarini aiohttp ilovasiga ulaydi
+    setup_application(app, dispatcher, bot=bot)
+    web.run_app(app, host=WEBAPP_HOST, port=WEBAPP_PORT)
+
+
 def main():
     """CONFIG"""
-    from data.config import BOT_TOKEN
+    from data.config import BOT_TOKEN, WEBHOOK_URL
     from aiogram.enums import ParseMode
     from aiogram.fsm.storage.memory import MemoryStorage
 
@@ -76,7 +142,11 @@ def main():
     storage = MemoryStorage()
     dispatcher = Dispatcher(storage=storage)
 
-    
+    # WEBHOOK_URL berilgan bo'lsa webhook, aks holda polling rejimida ishlaydi
+    if WEBHOOK_URL:
+        run_webhook(dispatcher=dispatcher, bot=bot)
+        return
+
     dispatcher.startup.register(aiogram_on_startup_polling)
     dispatcher.shutdown.register(aiogram_on_shutdown_polling)
     asyncio.run(dispatcher.start_polling(bot, close_bot_session=True))
@@ -0,0 +1,53 @@
+"""Micro-benchmark: shared reply keyboards vs. building one per reply.
+
+Times getting the keyboard and serializing it into a sendMessage request
+the way aiogram does, for the old per-call ReplyKeyboardMarkup and for
+the shared frozen instances from `keyboards.reply`.
+
+    python -m bench.keyboards [--number N]
+"""
+import argparse
+import timeit
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.types import KeyboardButton, ReplyKeyboardMarkup
+
+from componets.messages import buttons
+from keyboards.reply import get_keyboard
+
+
+def build_keyboard(language):
+    """The previous implementation: a new markup for every reply."""
+    return ReplyKeyboardMarkup(
+        keyboard=[
+            [KeyboardButton(text=buttons[language]["btn_new_chat"]), KeyboardButton(text=buttons[language]["btn_stop"])],
+            [KeyboardButton(text=buttons[language]["btn_continue"]), KeyboardButton(text=buttons[language]["btn_change_lang"])]
+        ],
+        resize_keyboard=True,
+        one_time_keyboard=False
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    session = AiohttpSession()
+    bot = Bot("123456:bench", session=session)
+    assert session.prepare_value(build_keyboard("uz"), bot, {}) == session.prepare_value(get_keyboard("uz"), bot, {})
+
+    cases = {
+        "build per call": lambda: build_keyboard("uz"),
+        "shared": lambda: get_keyboard("uz"),
+        "build per call + serialize": lambda: session.prepare_value(build_keyboard("uz"), bot, {}),
+        "shared + serialize": lambda: session.prepare_value(get_keyboard("uz"), bot, {}),
+    }
+    for name, case in cases.items():
+        seconds = min(timeit.repeat(case, number=args.number, repeat=3))
+        print(f"{name:<28} {seconds / args.number * 1e6:8.2f} us/op")
+
+
+if __name__ == "__main__":
+    main()
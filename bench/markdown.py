@@ -0,0 +1,89 @@
+"""Benchmark: MarkdownRenderer vs. the old regex `format_text`.
+
+Renders a synthetic Gemini-style answer (headings, lists, inline markup,
+a code block) both as one complete text and as a stream of small chunks
+where the whole answer so far is re-rendered for every edit, which is
+what the old streaming path did with `format_partial_text`.
+
+    python -m bench.markdown [--size CHARS] [--chunk CHARS] [--number N]
+"""
+import argparse
+import re
+import timeit
+
+from utils.markdown import MarkdownRenderer, render_markdown
+
+
+def format_text(text):
+    """The previous implementation, kept here for comparison."""
+    text = re.sub(r"\*\*([^*]+)\*\*", r"<b>\1</b>", text)
+    text = re.sub(r"\*([^*]+)\*", r"<i>\1</i>", text)
+    text = re.sub(r"`([^`]+)`", r"<code>\1</code>", text)
+    return text
+
+
+def format_partial_text(text):
+    """The previous streaming helper: hold back unclosed markers, then `format_text`."""
+    if text.count("`") % 2:
+        text = text[:text.rfind("`")]
+    if text.count("**") % 2:
+        text = text[:text.rfind("**")]
+    if text.replace("**", "").count("*") % 2:
+        text = text[:text.rfind("*")]
+    return format_text(text)
+
+
+SAMPLE = """## Answer
+
+Here is **a short overview** of the *main* points, with `inline code` and a [link](https://example.com).
+
+- first item with **bold** text
+- second item with *italic* and ~~strike~~
+- third item: 2 < 3 & 5 > 4
+
+```python
+def greet(name):
+    return f"Hello, {name}!"
+```
+
+"""
+
+
+def sample(size: int) -> str:
+    return (SAMPLE * (size // len(SAMPLE) + 1))[:size]
+
+
+def stream_old(text: str, chunk: int):
+    for end in range(chunk, len(text) + chunk, chunk):
+        format_partial_text(text[:end])
+
+
+def stream_new(text: str, chunk: int):
+    renderer = MarkdownRenderer()
+    for start in range(0, len(text), chunk):
+        renderer.feed(text[start:start + chunk])
+        renderer.html
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=4000)
+    parser.add_argument("--chunk", type=int, default=40)
+    parser.add_argument("--number", type=int, default=50)
+    args = parser.parse_args()
+
+    text = sample(args.size)
+    cases = {
+        "full: regex format_text": lambda: format_text(text),
+        "full: render_markdown": lambda: render_markdown(text),
+        "stream: regex, re-render all": lambda: stream_old(text, args.chunk),
+        "stream: MarkdownRenderer": lambda: stream_new(text, args.chunk),
+    }
+    print(f"{len(text)} chars, {args.chunk}-char chunks")
+    for name, case in cases.items():
+        seconds = min(timeit.repeat(case, number=args.number, repeat=3))
+        print(f"{name:<30} {seconds / args.number * 1e3:8.3f} ms/op")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Load test: aggregate Gemini throughput as concurrent users grow.
+
+Every simulated user sends `--messages` questions one after another,
+through the same path as the bot: `ChatScheduler` -> `GeminiClient` ->
+`GeminiExecutor`, against a fake model that answers after `--latency`
+seconds. The old synchronous `send_message` call is measured as a
+baseline. A heartbeat task reports the worst event-loop lag, i.e. how
+long any other update would have waited.
+
+    python -m bench.throughput [--latency S] [--messages N] [--concurrency N] [--users 1,4,16,64]
+"""
+import argparse
+import asyncio
+import time
+
+from utils.gemini import ChatScheduler, GeminiClient, GeminiExecutor
+
+
+class Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class SlowModel:
+    """Answers every message after `latency` seconds, like a remote model would."""
+
+    model_name = "bench"
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def start_chat(self, history=None):
+        return self
+
+    async def send_message_async(self, text, stream=False):
+        await asyncio.sleep(self.latency)
+        return Response(text)
+
+    def send_message(self, text):
+        time.sleep(self.latency)
+        return Response(text)
+
+
+async def heartbeat(lag: list, interval: float = 0.005):
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        lag[0] = max(lag[0], loop.time() - started - interval)
+
+
+async def run_async(users: int, messages: int, latency: float, concurrency: int):
+    gemini = GeminiClient(GeminiExecutor(max_concurrency=concurrency, timeout=60), SlowModel(latency))
+    scheduler = ChatScheduler(workers=concurrency, max_queue=users * 2)
+    scheduler.start()
+
+    async def user(user_id: int):
+        for index in range(messages):
+            await scheduler.submit(user_id, lambda: gemini.send_message(f"question {index}"))
+
+    await asyncio.gather(*(user(user_id) for user_id in range(users)))
+    await scheduler.close()
+
+
+async def run_blocking(users: int, messages: int, latency: float, concurrency: int):
+    model = SlowModel(latency)
+
+    async def user():
+        for index in range(messages):
+            model.start_chat().send_message(f"question {index}")
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(user() for _ in range(users)))
+
+
+async def measure(run, users: int, args) -> tuple[float, float]:
+    lag = [0.0]
+    watcher = asyncio.create_task(heartbeat(lag))
+    started = time.perf_counter()
+    await run(users, args.messages, args.latency, args.concurrency)
+    elapsed = time.perf_counter() - started
+    watcher.cancel()
+    return users * args.messages / elapsed, lag[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.2, help="simulated Gemini latency, seconds")
+    parser.add_argument("--messages", type=int, default=3, help="messages per user")
+    parser.add_argument("--concurrency", type=int, default=16, help="GEMINI_MAX_CONCURRENCY / CHAT_WORKERS")
+    parser.add_argument("--users", default="1,2,4,8,16,32,64")
+    args = parser.parse_args()
+
+    print(f"latency {args.latency}s, {args.messages} messages/user, concurrency {args.concurrency}")
+    print(f"{'users':>6} {'mode':<9} {'req/s':>8} {'max loop lag':>13}")
+    for users in (int(value) for value in args.users.split(",")):
+        for mode, run in (("async", run_async), ("blocking", run_blocking)):
+            if mode == "blocking" and users > 8:
+                # Bloklovchi variant foydalanuvchilar soniga qaramay 1/latency da qoladi
+                continue
+            throughput, lag = asyncio.run(measure(run, users, args))
+            print(f"{users:>6} {mode:<9} {throughput:>8.1f} {lag * 1000:>11.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
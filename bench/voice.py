@@ -0,0 +1,121 @@
+"""Voice backends: transcription cost in seconds per second of audio.
+
+Transcribes the same clip `--count` times with `--concurrency` in flight
+through each backend and reports wall time per audio second (lower is
+better; below 1.0 is faster than real time):
+
+* assemblyai - `AssemblyAIBackend` against `tests/stub_transcription.py`,
+  which keeps every job "processing" for `--stub-delay` seconds, so the
+  number is the client-side overhead plus the simulated service time;
+* local - `LocalWhisperBackend` (faster-whisper in a process pool),
+  skipped when faster-whisper is not installed.
+
+Without `--audio` a synthetic tone of `--seconds` length is used (WAV);
+a recorded voice note (OGG/Opus) needs ffmpeg to measure its length.
+
+    python -m bench.voice [--audio FILE] [--seconds S] [--count N] [--concurrency N] [--stub-delay S] [--model SIZE] [--workers N]
+"""
+import argparse
+import asyncio
+import importlib.util
+import io
+import logging
+import math
+import struct
+import time
+import wave
+
+from tests.stub_transcription import StubTranscriptionServer
+from utils.voice import AssemblyAIBackend, LocalWhisperBackend
+
+SAMPLE_RATE = 16000
+
+
+def synthetic_clip(seconds: float) -> bytes:
+    """A 440 Hz tone as 16 kHz mono 16-bit WAV."""
+    frames = b"".join(
+        struct.pack("<h", int(8000 * math.sin(2 * math.pi * 440 * index / SAMPLE_RATE)))
+        for index in range(int(seconds * SAMPLE_RATE))
+    )
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(SAMPLE_RATE)
+        file.writeframes(frames)
+    return buffer.getvalue()
+
+
+def clip_seconds(audio: bytes) -> float:
+    from pydub import AudioSegment
+
+    return len(AudioSegment.from_file(io.BytesIO(audio))) / 1000
+
+
+async def measure(backend, audio: bytes, count: int, concurrency: int, language: str) -> float:
+    """Wall time for `count` transcriptions, `concurrency` at a time."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await backend.transcribe(audio, language)
+
+    # Birinchi chaqiruv (ulanish, modelni yuklash) o'lchovga kirmaydi
+    await backend.transcribe(audio, language)
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(count)))
+    return time.perf_counter() - started
+
+
+async def run_assemblyai(audio: bytes, args) -> float:
+    stub = StubTranscriptionServer(delay=args.stub_delay)
+    async with stub as base_url:
+        backend = AssemblyAIBackend(api_key=stub.api_key, base_url=base_url, poll_interval=args.poll_interval)
+        try:
+            return await measure(backend, audio, args.count, args.concurrency, args.language)
+        finally:
+            await backend.close()
+
+
+async def run_local(audio: bytes, args) -> float:
+    backend = LocalWhisperBackend(model_size=args.model, workers=args.workers)
+    try:
+        return await measure(backend, audio, args.count, args.concurrency, args.language)
+    finally:
+        await backend.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--audio", help="voice note to transcribe (default: synthetic tone)")
+    parser.add_argument("--seconds", type=float, default=5, help="length of the synthetic clip")
+    parser.add_argument("--language", default="uz")
+    parser.add_argument("--count", type=int, default=20, help="transcriptions per backend")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--stub-delay", type=float, default=0.5, help="simulated AssemblyAI processing time")
+    parser.add_argument("--poll-interval", type=float, default=0.1, help="AssemblyAI polling interval")
+    parser.add_argument("--model", default="base", help="WHISPER_MODEL")
+    parser.add_argument("--workers", type=int, default=2, help="VOICE_LOCAL_WORKERS")
+    args = parser.parse_args()
+    logging.getLogger("aiohttp.access").setLevel(logging.WARNING)
+
+    if args.audio:
+        with open(args.audio, "rb") as file:
+            audio = file.read()
+        seconds = clip_seconds(audio)
+    else:
+        audio, seconds = synthetic_clip(args.seconds), args.seconds
+
+    total_audio = seconds * args.count
+    print(f"{args.count} x {seconds:.1f}s clip, concurrency {args.concurrency}")
+    print(f"{'backend':<11} {'wall':>8} {'s/audio s':>10}")
+    for name, run in (("assemblyai", run_assemblyai), ("local", run_local)):
+        if name == "local" and importlib.util.find_spec("faster_whisper") is None:
+            print(f"{name:<11} skipped: pip install faster-whisper")
+            continue
+        elapsed = asyncio.run(run(audio, args))
+        print(f"{name:<11} {elapsed:>7.2f}s {elapsed / total_audio:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Update intake: webhook server vs the polling dispatch path, in updates/s.
+
+The same updates are replayed twice through a dispatcher whose handler
+only awaits `--latency` seconds (no Telegram or Gemini calls):
+
+* webhook - POSTed to `WebhookServer` through aiohttp's test client,
+  `--concurrency` requests in flight, until its workers drained the queue;
+* polling - fed to the dispatcher the way `start_polling` does with
+  `handle_as_tasks=True`, one task per update.
+
+Updates are synthetic text messages from `--users` chats unless
+`--updates` points to a JSON-lines file of recorded updates (one
+`getUpdates` result object per line).
+
+    python -m bench.webhook [--updates FILE] [--count N] [--users N] [--latency S] [--workers N] [--concurrency N]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Message, Update
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from utils.webhook import SECRET_HEADER, WebhookServer
+
+TOKEN = "123456:" + "A" * 35
+SECRET = "bench-secret"
+PATH = "/webhook"
+
+
+def synthetic_updates(count: int, users: int) -> list[dict]:
+    return [
+        {
+            "update_id": index,
+            "message": {
+                "message_id": index,
+                "date": 0,
+                "chat": {"id": index % users + 1, "type": "private"},
+                "from": {"id": index % users + 1, "is_bot": False, "first_name": "bench"},
+                "text": f"question {index}",
+            },
+        }
+        for index in range(count)
+    ]
+
+
+def load_updates(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def make_dispatcher(latency: float, handled: list) -> Dispatcher:
+    router = Router()
+
+    @router.message()
+    async def handler(message: Message):
+        await asyncio.sleep(latency)
+        handled[0] += 1
+
+    dispatcher = Dispatcher()
+    dispatcher.include_router(router)
+    return dispatcher
+
+
+async def run_webhook(updates: list[dict], args) -> tuple[float, int]:
+    handled = [0]
+    bot = Bot(TOKEN)
+    server = WebhookServer(make_dispatcher(args.latency, handled), bot, SECRET,
+                           workers=args.workers, queue_size=len(updates))
+    app = web.Application()
+    server.setup(app, path=PATH)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async with TestClient(TestServer(app)) as client:
+        async def post(update: dict):
+            async with semaphore:
+                response = await client.post(PATH, json=update, headers={SECRET_HEADER: SECRET})
+                assert response.status == 200, response.status
+
+        started = time.perf_counter()
+        await asyncio.gather(*(post(update) for update in updates))
+        await server.queue.join()
+        elapsed = time.perf_counter() - started
+    await bot.session.close()
+    return len(updates) / elapsed, handled[0]
+
+
+async def run_polling(updates: list[dict], args) -> tuple[float, int]:
+    handled = [0]
+    bot = Bot(TOKEN)
+    dispatcher = make_dispatcher(args.latency, handled)
+    started = time.perf_counter()
+    tasks = []
+    for raw in updates:
+        # getUpdates javobi Update obyektlariga aylantiriladi, keyin har biri alohida vazifa
+        update = Update.model_validate(raw, context={"bot": bot})
+        tasks.append(asyncio.create_task(dispatcher.feed_update(bot, update)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    await bot.session.close()
+    return len(updates) / elapsed, handled[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates", help="JSON-lines file with recorded updates")
+    parser.add_argument("--count", type=int, default=5000, help="synthetic updates to generate")
+    parser.add_argument("--users", type=int, default=100, help="distinct chats in synthetic updates")
+    parser.add_argument("--latency", type=float, default=0.01, help="handler time per update, seconds")
+    parser.add_argument("--workers", type=int, default=32, help="WEBHOOK_WORKERS")
+    parser.add_argument("--concurrency", type=int, default=64, help="webhook requests in flight")
+    args = parser.parse_args()
+    # Har bir update uchun INFO log yozilsa, o'lchanadigan narsa log bo'lib qoladi
+    for name in ("aiogram", "aiohttp.access"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    updates = load_updates(args.updates) if args.updates else synthetic_updates(args.count, args.users)
+    print(f"{len(updates)} updates, handler latency {args.latency}s, "
+          f"{args.workers} webhook workers, {args.concurrency} requests in flight")
+    print(f"{'path':<8} {'updates/s':>10} {'handled':>8}")
+    for name, run in (("webhook", run_webhook), ("polling", run_polling)):
+        rate, handled = asyncio.run(run(updates, args))
+        print(f"{name:<8} {rate:>10.0f} {handled:>8}")
+
+
+if __name__ == "__main__":
+    main()
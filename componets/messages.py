@@ -46,32 +46,44 @@ messages = {
         "choose_lang": "🌍 Iltimos, tilni tanlang:\n\n🇺🇿 O'zbekcha | 🇷🇺 Русский | 🇺🇸 English | 🇹🇷 Türkçe",
         "start": "<b>🤖 AI Chatbot bilan suhbatni boshladingiz!</b>\n\nSavollaringizni yozing.\n\n❌ Chiqish uchun /stop ni yuboring.",
         "stop": "AI Chatbot bilan suhbat yakunlandi.\nQayta boshlash uchun /chat ni yozing.",
+        "continue": "🔄 Suhbat davom etmoqda, savolingizni yozing.",
         "not_started": "Avval /chat ni yuborib suhbatni boshlang.",
-        "limit_reached": "❌ Siz maksimal 20 ta savol berdingiz. Suhbat tugadi.\nQayta boshlash uchun /chat ni yozing.",
+        "limit_reached": "❌ Siz maksimal {limit} ta savol berdingiz. Suhbat tugadi.\nQayta boshlash uchun /chat ni yozing.",
         "error": "Xatolik yuz berdi: {}",
         "bot_response": "<b>Gemini:</b>\n\n{}",
         "thinking": "⌛ O'ylamoqda...",
+        "too_fast": "⏳ Juda tez yozyapsiz, biroz kuting va qayta yuboring.",
         "time_waiter": "⏳Iltimos, biroz kuting va qayta urinib ko'ring!",
         "start_command": "<b> 🤖 AI Chatbot bilan suhbatni boshlash uchun /chat buyrug'ini yuboring yoki pastdagi tugmalardan foydalaning. \n\n ❌ Chiqish uchun /stop ni yuboring.</b>",
         "voice_processing": "🎤 Ovozli xabarni qayta ishlayman...",
         "voice_error": "❌ Ovozli xabarni qayta ishlashda xatolik yuz berdi. Iltimos, qaytadan urinib ko'ring.",
         "voice_recognized": "🎯 Sizning xabaringiz: <i>{text}</i>",
+        "voice_queued": "🕒 Ovozli xabaringiz navbatda: {position}-o'rin",
+        "voice_busy": "⏳ Server hozir band, birozdan so'ng qayta yuboring.",
+        "chat_busy": "⏳ Hozir savollar juda ko'p, birozdan so'ng qayta yozing.",
+        "superseded": "↪️ Bu xabarga javob berilmaydi, oxirgi xabaringizga javob beraman.",
         "time_waiter": "Server hozir band kutish vaqti: {minute}"
     },
     "ru": {
         "choose_lang": "🌍 Пожалуйста, выберите язык:\n\n🇺🇿 O'zbekcha | 🇷🇺 Русский | 🇺🇸 English | 🇹🇷 Türkçe",
         "start": "<b>🤖 Вы начали чат с AI Chatbot!</b>\n\nЗадайте свой вопрос.\n\n❌ Чтобы выйти, отправьте /stop.",
         "stop": "Чат с AI Chatbot завершен.\nЧтобы начать заново, отправьте /chat.",
+        "continue": "🔄 Чат продолжается, задайте свой вопрос.",
         "not_started": "Сначала отправьте /chat, чтобы начать чат.",
-        "limit_reached": "❌ Вы задали 20 вопросов. Чат завершен.\nЧтобы начать заново, отправьте /chat.",
+        "limit_reached": "❌ Вы задали {limit} вопросов. Чат завершен.\nЧтобы начать заново, отправьте /chat.",
         "error": "Произошла ошибка: {}",
         "bot_response": "<b>Gemini:</b>\n\n{}",
         "thinking": "⌛ Думаю...",
+        "too_fast": "⏳ Вы пишете слишком быстро, подождите немного и отправьте снова.",
         "time_waiter": "⏳Пожалуйста, подождите немного и повторите попытку!",
         "start_command": "<b> 🤖 Отправьте команду /chat или воспользуйтесь кнопками ниже, чтобы начать разговор с AI Chatbot. \n\n ❌ Отправьте /stop для выхода.</b>",
         "voice_processing": "🎤 Обрабатываю голосовое сообщение...",
         "voice_error": "❌ Ошибка при обработке голосового сообщения. Пожалуйста, попробуйте снова.",
         "voice_recognized": "🎯 Ваше сообщение: <i>{text}</i>",
+        "voice_queued": "🕒 Голосовое сообщение в очереди: {position}-е место",
+        "voice_busy": "⏳ Сервер сейчас занят, отправьте сообщение немного позже.",
+        "chat_busy": "⏳ Сейчас слишком много вопросов, напишите немного позже.",
+        "superseded": "↪️ На это сообщение ответа не будет, отвечу на ваше последнее сообщение.",
         "time_waiter": "Server hozir band kutish vaqti: {minute}"
 
     },
@@ -79,32 +91,44 @@ messages = {
         "choose_lang": "🌍 Please choose a language:\n\n🇺🇿 O'zbekcha | 🇷🇺 Русский | 🇺🇸 English | 🇹🇷 Türkçe",
         "start": "<b>🤖 You started a chat with AI Chatbot!</b>\n\nAsk your questions.\n\n❌ To exit, send /stop.",
         "stop": "AI Chatbot session ended.\nTo restart, send /chat.",
+        "continue": "🔄 The chat continues, ask your question.",
         "not_started": "Please send /chat to start a conversation.",
-        "limit_reached": "❌ You have reached the maximum of 20 questions. Chat ended.\nTo restart, send /chat.",
+        "limit_reached": "❌ You have reached the maximum of {limit} questions. Chat ended.\nTo restart, send /chat.",
         "error": "An error occurred: {}",
         "bot_response": "<b>Gemini:</b>\n\n{}",
         "thinking": "⌛ Thinking...",
+        "too_fast": "⏳ You are sending messages too fast, please wait a moment and try again.",
         "time_waiter": "⏳Please wait a while and try again!",
         "start_command": "<b> 🤖 Send the /chat command or use the buttons below to start a conversation with the AI Chatbot. \n\n ❌ Send /stop to exit.</b>",
         "voice_processing": "🎤 Processing voice message...",
         "voice_error": "❌ Error processing voice message. Please try again.",
         "voice_recognized": "🎯 Your message: <i>{text}</i>",
+        "voice_queued": "🕒 Your voice message is queued: position {position}",
+        "voice_busy": "⏳ The server is busy right now, please send it again a bit later.",
+        "chat_busy": "⏳ There are too many questions right now, please write again a bit later.",
+        "superseded": "↪️ Skipping this message, I will answer your latest one.",
         "time_waiter": "Server hozir band kutish vaqti: {minute}"
     },
     "tr": {
         "choose_lang": "🌍 Lütfen bir dil seçin:\n\n🇺🇿 O'zbekcha | 🇷🇺 Русский | 🇺🇸 English | 🇹🇷 Türkçe",
         "start": "<b>🤖 AI Chatbot ile sohbete başladınız!</b>\n\nSorularınızı sorun.\n\n❌ Çıkmak için /stop gönderin.",
         "stop": "AI Chatbot oturumu sonlandı.\nYeniden başlatmak için /chat gönderin.",
+        "continue": "🔄 Sohbet devam ediyor, sorunuzu yazın.",
         "not_started": "Lütfen sohbete başlamak için /chat gönderin.",
-        "limit_reached": "❌ Maksimum 20 soru limitine ulaştınız. Sohbet sonlandı.\nYeniden başlatmak için /chat gönderin.",
+        "limit_reached": "❌ Maksimum {limit} soru limitine ulaştınız. Sohbet sonlandı.\nYeniden başlatmak için /chat gönderin.",
         "error": "Bir hata oluştu: {}",
         "bot_response": "<b>Gemini:</b>\n\n{}",
         "thinking": "⌛ Düşünüyor...",
+        "too_fast": "⏳ Çok hızlı yazıyorsunuz, lütfen biraz bekleyip tekrar gönderin.",
         "time_waiter": "⏳Lütfen biraz bekleyin ve tekrar deneyin!",
         "start_command": "<b> 🤖 AI Chatbot ile sohbete başlamak için /chat komutunu gönderin veya aşağıdaki düğmeleri kullanın. \n\n ❌ Çıkmak için /stop gönderin.</b>",
         "voice_processing": "🎤 Ses mesajı işleniyor...",
         "voice_error": "❌ Ses mesajı işlenirken hata oluştu. Lütfen tekrar deneyin.",
         "voice_recognized": "🎯 Mesajınız: <i>{text}</i>",
+        "voice_queued": "🕒 Ses mesajınız sırada: {position}. sıra",
+        "voice_busy": "⏳ Sunucu şu anda meşgul, lütfen biraz sonra tekrar gönderin.",
+        "chat_busy": "⏳ Şu anda çok fazla soru var, lütfen biraz sonra tekrar yazın.",
+        "superseded": "↪️ Bu mesaj atlandı, en son mesajınızı yanıtlayacağım.",
         "time_waiter": "Server hozir band kutish vaqti: {minute}"
     }
 }
\ No newline at end of file
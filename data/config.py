@@ -7,8 +7,77 @@ env.read_env()
 # .env fayl ichidan quyidagilarni o'qiymiz
 BOT_TOKEN = env.str("BOT_TOKEN")  # Bot Token
 ADMINS = env.list("ADMINS")  # adminlar ro'yxati
-API_KEY = env.str("API_KEY")
+API_KEY = env.str("API_KEY", "")
+# Bir nechta Gemini API kalitlari (vergul bilan), har bir kalit uchun daqiqasiga so'rovlar kvotasi
+# va 429 javobidan keyin kalitni dam oldirish vaqti (soniya, ketma-ket 429 larda ikki barobar oshadi, lekin
+# kutish vaqtidan oshmaydi; Gemini qancha kutishni aytsa, o'sha olinadi),
+# barcha kalitlar band bo'lganda bo'shashini kutishning maksimal vaqti (soniya)
+API_KEYS = env.list("API_KEYS", []) or [API_KEY]
+GEMINI_KEY_RPM = env.int("GEMINI_KEY_RPM", 60)
+GEMINI_KEY_COOLDOWN = env.float("GEMINI_KEY_COOLDOWN", 10)
+GEMINI_KEY_MAX_WAIT = env.float("GEMINI_KEY_MAX_WAIT", 30)
 ASSEMBLYAI_API_KEY = env.str("ASSEMBLYAI_API_KEY")
+# Ovozli xabarlarni matnga aylantirish: "assemblyai" yoki "local" (faster-whisper, serverning o'zida CPU'da)
+VOICE_BACKEND = env.str("VOICE_BACKEND", "assemblyai")
+WHISPER_MODEL = env.str("WHISPER_MODEL", "base")
+VOICE_LOCAL_WORKERS = env.int("VOICE_LOCAL_WORKERS", 2)
+# Ovozli xabarlar: AssemblyAI manzili (test uchun lokal stub server ko'rsatish mumkin),
+# bir vaqtda bajariladigan transkripsiyalar soni va vaqt chegarasi (soniya)
+ASSEMBLYAI_BASE_URL = env.str("ASSEMBLYAI_BASE_URL", "https://api.assemblyai.com")
+VOICE_MAX_CONCURRENCY = env.int("VOICE_MAX_CONCURRENCY", 4)
+VOICE_TIMEOUT = env.float("VOICE_TIMEOUT", 120)
+# Ovozli xabarlar navbati: ishchilar soni, navbatning umumiy hajmi va bitta foydalanuvchi uchun chegara
+VOICE_WORKERS = env.int("VOICE_WORKERS", 3)
+VOICE_QUEUE_SIZE = env.int("VOICE_QUEUE_SIZE", 50)
+VOICE_QUEUE_PER_USER = env.int("VOICE_QUEUE_PER_USER", 3)
+# Transkripsiya keshi (file_unique_id + til bo'yicha): xotiradagi hajmi, yashash vaqti va PostgreSQL'da saqlash
+VOICE_CACHE_SIZE = env.int("VOICE_CACHE_SIZE", 5000)
+VOICE_CACHE_TTL = env.float("VOICE_CACHE_TTL", 86400)
+VOICE_CACHE_DB = env.bool("VOICE_CACHE_DB", True)
+
+# Gemini so'rovlari: bir vaqtda bajariladigan so'rovlar soni va har bir so'rov uchun vaqt chegarasi (soniya)
+GEMINI_MAX_CONCURRENCY = env.int("GEMINI_MAX_CONCURRENCY", 16)
+GEMINI_TIMEOUT = env.float("GEMINI_TIMEOUT", 60)
+# Gemini modeli, u ishlamay qolganda ishlatiladigan yengilroq model (bo'sh - ishlatilmaydi),
+# xatolarda qayta urinishlar soni va kutish, circuit breaker chegarasi va qayta tekshirish vaqti (soniya)
+GEMINI_MODEL = env.str("GEMINI_MODEL", "gemini-pro")
+GEMINI_FALLBACK_MODEL = env.str("GEMINI_FALLBACK_MODEL", "")
+GEMINI_RETRIES = env.int("GEMINI_RETRIES", 2)
+GEMINI_RETRY_BACKOFF = env.float("GEMINI_RETRY_BACKOFF", 0.5)
+GEMINI_BREAKER_THRESHOLD = env.int("GEMINI_BREAKER_THRESHOLD", 5)
+GEMINI_BREAKER_RESET = env.float("GEMINI_BREAKER_RESET", 30)
+# Javobni bo'laklab (stream) yuborish va xabarni tahrirlash oralig'i (soniya)
+GEMINI_STREAMING = env.bool("GEMINI_STREAMING", True)
+STREAM_EDIT_INTERVAL = env.float("STREAM_EDIT_INTERVAL", 1.0)
+# Yangi sessiyadagi birinchi savollar uchun javoblar keshi (ixtiyoriy): hajmi, yashash vaqti, PostgreSQL'da saqlash
+# va faqat shu savollarni keshlash ro'yxati (";" bilan ajratiladi, bo'sh bo'lsa - barcha birinchi savollar)
+RESPONSE_CACHE = env.bool("RESPONSE_CACHE", False)
+RESPONSE_CACHE_SIZE = env.int("RESPONSE_CACHE_SIZE", 1000)
+RESPONSE_CACHE_TTL = env.float("RESPONSE_CACHE_TTL", 86400)
+RESPONSE_CACHE_DB = env.bool("RESPONSE_CACHE_DB", False)
+RESPONSE_CACHE_ALLOWLIST = env.list("RESPONSE_CACHE_ALLOWLIST", [], delimiter=";")
+# Bir vaqtda kelgan bir xil birinchi savollar uchun bitta Gemini so'rovi va uni kutishning maksimal vaqti (soniya)
+SINGLE_FLIGHT = env.bool("SINGLE_FLIGHT", True)
+SINGLE_FLIGHT_WAIT = env.float("SINGLE_FLIGHT_WAIT", 30)
+
+# Chat sessiyalari: saqlash joyi (memory, postgres yoki redis), maksimal sessiyalar soni,
+# faol bo'lmagan sessiyaning yashash vaqti va tozalash oralig'i (soniya)
+SESSION_BACKEND = env.str("SESSION_BACKEND", "memory")
+REDIS_URL = env.str("REDIS_URL", "redis://localhost:6379/0")
+SESSION_MAX_SIZE = env.int("SESSION_MAX_SIZE", 10000)
+SESSION_IDLE_TTL = env.float("SESSION_IDLE_TTL", 3600)
+SESSION_SWEEP_INTERVAL = env.float("SESSION_SWEEP_INTERVAL", 60)
+
+# Chat so'rovlari navbati: bir vaqtda javob beriladigan so'rovlar soni va navbatdagi foydalanuvchilar soni
+# (har bir foydalanuvchidan bittadan so'rov bajariladi, ADMINS navbatsiz xizmat qilinadi)
+CHAT_WORKERS = env.int("CHAT_WORKERS", 16)
+CHAT_QUEUE_SIZE = env.int("CHAT_QUEUE_SIZE", 500)
+
+# Gemini'ga yuboriladigan tarix: token chegarasi, eski xabarlarni qisqacha mazmunga aylantirish
+# va bitta sessiyadagi maksimal savollar soni (0 - cheklanmagan)
+CONTEXT_TOKEN_BUDGET = env.int("CONTEXT_TOKEN_BUDGET", 4000)
+CONTEXT_SUMMARY = env.bool("CONTEXT_SUMMARY", True)
+CHAT_MESSAGE_LIMIT = env.int("CHAT_MESSAGE_LIMIT", 0)
 
 
 DB_USER = env.str("DB_USER")
@@ -17,4 +86,27 @@ DB_NAME = env.str("DB_NAME")
 DB_HOST = env.str("DB_HOST")
 DB_PORT = env.str("DB_PORT")
 
+# Foydalanuvchilar keshi: maksimal yozuvlar soni va yashash vaqti (soniya)
+USER_CACHE_SIZE = env.int("USER_CACHE_SIZE", 10000)
+USER_CACHE_TTL = env.float("USER_CACHE_TTL", 300)
+
 BACKEND_HOST = env.str("BACKEND_HOST", "http://localhost:8000")
+
+# Reklama yuborish: sekundiga xabarlar soni (Telegram cheklovi ~30) va parallel yuboruvchilar soni
+BROADCAST_RATE = env.float("BROADCAST_RATE", 25)
+BROADCAST_WORKERS = env.int("BROADCAST_WORKERS", 10)
+
+# So'rovlar chegarasi: "memory" (har bir nusxa o'zi) yoki "redis" (REDIS_URL orqali barcha nusxalar uchun umumiy)
+RATELIMIT_BACKEND = env.str("RATELIMIT_BACKEND", "memory")
+# Bitta foydalanuvchi bir daqiqada yuborishi mumkin bo'lgan ovozli xabarlar soni
+VOICE_RATE_LIMIT = env.int("VOICE_RATE_LIMIT", 5)
+
+# Webhook rejimi (WEBHOOK_URL bo'sh bo'lsa bot polling rejimida ishlaydi)
+WEBHOOK_URL = env.str("WEBHOOK_URL", "")
+WEBHOOK_PATH = env.str("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = env.str("WEBHOOK_SECRET", "")
+WEBAPP_HOST = env.str("WEBAPP_HOST", "0.0.0.0")
+WEBAPP_PORT = env.int("WEBAPP_PORT", 8080)
+# Bir vaqtda qayta ishlanadigan update'lar soni va navbat hajmi
+WEBHOOK_WORKERS = env.int("WEBHOOK_WORKERS", 32)
+WEBHOOK_QUEUE_SIZE = env.int("WEBHOOK_QUEUE_SIZE", 1000)
@@ -1,2 +1,3 @@
 from .chat_type import ChatTypeFilter  # noqa
 from .admin import IsBotAdminFilter  # noqa
+from .buttons import ButtonFilter, BUTTON_INDEX, LANGUAGE_BUTTONS  # noqa
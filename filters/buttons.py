@@ -0,0 +1,31 @@
+from aiogram.filters import BaseFilter
+from aiogram.types import Message
+
+from componets.messages import buttons
+
+
+# Reply tugma matni -> (amal, til). Bir marta, modul yuklanganda quriladi
+BUTTON_INDEX: dict[str, tuple[str, str]] = {
+    texts[action]: (action, language)
+    for language, texts in buttons.items()
+    for action in ("btn_new_chat", "btn_stop", "btn_continue", "btn_change_lang")
+}
+
+# Til tanlash tugmalari -> til kodi
+LANGUAGE_BUTTONS: dict[str, str] = {"🇺🇿 O'zbek": "uz", "🇷🇺 Русский": "ru", "🇺🇸 English": "eng", "🇹🇷 Türkçe": "tr"}
+
+
+class ButtonFilter(BaseFilter):
+    """Reply tugmalarni BUTTON_INDEX orqali O(1) da aniqlaydi.
+
+    Tugma qaysi tilda bo'lsa, o'sha til handlerga `language` sifatida uzatiladi.
+    """
+
+    def __init__(self, *actions: str):
+        self.actions = set(actions)
+
+    async def __call__(self, message: Message) -> bool | dict:
+        entry = BUTTON_INDEX.get(message.text)
+        if entry is None or entry[0] not in self.actions:
+            return False
+        return {"language": entry[1]}
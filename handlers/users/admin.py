@@ -1,15 +1,20 @@
-import logging
-import asyncio
+import os
+import tempfile
+from html import escape
 from aiogram import Router, types
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
-from loader import db, bot
+from loader import db, bot, broadcast, response_cache
 from keyboards.inline.buttons import are_you_sure_markup
 from states.test import AdminState
 from filters.admin import IsBotAdminFilter
 from data.config import ADMINS
 from keyboards.inline.admin_menu import admin_menu_markup
-from utils.pgtoexcel import export_to_excel
+from utils.pgtoexcel import export_to_excel, export_to_csv
+from utils.metrics import metrics
+from utils.markdown import split_html
+from utils.broadcast import BroadcastRunning
+from utils.stream_reply import send_chunks
 
 router = Router()
 
@@ -21,15 +26,39 @@ async def welcome_to_admin(message: types.Message):
 
 @router.message(Command('allusers'), IsBotAdminFilter(ADMINS))
 @router.callback_query(lambda c: c.data == "allusers", IsBotAdminFilter(ADMINS))
-async def all_users(event: types.Message | types.CallbackQuery):
-    users = await db.select_all_users()
-    file_path = "data/users_list.xlsx"
+async def all_users(event: types.Message | types.CallbackQuery, command: CommandObject | None = None):
+    # "/allusers csv" - katta bazalar uchun yengilroq CSV formatda
+    file_format = "csv" if command and command.args and command.args.strip().lower() == "csv" else "xlsx"
+    export = export_to_csv if file_format == "csv" else export_to_excel
+    headings = ['ID', 'Full Name', 'Username', 'Telegram ID', "Created at", "Language", "Active"]
 
     await event.answer("Tayyorlanmoqda ⌛")
 
-    await export_to_excel(users, ['ID', 'Full Name', 'Username', 'Telegram ID', "Created at", "Language"], file_path)
-
-    await (event.message if isinstance(event, types.CallbackQuery) else event).answer_document(types.input_file.FSInputFile(file_path))
+    # Har bir so'rov uchun alohida vaqtinchalik fayl
+    fd, file_path = tempfile.mkstemp(prefix="users_list_", suffix=f".{file_format}")
+    os.close(fd)
+    try:
+        await export(db.iterate_users(), headings, file_path)
+        await (event.message if isinstance(event, types.CallbackQuery) else event).answer_document(
+            types.input_file.FSInputFile(file_path, filename=f"users_list.{file_format}")
+        )
+    finally:
+        os.remove(file_path)
+
+
+@router.message(Command('stats'), IsBotAdminFilter(ADMINS))
+@router.callback_query(lambda c: c.data == "statistics", IsBotAdminFilter(ADMINS))
+async def show_stats(event: types.Message | types.CallbackQuery):
+    # Jarayon ishga tushgandan beri yig'ilgan metrikalar (vaqtlar ms da, masalan gemini_ttft_seconds)
+    report = metrics.report()
+    if response_cache is not None:
+        # Javoblar keshi: gemini_responses_cache_hits/_misses/_db_hits hisoblagichlari ham shu ro'yxatda
+        report = f"gemini_responses_hit_rate: {response_cache.hit_rate:.1%}\n{report}"
+    report = report or "Hali metrikalar yo'q"
+    if isinstance(event, types.CallbackQuery):
+        await event.answer()
+        event = event.message
+    await send_chunks(event, split_html(f"<pre>{escape(report)}</pre>"))
 
 
 @router.message(Command('reklama'), IsBotAdminFilter(ADMINS))
@@ -40,19 +69,17 @@ async def ask_ad_content(message: types.Message, state: FSMContext):
 
 @router.message(AdminState.ask_ad_content, IsBotAdminFilter(ADMINS))
 async def send_ad_to_users(message: types.Message, state: FSMContext):
-    users = await db.select_all_users()
-    count = 0
-    for user in users:
-        user_id = user[3]
-        # print(user_id)
-        try:
-            await message.send_copy(chat_id=user_id)
-            count += 1
-            await asyncio.sleep(0.05)
-        except Exception as error:
-            logging.info(f"Ad did not send to user: {user_id}. Error: {error}")
-    await message.answer(text=f"Reklama {count} ta foydalauvchiga muvaffaqiyatli yuborildi.")
     await state.clear()
+    if broadcast.running:
+        await message.answer(text="Boshqa reklama yuborilmoqda, u tugashini kuting ⏳")
+        return
+
+    # Yuborish fonda davom etadi, jarayon shu xabarda ko'rsatib boriladi
+    status_message = await message.answer(text="📤 Reklama yuborish boshlandi...")
+    try:
+        await broadcast.start(from_chat_id=message.chat.id, message_id=message.message_id, status_message=status_message)
+    except BroadcastRunning:
+        await status_message.edit_text("Boshqa reklama yuborilmoqda, u tugashini kuting ⏳")
 
 
 @router.message(Command('cleandb'), IsBotAdminFilter(ADMINS))
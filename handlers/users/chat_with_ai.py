@@ -1,48 +1,63 @@
 import asyncio
-import os
+import io
 import json
+from contextlib import aclosing
 from typing import Optional
-import assemblyai as aai
-from collections import defaultdict
-from datetime import datetime, timedelta
-import re
 from aiogram import Router, types, F
 from aiogram.filters import Command
-from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
 from aiogram.enums.parse_mode import ParseMode
-from loader import bot, db
-from data.config import API_KEY, ASSEMBLYAI_API_KEY
-from componets.messages import buttons, messages
-import google.generativeai as ai
-
-# Configure AI models
-aai.settings.api_key = ASSEMBLYAI_API_KEY
-ai.configure(api_key=API_KEY)
-model = ai.GenerativeModel("gemini-pro")
+from loader import (bot, gemini, response_cache, sessions, voice_processor, transcript_cache, voice_scheduler,
+                    chat_scheduler, ratelimit_redis)
+from data.config import (GEMINI_STREAMING, STREAM_EDIT_INTERVAL,
+                         CHAT_MESSAGE_LIMIT, CONTEXT_TOKEN_BUDGET, CONTEXT_SUMMARY, VOICE_RATE_LIMIT,
+                         SINGLE_FLIGHT, SINGLE_FLIGHT_WAIT)
+from componets.messages import messages
+from filters.buttons import ButtonFilter, BUTTON_INDEX
+from keyboards.reply import get_keyboard
+from utils.stream_reply import StreamingReply, send_chunks
+from utils.markdown import MarkdownRenderer, render_markdown, split_html
+from utils.sessions.context import ContextWindow
+from utils.scheduling import QueueFull
+from utils.ratelimit import TokenBucketLimiter, SlidingWindowLimiter
+from utils.gemini import SingleFlight, Superseded
+from utils.gemini.cache import normalize_prompt
 
 router = Router()
 
-# Session management
-user_sessions = {}
-user_last_request_time = {}
-
-def get_keyboard(language):
-    """Return Reply buttons matching user's language."""
-    return ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text=buttons[language]["btn_new_chat"]), KeyboardButton(text=buttons[language]["btn_stop"])],
-            [KeyboardButton(text=buttons[language]["btn_continue"]), KeyboardButton(text=buttons[language]["btn_change_lang"])]
-        ],
-        resize_keyboard=True,
-        one_time_keyboard=False
+# Session management (sessiyalar loader.sessions da saqlanadi)
+# Rate limiting: matnli savollar orasida kamida 1 soniya, ovozli xabarlar daqiqasiga VOICE_RATE_LIMIT ta
+text_limiter = TokenBucketLimiter("text", rate=1, capacity=1, redis=ratelimit_redis)
+voice_limiter = SlidingWindowLimiter("voice", limit=VOICE_RATE_LIMIT, window=60, redis=ratelimit_redis)
+# Bir xil tarixsiz savollar uchun bitta Gemini so'rovi (kutish SINGLE_FLIGHT_WAIT soniya bilan cheklangan)
+gemini_flights = SingleFlight("gemini", wait_timeout=SINGLE_FLIGHT_WAIT)
+# Navbatdagi so'rovlarni kuzatib turuvchi fon vazifalari
+background_tasks: set[asyncio.Task] = set()
+
+
+async def summarize_history(summary: str, turns: list[dict]) -> str:
+    """Fold turns that left the context window into the rolling summary"""
+    transcript = "\n".join(f"{turn['role']}: {''.join(turn['parts'])}" for turn in turns)
+    prompt = (
+        "Compress the conversation below into a short summary that keeps facts, names and the user's goals. "
+        "Answer with the summary only.\n\n"
+        f"Previous summary:\n{summary or '-'}\n\nConversation:\n{transcript}"
     )
+    response = await gemini.send_message(prompt)
+    return response.text
+
+
+context_window = ContextWindow(
+    sessions,
+    token_budget=CONTEXT_TOKEN_BUDGET,
+    summarizer=summarize_history if CONTEXT_SUMMARY else None
+)
 
-def format_text(text):
-    """Convert text to HTML format"""
-    text = re.sub(r"\*\*([^*]+)\*\*", r"<b>\1</b>", text)
-    text = re.sub(r"\*([^*]+)\*", r"<i>\1</i>", text)
-    text = re.sub(r"`([^`]+)`", r"<code>\1</code>", text)
-    return text
+async def safe_edit_message(message: types.Message, text: str):
+    """Safely edit a message, catching any edit errors"""
+    try:
+        await message.edit_text(text=text, parse_mode=ParseMode.HTML)
+    except Exception as e:
+        print(f"Error editing message: {e}")
 
 async def safe_delete_message(message: types.Message):
     """Safely delete a message, catching any deletion errors"""
@@ -52,112 +67,16 @@ async def safe_delete_message(message: types.Message):
         print(f"Error deleting message: {e}")
         pass
 
-# Rate limiting configuration
-class VoiceRateLimiter:
-    def __init__(self):
-        self.active_users = defaultdict(int)
-        self.last_cleanup = datetime.now()
-        self.cleanup_interval = timedelta(minutes=5)
-        self.max_concurrent_users = 3
-        self.cooldown_period = timedelta(minutes=2)
-        self.user_cooldowns = {}
-
-    def cleanup_old_entries(self):
-        """Remove old entries from tracking"""
-        if datetime.now() - self.last_cleanup > self.cleanup_interval:
-            current_time = datetime.now()
-            self.user_cooldowns = {
-                user: time for user, time in self.user_cooldowns.items()
-                if current_time - time < self.cooldown_period
-            }
-            self.last_cleanup = current_time
-
-    async def check_rate_limit(self, user_id: int) -> tuple[bool, Optional[timedelta]]:
-        """Check if user should be rate limited"""
-        self.cleanup_old_entries()
-        current_time = datetime.now()
-
-        if user_id in self.user_cooldowns:
-            wait_time = self.cooldown_period - (current_time - self.user_cooldowns[user_id])
-            if wait_time > timedelta(0):
-                return True, wait_time
-            else:
-                del self.user_cooldowns[user_id]
-
-        if len(self.active_users) >= self.max_concurrent_users:
-            self.user_cooldowns[user_id] = current_time
-            return True, self.cooldown_period
-
-        self.active_users[user_id] = current_time
-        return False, None
-
-    def release_user(self, user_id: int):
-        """Release user from active processing"""
-        if user_id in self.active_users:
-            del self.active_users[user_id]
-
-rate_limiter = VoiceRateLimiter()
-
-class VoiceProcessor:
-    """Voice processing helper class using AssemblyAI"""
-
-    @staticmethod
-    async def cleanup_files(*file_paths: str):
-        """Clean up temporary files"""
-        for file_path in file_paths:
-            try:
-                if file_path and os.path.exists(file_path):
-                    os.remove(file_path)
-            except Exception as e:
-                print(f"Error cleaning up file {file_path}: {e}")
-
-    @staticmethod
-    async def transcribe_voice(file_path: str, language: str) -> Optional[str]:
-        """Transcribe voice to text using AssemblyAI"""
-        try:
-            transcriber = aai.Transcriber()
-            
-            config = {}
-            if language in ["en", "eng"]:
-                config["language_code"] = "en"
-            elif language == "ru":
-                config["language_code"] = "ru"
-            
-            transcript = transcriber.transcribe(
-                file_path,
-                **config
-            )
-
-            if transcript.status == aai.TranscriptStatus.error:
-                raise Exception(f"Transcription failed: {transcript.error}")
-
-            return transcript.text
-
-        except Exception as e:
-            print(f"Voice transcription error: {str(e)}")
-            return None
-
-        finally:
-            await VoiceProcessor.cleanup_files(file_path)
 
 # Message Handlers
 @router.message(Command("chat"))
-@router.message(lambda message: message.text and any(message.text == buttons[lang]["btn_new_chat"] for lang in ["uz", "ru", "eng", "tr"]))
-async def start_chat(message: types.Message):
+@router.message(ButtonFilter("btn_new_chat"))
+async def start_chat(message: types.Message, language: str):
     """Start AI chatbot with user."""
     telegram_id = message.from_user.id
-    user = await db.select_user(telegram_id=telegram_id)
-    language = user["language"] if user else "uz"
 
     # Reset session if exists
-    if telegram_id in user_sessions:
-        del user_sessions[telegram_id]
-
-    user_sessions[telegram_id] = {
-        "chat": model.start_chat(),
-        "message_count": 0,
-        "language": language
-    }
+    await sessions.create(telegram_id, language)
 
     await message.answer(
         text=messages[language]["start"],
@@ -166,15 +85,12 @@ async def start_chat(message: types.Message):
     )
 
 @router.message(Command("stop"))
-@router.message(lambda message: message.text and any(message.text == buttons[lang]["btn_stop"] for lang in ["uz", "ru", "eng", "tr"]))
-async def stop_chat(message: types.Message):
+@router.message(ButtonFilter("btn_stop"))
+async def stop_chat(message: types.Message, language: str):
     """Stop the chat session."""
     telegram_id = message.from_user.id
-    user = await db.select_user(telegram_id=telegram_id)
-    language = user["language"] if user else "uz"
 
-    if telegram_id in user_sessions:
-        del user_sessions[telegram_id]
+    if await sessions.delete(telegram_id):
         await message.answer(
             text=messages[language]["stop"],
             parse_mode=ParseMode.HTML,
@@ -187,59 +103,73 @@ async def stop_chat(message: types.Message):
             reply_markup=get_keyboard(language)
         )
 
+@router.message(ButtonFilter("btn_continue"))
+async def continue_chat(message: types.Message, language: str):
+    """Continue the existing chat session."""
+    telegram_id = message.from_user.id
+    
+    if not await sessions.exists(telegram_id):
+        await message.answer(
+            text=messages[language]["not_started"],
+            parse_mode=ParseMode.HTML,
+            reply_markup=get_keyboard(language)
+        )
+    else:
+        await message.answer(
+            text=messages[language]["continue"],
+            parse_mode=ParseMode.HTML,
+            reply_markup=get_keyboard(language)
+        )
+
 @router.message(F.voice)
-async def handle_voice(message: types.Message):
+async def handle_voice(message: types.Message, language: str):
     """Handle voice messages"""
     telegram_id = message.from_user.id
-    user = await db.select_user(telegram_id=telegram_id)
-    language = user["language"] if user else "uz"
     
-    if telegram_id not in user_sessions:
+    if not await sessions.exists(telegram_id):
         await message.answer(
             text=messages[language]["not_started"],
             parse_mode=ParseMode.HTML
         )
         return
-    
-    is_limited, wait_time = await rate_limiter.check_rate_limit(telegram_id)
-    if is_limited:
-        wait_minutes = round(wait_time.total_seconds() / 60, 1)
+
+    # Forward qilingan yoki qayta yuborilgan ovozli xabar avval matnga aylantirilgan bo'lsa, keshdan olamiz
+    cached_text = await transcript_cache.get(message.voice.file_unique_id, language)
+    if cached_text:
         await message.answer(
-            text=messages[language]["time_waiter"].format(minutes=wait_minutes),
+            text=messages[language]["voice_recognized"].format(text=cached_text),
             parse_mode=ParseMode.HTML
         )
+        await process_message(message, language, cached_text)
         return
     
+    if await voice_limiter.hit(telegram_id):
+        await message.answer(
+            text=messages[language]["too_fast"],
+            parse_mode=ParseMode.HTML
+        )
+        return
+
     thinking_msg = await message.answer(
         text=messages[language]["voice_processing"],
         parse_mode=ParseMode.HTML
     )
-    
-    voice_path = None
+
+    # Butun jarayon (matnga aylantirish va javob) navbatda bajariladi, handler kutib turmaydi;
+    # navbat to'lgan bo'lsa rad etamiz, aks holda foydalanuvchiga navbatdagi o'rnini ko'rsatamiz
     try:
-        if not message.voice or not message.voice.file_id:
-            raise Exception("Invalid voice message")
-
-        voice = await bot.get_file(message.voice.file_id)
-        voice_path = f"temp_voice_{message.message_id}_{telegram_id}.ogg"
-        await bot.download_file(voice.file_path, voice_path)
-        
-        if not os.path.exists(voice_path) or os.path.getsize(voice_path) < 100:
-            raise Exception("Voice file download failed")
-            
-        voice_text = await VoiceProcessor.transcribe_voice(voice_path, language)
-        
-        if not voice_text:
-            raise Exception("Could not recognize speech in audio")
-        
-        await safe_delete_message(thinking_msg)
-        await message.answer(
-            text=messages[language]["voice_recognized"].format(text=voice_text),
-            parse_mode=ParseMode.HTML
-        )
-        
-        await process_message(message, voice_text)
-        
+        position, result = voice_scheduler.submit(telegram_id, lambda: answer_voice(message, language, thinking_msg))
+    except QueueFull:
+        await safe_edit_message(thinking_msg, messages[language]["voice_busy"])
+        return
+    run_in_background(watch_request(message, language, result))
+    if position:
+        await safe_edit_message(thinking_msg, messages[language]["voice_queued"].format(position=position))
+
+async def answer_voice(message: types.Message, language: str, thinking_msg: types.Message):
+    """Transcribe a voice message and pass its text to the chat (runs on a voice scheduler worker)"""
+    try:
+        voice_text = await transcribe_voice_message(message, language)
     except Exception as e:
         error_msg = str(e)
         print(f"Voice processing error: {error_msg}")
@@ -248,30 +178,50 @@ async def handle_voice(message: types.Message):
             text=f"{messages[language]['voice_error']}\n{error_msg}",
             parse_mode=ParseMode.HTML
         )
-    finally:
-        rate_limiter.release_user(telegram_id)
-        if voice_path:
-            await VoiceProcessor.cleanup_files(voice_path)
+        return
+
+    await safe_delete_message(thinking_msg)
+    await message.answer(
+        text=messages[language]["voice_recognized"].format(text=voice_text),
+        parse_mode=ParseMode.HTML
+    )
+    await process_message(message, language, voice_text)
+
+async def transcribe_voice_message(message: types.Message, language: str) -> str:
+    """Download a voice message into memory and transcribe it (runs on a voice scheduler worker)"""
+    if not message.voice or not message.voice.file_id:
+        raise Exception("Invalid voice message")
+
+    # Ovozli xabar diskka emas, xotiradagi buferga yuklanadi
+    voice = await bot.get_file(message.voice.file_id)
+    audio = await bot.download_file(voice.file_path, destination=io.BytesIO())
+
+    if audio.getbuffer().nbytes < 100:
+        raise Exception("Voice file download failed")
+
+    voice_text = await voice_processor.transcribe_voice(audio.getvalue(), language, duration=message.voice.duration)
+
+    if not voice_text:
+        raise Exception("Could not recognize speech in audio")
+    await transcript_cache.set(message.voice.file_unique_id, language, voice_text)
+    return voice_text
 
 @router.message(F.text)
-async def handle_text(message: types.Message):
+async def handle_text(message: types.Message, language: str):
     """Handle text messages"""
     telegram_id = message.from_user.id
     
     # Skip processing for command buttons
-    if any(message.text == buttons[lang][btn] for lang in ["uz", "ru", "eng", "tr"] 
-           for btn in ["btn_new_chat", "btn_stop", "btn_continue", "btn_change_lang"]):
+    if message.text in BUTTON_INDEX:
         return
     
-    await process_message(message)
+    await process_message(message, language)
 
-async def process_message(message: types.Message, text: Optional[str] = None):
+async def process_message(message: types.Message, language: str, text: Optional[str] = None):
     """Process messages (both voice and text)"""
     telegram_id = message.from_user.id
-    user = await db.select_user(telegram_id=telegram_id)
-    language = user["language"] if user else "uz"
     
-    session = user_sessions.get(telegram_id)
+    session = await sessions.get(telegram_id)
     if not session:
         await message.answer(
             text=messages[language]["not_started"],
@@ -280,46 +230,109 @@ async def process_message(message: types.Message, text: Optional[str] = None):
         )
         return
     
-    # Check message limit
-    if session["message_count"] >= 20:
-        del user_sessions[telegram_id]
+    # Check message limit (0 - cheklov yo'q, tarix ContextWindow orqali cheklanadi)
+    if CHAT_MESSAGE_LIMIT and session.message_count >= CHAT_MESSAGE_LIMIT:
+        await sessions.delete(telegram_id)
         await message.answer(
-            text=messages[language]["limit_reached"],
+            text=messages[language]["limit_reached"].format(limit=CHAT_MESSAGE_LIMIT),
             parse_mode=ParseMode.HTML,
             reply_markup=get_keyboard(language)
         )
         return
     
     # Check rate limiting for text messages
-    current_time = datetime.now()
-    last_request_time = user_last_request_time.get(telegram_id)
-    if last_request_time and (current_time - last_request_time).total_seconds() < 1:
+    if await text_limiter.hit(telegram_id):
         await message.answer(
             text=messages[language]["too_fast"],
             parse_mode=ParseMode.HTML
         )
         return
     
-    user_last_request_time[telegram_id] = current_time
-    
+    input_text = text if text else message.text
+    # So'rov adolatli navbatga qo'yiladi: har bir foydalanuvchi uchun bittadan, kutayotganini eng oxirgi xabar almashtiradi
+    try:
+        result = chat_scheduler.submit(telegram_id, lambda: answer_message(message, language, input_text))
+    except QueueFull:
+        await message.answer(
+            text=messages[language]["chat_busy"],
+            parse_mode=ParseMode.HTML
+        )
+        return
+    run_in_background(watch_request(message, language, result))
+
+
+def run_in_background(coro):
+    """Start a task and keep a reference to it until it finishes"""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+
+async def watch_request(message: types.Message, language: str, result: asyncio.Future):
+    """Wait for a queued request; tell the user when a newer message replaced it"""
+    try:
+        await result
+    except Superseded:
+        await message.reply(
+            text=messages[language]["superseded"],
+            parse_mode=ParseMode.HTML
+        )
+    except Exception as e:
+        print(f"Error processing message: {e}")
+
+
+async def answer_message(message: types.Message, language: str, input_text: str):
+    """Answer one message with Gemini (runs on a chat scheduler worker)"""
+    telegram_id = message.from_user.id
+
+    # Navbatda kutilgan vaqt ichida sessiya o'zgargan bo'lishi mumkin, shuning uchun qayta olinadi
+    session = await sessions.get(telegram_id)
+    if not session:
+        return
+    history_free = not session.history and not session.summary
+    # Tarixsiz (birinchi) savollarga javob keshdan olinishi mumkin - Gemini'ga murojaat qilinmaydi
+    cacheable = history_free and response_cache is not None and response_cache.allows(input_text)
+    if cacheable:
+        cached_answer = await response_cache.get(input_text, language)
+        if cached_answer is not None:
+            await sessions.append(session, session.turn("user", input_text), session.turn("model", cached_answer))
+            await send_chunks(message, split_html(render_markdown(cached_answer)), reply_markup=get_keyboard(language))
+            return
+
     thinking_msg = await message.answer(
         text=messages[language]["thinking"],
         parse_mode=ParseMode.HTML
     )
+
+    async def generate() -> str:
+        history = context_window.build(session)
+        if not GEMINI_STREAMING:
+            response = await gemini.send_message(input_text, history=history)
+            return response.text
+        # Javobni bo'laklab olib, "thinking" xabarini tahrirlab boramiz
+        reply = StreamingReply(thinking_msg, renderer=MarkdownRenderer(), edit_interval=STREAM_EDIT_INTERVAL)
+        async with aclosing(gemini.stream_message(input_text, history=history)) as chunks:
+            async for chunk in chunks:
+                await reply.feed(chunk)
+        await reply.finish(reply_markup=get_keyboard(language))
+        return reply.text
     
     try:
-        input_text = text if text else message.text
-        response = session["chat"].send_message(input_text)
-        session["message_count"] += 1
-        
-        formatted_response = format_text(response.text)
-        
-        await safe_delete_message(thinking_msg)
-        await message.answer(
-            text=formatted_response,
-            parse_mode=ParseMode.HTML,
-            reply_markup=get_keyboard(language)
-        )
+        # Bir vaqtda kelgan bir xil tarixsiz savollar bitta Gemini so'rovini baham ko'radi
+        if history_free and SINGLE_FLIGHT:
+            answer, shared = await gemini_flights.run((normalize_prompt(input_text), language), generate)
+        else:
+            answer, shared = await generate(), False
+
+        if shared or not GEMINI_STREAMING:
+            # Uzun javoblar 4096 belgidan oshmaydigan bo'laklarga bo'linib, tartib bilan yuboriladi
+            formatted_response = split_html(render_markdown(answer))
+            await send_chunks(message, formatted_response, reply_markup=get_keyboard(language), placeholder=thinking_msg)
+
+        await sessions.append(session, session.turn("user", input_text), session.turn("model", answer))
+        if cacheable and not shared:
+            await response_cache.set(input_text, language, answer)
+        await context_window.compact(session)
     except Exception as e:
         print(f"Error processing message: {e}")
         await safe_delete_message(thinking_msg)
@@ -328,23 +341,3 @@ async def process_message(message: types.Message, text: Optional[str] = None):
             parse_mode=ParseMode.HTML,
             reply_markup=get_keyboard(language)
         )
-
-@router.message(lambda message: message.text and any(message.text == buttons[lang]["btn_continue"] for lang in ["uz", "ru", "eng"]))
-async def continue_chat(message: types.Message):
-    """Continue the existing chat session."""
-    telegram_id = message.from_user.id
-    user = await db.select_user(telegram_id=telegram_id)
-    language = user["language"] if user else "uz"
-    
-    if telegram_id not in user_sessions:
-        await message.answer(
-            text=messages[language]["not_started"],
-            parse_mode=ParseMode.HTML,
-            reply_markup=get_keyboard(language)
-        )
-    else:
-        await message.answer(
-            text=messages[language]["continue"],
-            parse_mode=ParseMode.HTML,
-            reply_markup=get_keyboard(language)
-        )
\ No newline at end of file
@@ -1,44 +1,23 @@
-from aiogram import Router, types
+from aiogram import Router, types, F
 from aiogram.filters import CommandStart, Command
 from aiogram.enums.parse_mode import ParseMode
-from aiogram.utils.keyboard import ReplyKeyboardMarkup, KeyboardButton
 from aiogram.client.session.middlewares.request_logging import logger
 from loader import db, bot
 from aiogram.fsm.context import FSMContext
 from data.config import ADMINS
-from componets.messages import messages, buttons
+from componets.messages import messages
+from filters.buttons import ButtonFilter, LANGUAGE_BUTTONS
+from keyboards.reply import get_keyboard, language_keyboard
 from datetime import datetime
 
 router = Router()
 
-# Tilni tanlash uchun ReplyKeyboardMarkup
-def language_keyboard():
-    return ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="🇺🇿 O'zbek"), KeyboardButton(text="🇷🇺 Русский"), KeyboardButton(text='🇺🇸 English'), KeyboardButton(text="🇹🇷 Türkçe")]
-        ],
-        resize_keyboard=True
-    )
-
-def get_keyboard(language):
-    """Foydalanuvchi tiliga mos Reply tugmalarni qaytaradi."""
-    return ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text=buttons[language]["btn_new_chat"]), KeyboardButton(text=buttons[language]["btn_stop"])],
-            [KeyboardButton(text=buttons[language]["btn_continue"]), KeyboardButton(text=buttons[language]["btn_change_lang"])]
-        ],
-        resize_keyboard=True
-    )
-
 @router.message(CommandStart())
-async def do_start(message: types.Message):
+async def do_start(message: types.Message, user, language: str):
     """Foydalanuvchini tekshirish va u tanlagan til bo'yicha xabar yuborish."""
-    telegram_id = message.from_user.id
     full_name = message.from_user.full_name
-    user = await db.select_user(telegram_id=telegram_id)
 
     if user:
-        language = user.get("language", "uz")
         text = messages[language]["start_command"].format(name=full_name)
         await message.answer(
             text=text,
@@ -54,11 +33,7 @@ async def do_start(message: types.Message):
         )
 
 @router.message(Command("change_language"))
-@router.message(lambda message: message.text == buttons["uz"]["btn_change_lang"] or
-                                message.text == buttons["ru"]["btn_change_lang"] or
-                                message.text == buttons["eng"]["btn_change_lang"] or
-                                message.text == buttons["tr"]["btn_change_lang"]
-                                )
+@router.message(ButtonFilter("btn_change_lang"))
 async def get_lang_keyboards(message: types.Message):
     msg = await bot.send_message(
         chat_id=message.from_user.id,
@@ -66,15 +41,14 @@ async def get_lang_keyboards(message: types.Message):
         reply_markup=language_keyboard()
     )
 
-@router.message(lambda message: message.text in ["🇺🇿 O'zbek", "🇷🇺 Русский", "🇺🇸 English", "🇹🇷 Türkçe"])
-async def create_or_update_account(message: types.Message):
+@router.message(F.text.in_(LANGUAGE_BUTTONS))
+async def create_or_update_account(message: types.Message, user):
     """Foydalanuvchini bazaga qo'shish yoki tilini yangilash."""
     telegram_id = message.from_user.id
     full_name = message.from_user.full_name
     username = message.from_user.username
     created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    language_map = {"🇺🇿 O'zbek": "uz", "🇷🇺 Русский": "ru", "🇺🇸 English": "eng", "🇹🇷 Türkçe": "tr"}
-    language = language_map[message.text]
+    language = LANGUAGE_BUTTONS[message.text]
 
     welcome_messages = {
         "uz": ("Akkaunt muvaffaqiyatli yaratildi ✅", 
@@ -94,7 +68,6 @@ async def create_or_update_account(message: types.Message):
         "tr": "Dil başarıyla güncellendi ✅"
     }
     try:
-        user = await db.select_user(telegram_id=telegram_id)
         if user:
             await db.update_user_language(telegram_id, language)
             await message.answer(text=update_messages[language], reply_markup=get_keyboard(language))
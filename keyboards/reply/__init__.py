@@ -0,0 +1 @@
+from .main_menu import get_keyboard, language_keyboard  # noqa
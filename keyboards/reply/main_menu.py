@@ -0,0 +1,60 @@
+from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
+from pydantic import ConfigDict, field_serializer
+
+from componets.messages import buttons
+from filters.buttons import LANGUAGE_BUTTONS
+
+
+class FrozenKeyboardButton(KeyboardButton):
+    model_config = ConfigDict(frozen=True)
+
+
+class FrozenReplyKeyboard(ReplyKeyboardMarkup):
+    """Haqiqatan o'zgarmas ReplyKeyboardMarkup: qatorlar tuple, tugmalar frozen.
+
+    Bitta obyekt barcha javoblarda ishlatiladi, shuning uchun uni biror joyda
+    o'zgartirib qo'yish (m.keyboard.append(...)) barcha foydalanuvchilarga ta'sir qilardi.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    keyboard: tuple[tuple[FrozenKeyboardButton, ...], ...]
+
+    @field_serializer("keyboard")
+    def _rows(self, rows):
+        # aiogram so'rovni tayyorlashda faqat list'larni ochadi
+        return [list(row) for row in rows]
+
+
+def _keyboard(rows, **kwargs) -> FrozenReplyKeyboard:
+    return FrozenReplyKeyboard(
+        keyboard=tuple(tuple(FrozenKeyboardButton(text=text) for text in row) for row in rows),
+        **kwargs
+    )
+
+
+def _main_menu(language):
+    return _keyboard(
+        [
+            [buttons[language]["btn_new_chat"], buttons[language]["btn_stop"]],
+            [buttons[language]["btn_continue"], buttons[language]["btn_change_lang"]]
+        ],
+        resize_keyboard=True,
+        one_time_keyboard=False
+    )
+
+
+# Klaviaturalar ishga tushishda bir marta quriladi va barcha javoblarda bir xil (o'zgarmas) obyekt ishlatiladi
+MAIN_MENU = {language: _main_menu(language) for language in buttons}
+
+LANGUAGE_MENU = _keyboard([list(LANGUAGE_BUTTONS)], resize_keyboard=True)
+
+
+def get_keyboard(language):
+    """Foydalanuvchi tiliga mos Reply tugmalarni qaytaradi."""
+    return MAIN_MENU.get(language, MAIN_MENU["uz"])
+
+
+def language_keyboard():
+    """Tilni tanlash uchun Reply tugmalar."""
+    return LANGUAGE_MENU
@@ -1,3 +1,5 @@
+import importlib.util
+
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums.parse_mode import ParseMode
@@ -5,11 +7,91 @@ from aiogram.utils.i18n import I18n, FSMI18nMiddleware
 from aiogram.fsm.storage.memory import MemoryStorage
 
 from utils.db.postgres import Database
-from data.config import BOT_TOKEN
+from utils.gemini import GeminiExecutor, GeminiClient, KeyPool, KeyBoundModel, ResponseCache, ChatScheduler
+from utils.broadcast import Broadcast
+from utils.voice import VoiceProcessor, TranscriptCache, AssemblyAIBackend, LocalWhisperBackend
+from utils.voice.scheduler import VoiceScheduler
+from utils.sessions import BaseSessionStore, MemorySessionStore, PostgresSessionStore
+from data.config import (BOT_TOKEN, ADMINS, GEMINI_MAX_CONCURRENCY, GEMINI_TIMEOUT, SESSION_BACKEND, REDIS_URL,
+                         API_KEYS, GEMINI_KEY_RPM, GEMINI_KEY_COOLDOWN, GEMINI_KEY_MAX_WAIT, GEMINI_MODEL, GEMINI_FALLBACK_MODEL, GEMINI_RETRIES, GEMINI_RETRY_BACKOFF,
+                         GEMINI_BREAKER_THRESHOLD, GEMINI_BREAKER_RESET,
+                         SESSION_MAX_SIZE, SESSION_IDLE_TTL, SESSION_SWEEP_INTERVAL,
+                         BROADCAST_RATE, BROADCAST_WORKERS, ASSEMBLYAI_API_KEY, ASSEMBLYAI_BASE_URL,
+                         VOICE_MAX_CONCURRENCY, VOICE_TIMEOUT, VOICE_CACHE_SIZE, VOICE_CACHE_TTL, VOICE_CACHE_DB,
+                         VOICE_BACKEND, WHISPER_MODEL, VOICE_LOCAL_WORKERS,
+                         VOICE_WORKERS, VOICE_QUEUE_SIZE, VOICE_QUEUE_PER_USER, RATELIMIT_BACKEND,
+                         RESPONSE_CACHE, RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL, RESPONSE_CACHE_DB,
+                         RESPONSE_CACHE_ALLOWLIST, CHAT_WORKERS, CHAT_QUEUE_SIZE)
+
+
+def create_session_store() -> BaseSessionStore:
+    if SESSION_BACKEND == "postgres":
+        return PostgresSessionStore(db, idle_ttl=SESSION_IDLE_TTL, sweep_interval=SESSION_SWEEP_INTERVAL)
+    if SESSION_BACKEND == "redis":
+        # redis faqat shu backend tanlanganda kerak bo'ladi
+        from utils.sessions.redis import RedisSessionStore
+        return RedisSessionStore(REDIS_URL, idle_ttl=SESSION_IDLE_TTL)
+    return MemorySessionStore(max_size=SESSION_MAX_SIZE, idle_ttl=SESSION_IDLE_TTL, sweep_interval=SESSION_SWEEP_INTERVAL)
+
+
+def create_voice_backend():
+    """VOICE_BACKEND bo'yicha ovozli xabarlarni matnga aylantiruvchi backend."""
+    if VOICE_BACKEND != "local":
+        return AssemblyAIBackend(api_key=ASSEMBLYAI_API_KEY, base_url=ASSEMBLYAI_BASE_URL)
+    # faster-whisper faqat ishchi jarayonlarda yuklanadi: o'rnatilmagan bo'lsa birinchi ovozli xabarda emas,
+    # bot ishga tushayotganda xato beramiz (find_spec modelni asosiy jarayonga yuklamaydi)
+    if importlib.util.find_spec("faster_whisper") is None:
+        raise RuntimeError("VOICE_BACKEND=local requires the optional faster-whisper package: pip install faster-whisper")
+    return LocalWhisperBackend(model_size=WHISPER_MODEL, workers=VOICE_LOCAL_WORKERS)
+
+
+def create_ratelimit_redis():
+    """Limitlar barcha bot nusxalari uchun umumiy bo'lishi kerak bo'lsa, Redis klienti; aks holda None (xotirada)."""
+    if RATELIMIT_BACKEND != "redis":
+        return None
+    from redis import asyncio as aioredis
+    return aioredis.from_url(REDIS_URL)
 
 
 db = Database()
+gemini_keys = KeyPool(
+    API_KEYS,
+    model_factory=KeyBoundModel,
+    rpm=GEMINI_KEY_RPM,
+    cooldown=GEMINI_KEY_COOLDOWN,
+    max_wait=GEMINI_KEY_MAX_WAIT
+)
+gemini = GeminiClient(
+    executor=GeminiExecutor(max_concurrency=GEMINI_MAX_CONCURRENCY, timeout=GEMINI_TIMEOUT),
+    model=gemini_keys.model(GEMINI_MODEL),
+    fallback=gemini_keys.model(GEMINI_FALLBACK_MODEL) if GEMINI_FALLBACK_MODEL else None,
+    retries=GEMINI_RETRIES,
+    backoff=GEMINI_RETRY_BACKOFF,
+    failure_threshold=GEMINI_BREAKER_THRESHOLD,
+    reset_timeout=GEMINI_BREAKER_RESET
+)
+response_cache = ResponseCache(
+    db=db if RESPONSE_CACHE_DB else None,
+    maxsize=RESPONSE_CACHE_SIZE,
+    ttl=RESPONSE_CACHE_TTL,
+    allowlist=RESPONSE_CACHE_ALLOWLIST
+) if RESPONSE_CACHE else None
+chat_scheduler = ChatScheduler(
+    workers=CHAT_WORKERS,
+    max_queue=CHAT_QUEUE_SIZE,
+    priority_users=[int(admin) for admin in ADMINS]
+)
+sessions = create_session_store()
+ratelimit_redis = create_ratelimit_redis()
 bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+broadcast = Broadcast(bot=bot, db=db, rate=BROADCAST_RATE, workers=BROADCAST_WORKERS)
+voice_processor = VoiceProcessor(
+    backend=create_voice_backend(),
+    max_concurrency=VOICE_MAX_CONCURRENCY,
+    timeout=VOICE_TIMEOUT
+)
+voice_scheduler = VoiceScheduler(workers=VOICE_WORKERS, max_queue=VOICE_QUEUE_SIZE, max_per_user=VOICE_QUEUE_PER_USER)
+transcript_cache = TranscriptCache(db=db if VOICE_CACHE_DB else None, maxsize=VOICE_CACHE_SIZE, ttl=VOICE_CACHE_TTL)
 
 
 storage = MemoryStorage()
@@ -1 +1,2 @@
 from .throttling import ThrottlingMiddleware
+from .user_context import UserContextMiddleware
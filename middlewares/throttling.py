@@ -1,28 +1,23 @@
-import time
-
 from aiogram.dispatcher.middlewares.base import BaseMiddleware
 from aiogram.types import Message
 
+from utils.ratelimit import TokenBucketLimiter
+
 
 class ThrottlingMiddleware(BaseMiddleware):
-    def __init__(self, slow_mode_delay=0.5):
-        self.user_timeouts = {}
+    def __init__(self, slow_mode_delay=0.5, redis=None):
+        # Har bir foydalanuvchi uchun slow_mode_delay soniyada bitta so'rov (redis berilsa barcha nusxalar uchun umumiy)
+        self.limiter = TokenBucketLimiter("throttling", rate=1 / slow_mode_delay, capacity=1, redis=redis)
         self.slow_mode_delay = slow_mode_delay
         super(ThrottlingMiddleware, self).__init__()
 
     async def __call__(self, handler, event: Message, data):
         user_id = event.from_user.id
-        current_time = time.time()
-        
-        # Ushbu foydalanuvchining so'nggi so'rovi bo'yicha yozuv mavjudligini tekshirish
-        last_request_time = self.user_timeouts.get(user_id, 0)
-        if current_time - last_request_time < self.slow_mode_delay:
+
+        if await self.limiter.hit(user_id):
             # Agar so'rovlar juda tez-tez bo'lsa, sekin rejimni yoqish
             await event.reply("Juda ko'p so'rov! Biroz kuting.")
             return
-        
-        else:
-            # Oxirgi so'rovning vaqtini yangilash
-            self.user_timeouts[user_id] = current_time
-            # Event ni handlerga o'tkazish
-            return await handler(event, data)
+
+        # Event ni handlerga o'tkazish
+        return await handler(event, data)
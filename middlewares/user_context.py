@@ -0,0 +1,22 @@
+from aiogram.dispatcher.middlewares.base import BaseMiddleware
+
+
+class UserContextMiddleware(BaseMiddleware):
+    """Har bir update uchun foydalanuvchini bir marta yuklab, handlerlarga `user` va `language` ni uzatadi."""
+
+    def __init__(self, db, default_language="uz"):
+        self.db = db
+        self.default_language = default_language
+        super(UserContextMiddleware, self).__init__()
+
+    async def __call__(self, handler, event, data):
+        from_user = data.get("event_from_user")
+        user = await self.db.select_user(telegram_id=from_user.id) if from_user else None
+
+        if user and not user["is_active"]:
+            # Botni bloklab, keyin qaytgan foydalanuvchi yana reklama oladi
+            await self.db.set_user_active(user["telegram_id"], True)
+
+        data["user"] = user
+        data["language"] = user["language"] if user else self.default_language
+        return await handler(event, data)
@@ -0,0 +1,16 @@
+import os
+
+# data.config majburiy o'zgaruvchilarni talab qiladi (utils/__init__ uni import qiladi);
+# testlar tarmoqqa chiqmaydi, shuning uchun soxta qiymatlar yetarli
+for name, value in {
+    "BOT_TOKEN": "123456:test",
+    "ADMINS": "1",
+    "API_KEY": "test",
+    "ASSEMBLYAI_API_KEY": "test",
+    "DB_USER": "test",
+    "DB_PASS": "test",
+    "DB_NAME": "test",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+}.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,68 @@
+"""Local stand-ins for Gemini models, so tests never reach the network."""
+import asyncio
+
+
+class FakeError(Exception):
+    def __init__(self, code):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeStream:
+    def __init__(self, chunks, delay=0.0):
+        self.chunks = list(chunks)
+        self.delay = delay
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.chunks:
+            raise StopAsyncIteration
+        await asyncio.sleep(self.delay)
+        return FakeResponse(self.chunks.pop(0))
+
+    async def aclose(self):
+        self.closed = True
+
+
+class FakeModel:
+    """`model_name` / `start_chat` / `send_message_async` like GenerativeModel.
+
+    `script` is a list of outcomes used in order, one per call: an
+    exception instance is raised, anything else is the answer text.
+    """
+
+    def __init__(self, model_name="fake", script=None, delay=0.0, api_key=None):
+        self.model_name = model_name
+        self.api_key = api_key
+        self.script = list(script or [])
+        self.delay = delay
+        self.calls = 0
+        self.streams = []
+
+    def start_chat(self, history=None):
+        return FakeChat(self)
+
+
+class FakeChat:
+    def __init__(self, model):
+        self.model = model
+
+    async def send_message_async(self, text, stream=False):
+        model = self.model
+        model.calls += 1
+        await asyncio.sleep(model.delay)
+        outcome = model.script.pop(0) if model.script else f"echo: {text}"
+        if isinstance(outcome, BaseException):
+            raise outcome
+        if stream:
+            model.streams.append(FakeStream(outcome.split(" "), delay=0))
+            return model.streams[-1]
+        return FakeResponse(outcome)
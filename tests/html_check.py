@@ -0,0 +1,22 @@
+from html.parser import HTMLParser
+
+
+class _Balance(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.stack = []
+
+    def handle_starttag(self, tag, attrs):
+        self.stack.append(tag)
+
+    def handle_endtag(self, tag):
+        assert self.stack and self.stack[-1] == tag, f"unexpected </{tag}> with {self.stack}"
+        self.stack.pop()
+
+
+def assert_valid(html: str):
+    """Every tag is closed, in order (what Telegram's HTML parser requires)."""
+    parser = _Balance()
+    parser.feed(html)
+    parser.close()
+    assert not parser.stack, f"unclosed {parser.stack}"
@@ -0,0 +1,96 @@
+"""Local stand-in for the AssemblyAI REST API (upload, create transcript, poll).
+
+Used by the voice tests through `AssemblyAIBackend(base_url=...)`, and
+can be run on its own to exercise the bot without the real service:
+
+    python tests/stub_transcription.py --port 8089
+    ASSEMBLYAI_BASE_URL=http://127.0.0.1:8089 python app.py
+
+Every transcript is "processing" for `delay` seconds and then completes
+with `text` (or fails with `error` if one is set). The server keeps the
+requests it saw, so tests can check what the client sent.
+"""
+import argparse
+import itertools
+import time
+from typing import Optional
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+
+class StubTranscriptionServer:
+    def __init__(self, text: str = "salom dunyo", delay: float = 0.0, error: Optional[str] = None, api_key: str = "test"):
+        self.text = text
+        self.delay = delay
+        self.error = error
+        self.api_key = api_key
+        self.uploads: list[bytes] = []
+        self.requests: list[dict] = []
+        self.polls = 0
+        self._ids = itertools.count(1)
+        self._transcripts: dict[str, tuple[float, dict]] = {}
+        self._server: Optional[TestServer] = None
+
+    def app(self) -> web.Application:
+        @web.middleware
+        async def authorize(request, handler):
+            if request.headers.get("authorization") != self.api_key:
+                return web.json_response({"error": "Invalid API key"}, status=401)
+            return await handler(request)
+
+        app = web.Application(middlewares=[authorize])
+        app.router.add_post("/v2/upload", self.upload)
+        app.router.add_post("/v2/transcript", self.create)
+        app.router.add_get("/v2/transcript/{id}", self.poll)
+        return app
+
+    async def upload(self, request: web.Request):
+        self.uploads.append(await request.read())
+        return web.json_response({"upload_url": f"stub://upload/{len(self.uploads)}"})
+
+    async def create(self, request: web.Request):
+        payload = await request.json()
+        self.requests.append(payload)
+        transcript_id = str(next(self._ids))
+        self._transcripts[transcript_id] = (time.monotonic() + self.delay, payload)
+        return web.json_response(self._state(transcript_id))
+
+    async def poll(self, request: web.Request):
+        self.polls += 1
+        transcript_id = request.match_info["id"]
+        if transcript_id not in self._transcripts:
+            return web.json_response({"error": "not found"}, status=404)
+        return web.json_response(self._state(transcript_id))
+
+    def _state(self, transcript_id: str) -> dict:
+        ready_at, _ = self._transcripts[transcript_id]
+        if time.monotonic() < ready_at:
+            return {"id": transcript_id, "status": "processing"}
+        if self.error:
+            return {"id": transcript_id, "status": "error", "error": self.error}
+        return {"id": transcript_id, "status": "completed", "text": self.text}
+
+    async def __aenter__(self) -> str:
+        """Start on a free local port and return its base URL."""
+        self._server = TestServer(self.app())
+        await self._server.start_server()
+        return str(self._server.make_url("")).rstrip("/")
+
+    async def __aexit__(self, *exc):
+        await self._server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--text", default="salom dunyo")
+    parser.add_argument("--delay", type=float, default=1.0)
+    parser.add_argument("--api-key", default="test", help="must match ASSEMBLYAI_API_KEY")
+    args = parser.parse_args()
+    stub = StubTranscriptionServer(text=args.text, delay=args.delay, api_key=args.api_key)
+    web.run_app(stub.app(), host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import asyncio
+
+import pytest
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+
+from utils.broadcast import Broadcast, BroadcastRunning
+
+
+class FakeDb:
+    def __init__(self, users):
+        self.users = users
+        self.recipients = {}
+        self.checkpoints = []
+        self.finished = False
+        self.inactive = []
+
+    async def count_active_users(self):
+        await asyncio.sleep(0)
+        return len(self.users)
+
+    async def create_broadcast_job(self, from_chat_id, message_id, total):
+        await asyncio.sleep(0)
+        return {"id": 1, "from_chat_id": from_chat_id, "message_id": message_id, "total": total, "checkpoint": 0}
+
+    async def count_broadcast_recipients(self, job_id):
+        counts = {}
+        for status, _ in self.recipients.values():
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    async def iterate_user_ids(self, job_id, after=0):
+        for user_id in self.users:
+            status = self.recipients.get(user_id, (None, None))[0]
+            if user_id > after and status in (None, "retry_after"):
+                yield user_id
+
+    async def set_broadcast_recipient_statuses(self, job_id, statuses):
+        for user_id, status, error in statuses:
+            self.recipients[user_id] = (status, error)
+
+    async def update_broadcast_checkpoint(self, job_id, checkpoint):
+        self.checkpoints.append(checkpoint)
+
+    async def finish_broadcast_job(self, job_id):
+        self.finished = True
+
+    async def set_user_active(self, telegram_id, is_active):
+        self.inactive.append(telegram_id)
+
+
+class FakeBot:
+    def __init__(self, errors=None):
+        # telegram_id -> shu foydalanuvchiga ketma-ket chiqariladigan xatolar
+        self.errors = errors or {}
+        self.sent = []
+
+    async def copy_message(self, chat_id, from_chat_id, message_id):
+        errors = self.errors.get(chat_id)
+        if errors:
+            raise errors.pop(0)
+        self.sent.append(chat_id)
+
+
+class FakeMessage:
+    async def edit_text(self, text):
+        self.text = text
+
+
+def flood():
+    return TelegramRetryAfter(method=None, message="Too Many Requests", retry_after=0)
+
+
+def test_sends_to_everyone_and_records_outcomes():
+    db = FakeDb(users=[1, 2, 3, 4])
+    bot = FakeBot(errors={2: [TelegramForbiddenError(method=None, message="blocked")]})
+    broadcast = Broadcast(bot, db, rate=1000, workers=2, max_retries=2)
+
+    async def main():
+        await broadcast.start(from_chat_id=10, message_id=20, status_message=FakeMessage())
+        await broadcast.task
+
+    asyncio.run(main())
+    assert sorted(bot.sent) == [1, 3, 4]
+    assert {user: status for user, (status, _) in db.recipients.items()} == {1: "sent", 2: "blocked", 3: "sent", 4: "sent"}
+    assert db.inactive == [2] and db.finished
+    assert db.checkpoints[-1] == 4
+
+
+def test_flood_limited_recipient_is_retried_not_failed():
+    db = FakeDb(users=[1, 2, 3])
+    # max_retries dan ko'p flood xatosi: birinchi o'tishda yuborilmaydi, yakuniy o'tishda yuboriladi
+    bot = FakeBot(errors={2: [flood(), flood()]})
+    broadcast = Broadcast(bot, db, rate=1000, workers=1, max_retries=2)
+
+    async def main():
+        await broadcast.start(from_chat_id=10, message_id=20, status_message=FakeMessage())
+        await broadcast.task
+
+    asyncio.run(main())
+    assert bot.sent == [1, 3, 2]
+    assert db.recipients[2][0] == "sent"
+    assert broadcast.failed == 0 and broadcast.sent == 3
+
+
+def test_still_flood_limited_recipient_keeps_retry_after_and_holds_checkpoint():
+    db = FakeDb(users=[1, 2, 3])
+    bot = FakeBot(errors={2: [flood()] * 4})
+    broadcast = Broadcast(bot, db, rate=1000, workers=1, max_retries=2)
+
+    async def main():
+        await broadcast.start(from_chat_id=10, message_id=20, status_message=FakeMessage())
+        await broadcast.task
+
+    asyncio.run(main())
+    assert db.recipients[2][0] == "retry_after"
+    assert broadcast.failed == 0
+    # Checkpoint 2 dan o'tmaydi, qayta ishga tushirilgan ish uni yana oladi
+    assert db.checkpoints[-1] == 1
+
+    resumed_bot = FakeBot()
+    resumed = Broadcast(resumed_bot, db, rate=1000, workers=1)
+
+    async def resume():
+        job = {"id": 1, "from_chat_id": 10, "message_id": 20, "total": 3, "checkpoint": db.checkpoints[-1]}
+        await resumed.run(job, FakeMessage())
+
+    asyncio.run(resume())
+    assert resumed_bot.sent == [2]
+    assert db.recipients[2][0] == "sent"
+
+
+def test_second_start_is_rejected_while_first_is_starting():
+    db = FakeDb(users=[1])
+    broadcast = Broadcast(FakeBot(), db, rate=1000)
+
+    async def main():
+        first = asyncio.create_task(broadcast.start(from_chat_id=10, message_id=20, status_message=FakeMessage()))
+        await asyncio.sleep(0)
+        # Birinchisi hali bazadan javob kutmoqda, lekin allaqachon band
+        assert broadcast.running
+        with pytest.raises(BroadcastRunning):
+            await broadcast.start(from_chat_id=10, message_id=21, status_message=FakeMessage())
+        await (await first)
+
+    asyncio.run(main())
+    assert db.finished
@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+
+from utils.gemini import ChatScheduler, Superseded
+from utils.scheduling import QueueFull
+
+
+def test_users_are_served_fairly():
+    async def main():
+        scheduler = ChatScheduler(workers=1, max_queue=100)
+        order = []
+
+        def job(user, index):
+            async def call():
+                order.append((user, index))
+            return call
+
+        # A bitta ishchini band qiladi, keyin yana yozadi; B va C navbatda
+        blocker = asyncio.Event()
+
+        async def first():
+            await blocker.wait()
+            order.append(("a", 0))
+
+        futures = [scheduler.submit(1, first)]
+        scheduler.start()
+        await asyncio.sleep(0)
+        futures += [scheduler.submit(1, job("a", 1)), scheduler.submit(2, job("b", 1)), scheduler.submit(3, job("c", 1))]
+        blocker.set()
+        await asyncio.gather(*futures)
+        await scheduler.close()
+        # Hozirgina xizmat ko'rsatilgan A boshqalardan keyin turadi
+        assert order == [("a", 0), ("b", 1), ("c", 1), ("a", 1)]
+
+    asyncio.run(main())
+
+
+def test_latest_message_wins():
+    async def main():
+        scheduler = ChatScheduler(workers=1)
+        release = asyncio.Event()
+
+        async def running():
+            await release.wait()
+            return "first"
+
+        async def answer(text):
+            return text
+
+        first = scheduler.submit(1, running)
+        scheduler.start()
+        await asyncio.sleep(0)
+        older = scheduler.submit(1, lambda: answer("older"))
+        newer = scheduler.submit(1, lambda: answer("newer"))
+        release.set()
+        assert await first == "first"
+        with pytest.raises(Superseded):
+            await older
+        assert await newer == "newer"
+        assert scheduler.coalesced.value >= 1
+        await scheduler.close()
+
+    asyncio.run(main())
+
+
+def test_one_request_per_user_at_a_time():
+    async def main():
+        scheduler = ChatScheduler(workers=4)
+        running = set()
+        overlaps = []
+
+        def job(user):
+            async def call():
+                overlaps.append(user in running)
+                running.add(user)
+                await asyncio.sleep(0.01)
+                running.discard(user)
+            return call
+
+        scheduler.start()
+        futures = []
+        for _ in range(3):
+            futures.append(scheduler.submit(1, job(1)))
+            futures.append(scheduler.submit(2, job(2)))
+            await asyncio.sleep(0.001)
+        await asyncio.gather(*futures, return_exceptions=True)
+        await scheduler.close()
+        assert not any(overlaps)
+
+    asyncio.run(main())
+
+
+def test_queue_full_and_admin_bypass():
+    async def main():
+        scheduler = ChatScheduler(workers=1, max_queue=2, priority_users=[99])
+        order = []
+
+        def job(user):
+            async def call():
+                order.append(user)
+            return call
+
+        futures = [scheduler.submit(1, job(1)), scheduler.submit(2, job(2))]
+        with pytest.raises(QueueFull):
+            scheduler.submit(3, job(3))
+        # Adminlar navbat to'la bo'lsa ham qabul qilinadi va birinchi xizmat ko'radi
+        futures.append(scheduler.submit(99, job(99)))
+        assert scheduler.rejected.value >= 1
+        scheduler.start()
+        await asyncio.gather(*futures)
+        await scheduler.close()
+        assert order == [99, 1, 2]
+
+    asyncio.run(main())
+
+
+def test_errors_reach_the_caller():
+    async def main():
+        scheduler = ChatScheduler(workers=1)
+        scheduler.start()
+
+        async def fail():
+            raise ValueError("bad")
+
+        with pytest.raises(ValueError):
+            await scheduler.submit(1, fail)
+        assert scheduler.busy == 0
+        await scheduler.close()
+
+    asyncio.run(main())
@@ -0,0 +1,140 @@
+import asyncio
+
+from utils.sessions import MemorySessionStore, UserSession
+from utils.sessions.context import SUMMARY_ACK, ContextWindow
+
+
+def session_with(exchanges: int, size: int = 40) -> UserSession:
+    """`exchanges` question/answer pairs of `size` characters each (size // 4 + 1 tokens per turn)."""
+    session = UserSession(telegram_id=1, language="en")
+    for index in range(exchanges):
+        session.history += [
+            UserSession.turn("user", f"q{index}".ljust(size, ".")),
+            UserSession.turn("model", f"a{index}".ljust(size, ".")),
+        ]
+    return session
+
+
+def texts(history):
+    return [turn["parts"][0][:2] for turn in history]
+
+
+def test_whole_history_fits_in_budget():
+    window = ContextWindow(MemorySessionStore(), token_budget=1000)
+    session = session_with(3)
+    assert window.build(session) == session.history
+
+
+def test_only_recent_exchanges_fit():
+    # Har bir juftlik 22 token: 50 tokenga ikkitasi sig'adi
+    window = ContextWindow(MemorySessionStore(), token_budget=50)
+    history = window.build(session_with(5))
+    assert texts(history) == ["q3", "a3", "q4", "a4"]
+    assert history[0]["role"] == "user"
+
+
+def test_latest_exchange_is_kept_even_over_budget():
+    window = ContextWindow(MemorySessionStore(), token_budget=10)
+    assert texts(window.build(session_with(3, size=400))) == ["q2", "a2"]
+
+
+def test_summary_is_sent_first_and_counts_against_budget():
+    window = ContextWindow(MemorySessionStore(), token_budget=50)
+    session = session_with(5)
+    session.summary = "s" * 40
+    history = window.build(session)
+    assert history[0]["role"] == "user" and session.summary in history[0]["parts"][0]
+    assert history[1]["parts"] == [SUMMARY_ACK]
+    # Xulosa 10 token oldi: endi faqat bitta juftlik sig'adi
+    assert texts(history[2:]) == ["q4", "a4"]
+
+
+def test_compact_waits_for_enough_dropped_turns():
+    store = MemorySessionStore()
+    window = ContextWindow(store, token_budget=50, compact_after=8)
+
+    async def main():
+        session = await store.create(1, "en")
+        session.history = session_with(5).history
+        await window.compact(session)
+        return session
+
+    # Oynadan tashqarida 6 ta turn: hali siqilmaydi
+    assert len(asyncio.run(main()).history) == 10
+
+
+def test_compact_folds_dropped_turns_into_summary():
+    store = MemorySessionStore()
+    seen = []
+
+    async def summarizer(summary, turns):
+        seen.append((summary, texts(turns)))
+        return "earlier: " + ",".join(texts(turns))
+
+    window = ContextWindow(store, token_budget=50, summarizer=summarizer, compact_after=4)
+
+    async def main():
+        session = await store.create(1, "en")
+        session.history = session_with(5).history
+        await window.compact(session)
+        return session, await store.get(1)
+
+    session, stored = asyncio.run(main())
+    assert seen == [("", ["q0", "a0", "q1", "a1", "q2", "a2"])]
+    assert stored is session
+    assert session.summary == "earlier: q0,a0,q1,a1,q2,a2"
+    # Tarixdan faqat oynadan chiqqan turnlar o'chirildi
+    assert texts(session.history) == ["q3", "a3", "q4", "a4"]
+
+
+def test_compact_without_summarizer_just_drops():
+    store = MemorySessionStore()
+    window = ContextWindow(store, token_budget=50, compact_after=4)
+
+    async def main():
+        session = await store.create(1, "en")
+        session.history = session_with(5).history
+        await window.compact(session)
+        return session
+
+    session = asyncio.run(main())
+    assert session.summary == ""
+    assert texts(session.history) == ["q3", "a3", "q4", "a4"]
+
+
+def test_failed_summary_keeps_history():
+    store = MemorySessionStore()
+
+    async def summarizer(summary, turns):
+        raise RuntimeError("gemini is down")
+
+    window = ContextWindow(store, token_budget=50, summarizer=summarizer, compact_after=4)
+
+    async def main():
+        session = await store.create(1, "en")
+        session.history = session_with(5).history
+        await window.compact(session)
+        return session
+
+    session = asyncio.run(main())
+    assert len(session.history) == 10 and session.summary == ""
+
+
+def test_one_compaction_per_session_at_a_time():
+    store = MemorySessionStore()
+    calls = []
+
+    async def summarizer(summary, turns):
+        calls.append(len(turns))
+        await asyncio.sleep(0.01)
+        return "summary"
+
+    window = ContextWindow(store, token_budget=50, summarizer=summarizer, compact_after=4)
+
+    async def main():
+        session = await store.create(1, "en")
+        session.history = session_with(5).history
+        await asyncio.gather(window.compact(session), window.compact(session))
+
+    asyncio.run(main())
+    assert calls == [6]
@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from utils.gemini import GeminiExecutor
+from fakes import FakeModel
+
+
+def test_caps_requests_in_flight():
+    model = FakeModel(delay=0.02)
+    executor = GeminiExecutor(max_concurrency=2, timeout=1)
+    peak = 0
+
+    async def watch():
+        nonlocal peak
+        while True:
+            peak = max(peak, executor.in_flight)
+            await asyncio.sleep(0.001)
+
+    async def main():
+        watcher = asyncio.create_task(watch())
+        await asyncio.gather(*(executor.send_message(model.start_chat(), "hi") for _ in range(6)))
+        watcher.cancel()
+
+    asyncio.run(main())
+    assert peak == 2
+    assert executor.in_flight == 0
+
+
+def test_slow_call_times_out_without_blocking_the_loop():
+    model = FakeModel(delay=10)
+    executor = GeminiExecutor(timeout=0.05)
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.005)
+
+    async def main():
+        ticker = asyncio.create_task(tick())
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.send_message(model.start_chat(), "hi")
+        ticker.cancel()
+
+    asyncio.run(main())
+    assert ticks >= 5
+    assert executor.in_flight == 0
+
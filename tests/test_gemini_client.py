@@ -0,0 +1,96 @@
+import asyncio
+import time
+
+import pytest
+
+from utils.gemini import CircuitOpen, GeminiClient, GeminiExecutor
+from utils.gemini.client import CircuitBreaker
+from fakes import FakeError, FakeModel
+
+
+def client(model, fallback=None, **kwargs):
+    options = dict(retries=2, backoff=0.001, failure_threshold=3, reset_timeout=0.05)
+    options.update(kwargs)
+    return GeminiClient(GeminiExecutor(max_concurrency=4, timeout=1), model, fallback=fallback, **options)
+
+
+def test_breaker_opens_then_half_opens():
+    breaker = CircuitBreaker("test_breaker", failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.state == "half_open"
+    # Faqat bitta sinov so'rovi o'tkaziladi
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_retries_transient_errors():
+    model = FakeModel(script=[FakeError(503), FakeError(429), "ok"])
+    gemini = client(model)
+    assert asyncio.run(gemini.send_message("hi")).text == "ok"
+    assert model.calls == 3
+    assert gemini.breakers["fake"].state == "closed"
+
+
+def test_non_retryable_error_is_raised_at_once():
+    model = FakeModel(script=[FakeError(400)])
+    with pytest.raises(FakeError):
+        asyncio.run(client(model).send_message("hi"))
+    assert model.calls == 1
+
+
+def test_falls_back_and_opens_circuit():
+    primary = FakeModel("primary", script=[FakeError(503)] * 3)
+    fallback = FakeModel("light")
+    gemini = client(primary, fallback)
+
+    async def main():
+        assert (await gemini.send_message("hi")).text == "echo: hi"
+        assert gemini.breakers["primary"].state == "open"
+        # Zanjir ochiq: asosiy modelga umuman murojaat qilinmaydi
+        assert (await gemini.send_message("again")).text == "echo: again"
+
+    asyncio.run(main())
+    assert primary.calls == 3
+    assert fallback.calls == 2
+
+
+def test_circuit_open_without_fallback():
+    gemini = client(FakeModel(script=[FakeError(503)] * 3))
+
+    async def main():
+        with pytest.raises(FakeError):
+            await gemini.send_message("hi")
+        with pytest.raises(CircuitOpen):
+            await gemini.send_message("hi")
+
+    asyncio.run(main())
+
+
+def test_timeout_is_retryable():
+    model = FakeModel(delay=0.2)
+    gemini = GeminiClient(GeminiExecutor(timeout=0.01), model, retries=1, backoff=0.001)
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(gemini.send_message("hi"))
+    assert model.calls == 2
+
+
+def test_stream_retries_only_before_first_chunk():
+    model = FakeModel(script=[FakeError(503), "a b c"])
+    gemini = client(model)
+
+    async def main():
+        return [chunk async for chunk in gemini.stream_message("hi")]
+
+    assert asyncio.run(main()) == ["a", "b", "c"]
+    assert model.calls == 2
+    assert model.streams[-1].closed
@@ -0,0 +1,153 @@
+import asyncio
+
+import pytest
+
+from utils.gemini import GeminiClient, GeminiExecutor, KeyPool, KeysExhausted
+from fakes import FakeError, FakeModel
+
+
+def pool(keys=("k1", "k2"), scripts=None, **kwargs):
+    scripts = scripts or {}
+    models = {}
+
+    def factory(model_name, api_key):
+        models[api_key] = FakeModel(model_name, script=scripts.get(api_key), api_key=api_key)
+        return models[api_key]
+
+    return KeyPool(list(keys), model_factory=factory, **kwargs), models
+
+
+def test_spreads_requests_over_keys():
+    keys, models = pool(rpm=10)
+
+    async def main():
+        chat = keys.model("m").start_chat()
+        for _ in range(4):
+            await chat.send_message_async("hi")
+
+    asyncio.run(main())
+    assert models["k1"].calls == 2 and models["k2"].calls == 2
+    assert all(key.in_flight == 0 for key in keys.keys)
+
+
+def test_rate_limited_key_is_cooled_down_and_skipped():
+    keys, models = pool(scripts={"k1": [FakeError(429)]}, cooldown=60)
+
+    async def main():
+        chat = keys.model("m").start_chat()
+        assert (await chat.send_message_async("hi")).text == "echo: hi"
+        await chat.send_message_async("again")
+
+    asyncio.run(main())
+    assert models["k1"].calls == 1
+    assert models["k2"].calls == 2
+    assert keys.keys[0].rate_limited.value == 1
+    assert keys.available_in() == 0
+
+
+def test_all_keys_out_raises_keys_exhausted_with_retry_after():
+    keys, _ = pool(scripts={"k1": [FakeError(429)], "k2": [FakeError(429)]}, cooldown=30)
+
+    async def main():
+        with pytest.raises(KeysExhausted) as error:
+            await keys.model("m").start_chat().send_message_async("hi")
+        return error.value
+
+    error = asyncio.run(main())
+    assert error.retry_after == pytest.approx(30, abs=1)
+    assert not hasattr(error, "code")
+
+
+def test_rpm_window_and_wait_available():
+    keys, _ = pool(keys=("k1",), rpm=1, max_wait=0.01)
+    keys.release(keys.acquire())
+    with pytest.raises(KeysExhausted):
+        keys.acquire()
+    assert keys.available_in() == pytest.approx(60, abs=1)
+    with pytest.raises(KeysExhausted):
+        asyncio.run(keys.wait_available())
+
+
+def test_wait_available_waits_for_cooldown():
+    keys, _ = pool(keys=("k1",), cooldown=0.05, max_wait=1)
+    key = keys.acquire()
+    keys.release(key, FakeError(429))
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await keys.model("m").wait_ready()
+        return loop.time() - started
+
+    assert asyncio.run(main()) >= 0.04
+    assert keys.waits.value >= 1
+
+
+def test_rejected_key_is_parked():
+    keys, _ = pool(keys=("k1",), max_cooldown=600)
+    keys.release(keys.acquire(), FakeError(403))
+    assert keys.available_in() == pytest.approx(600, abs=1)
+
+
+def test_abandoned_stream_releases_key():
+    keys, models = pool(keys=("k1",))
+
+    async def main():
+        chunks = await keys.model("m").start_chat().send_message_async("one two three", stream=True)
+        async for _ in chunks:
+            break
+        assert keys.keys[0].in_flight == 1
+        await chunks.aclose()
+
+    asyncio.run(main())
+    assert keys.keys[0].in_flight == 0
+    assert models["k1"].streams[0].closed
+
+
+def test_keys_exhausted_does_not_trip_breaker():
+    class Pooled(FakeModel):
+        async def wait_ready(self):
+            self.waited = getattr(self, "waited", 0) + 1
+
+    model = Pooled(script=[KeysExhausted("busy", retry_after=0)] * 2)
+    gemini = GeminiClient(GeminiExecutor(), model, retries=2, backoff=0.001, failure_threshold=1)
+    assert asyncio.run(gemini.send_message("hi")).text == "echo: hi"
+    assert model.waited == 3
+    assert gemini.breakers["fake"].failures == 0
+
+
+
+def test_single_key_429_is_waited_out():
+    # Standart sozlama: bitta kalit, dam olish vaqti kutish chegarasidan uzun
+    keys, models = pool(keys=("only",), scripts={"only": [FakeError(429)]}, cooldown=60, max_wait=0.05)
+    gemini = GeminiClient(GeminiExecutor(), keys.model("m"), retries=2, backoff=0.001, failure_threshold=1)
+
+    assert asyncio.run(gemini.send_message("hi")).text == "echo: hi"
+    assert models["only"].calls == 2
+    assert keys.waits.value >= 1
+    assert gemini.breakers["m"].failures == 0
+
+
+class RetryDelay:
+    def __init__(self, seconds, nanos=0):
+        self.seconds = seconds
+        self.nanos = nanos
+
+
+class RetryInfo:
+    def __init__(self, seconds, nanos=0):
+        self.retry_delay = RetryDelay(seconds, nanos)
+
+
+@pytest.mark.parametrize("detail, delay", [
+    (RetryInfo(0, 50_000_000), 0.05),
+    ({"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "0.05s"}, 0.05),
+    (RetryInfo(45), 45),
+])
+def test_429_retry_delay_is_honoured(detail, delay):
+    error = FakeError(429)
+    error.details = [detail]
+    keys, _ = pool(keys=("only",), cooldown=600, max_wait=1)
+    keys.release(keys.acquire(), error)
+    # Gemini aytgan vaqt max_wait'dan uzun bo'lsa ham hurmat qilinadi
+    assert keys.available_in() == pytest.approx(delay, abs=0.02)
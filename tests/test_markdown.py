@@ -0,0 +1,47 @@
+import pytest
+
+from utils.markdown import MarkdownRenderer, render_inline, render_markdown
+from html_check import assert_valid
+
+
+@pytest.mark.parametrize("text, html", [
+    ("**bold** and *italic*", "<b>bold</b> and <i>italic</i>"),
+    ("`a < b` & c", "<code>a &lt; b</code> &amp; c"),
+    ("~~gone~~", "<s>gone</s>"),
+    ("[site](https://example.com)", '<a href="https://example.com">site</a>'),
+    ("2 * 3 = 6 and a ** b", "2 * 3 = 6 and a ** b"),
+    ("**unclosed", "**unclosed"),
+    ("***x***", "<b><i>x</i></b>"),
+    ("****", ""),
+])
+def test_render_inline(text, html):
+    assert render_inline(text) == html
+
+
+def test_render_markdown_blocks():
+    text = "# **Title**\n- item *one*\n```python\nif a < b:\n    pass\n```\nend"
+    assert render_markdown(text) == (
+        "<b>Title</b>\n"
+        "• item <i>one</i>\n"
+        '<pre><code class="language-python">if a &lt; b:\n    pass</code></pre>\n'
+        "end"
+    )
+
+
+def test_streaming_matches_full_render():
+    text = "## Plan\n\nSome **bold *mixed* text** here.\n```\ncode <x>\n```\n- a\n- b `c`\n" * 5
+    renderer = MarkdownRenderer()
+    for start in range(0, len(text), 7):
+        renderer.feed(text[start:start + 7])
+        assert_valid(renderer.html)
+    assert renderer.html == render_markdown(text)
+
+
+def test_open_code_block_is_closed_provisionally():
+    renderer = MarkdownRenderer()
+    renderer.feed("```\nprint(1)\n")
+    assert renderer.html == "<pre><code>print(1)</code></pre>"
+
+
+def test_heading_has_no_nested_bold():
+    assert render_markdown("## **Bold** heading with ***both***") == "<b>Bold heading with <i>both</i></b>"
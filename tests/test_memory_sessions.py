@@ -0,0 +1,99 @@
+import asyncio
+
+from utils.sessions import MemorySessionStore, base, memory
+
+
+class Clock:
+    """Stands in for the `time` module of the session code, so idle expiry needs no sleeping."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def with_clock(monkeypatch):
+    # Faqat sessiya modullaridagi `time` almashtiriladi: event loop haqiqiy soat bilan ishlayveradi
+    clock = Clock()
+    monkeypatch.setattr(memory, "time", clock)
+    monkeypatch.setattr(base, "time", clock)
+    return clock
+
+
+def test_lru_cap_evicts_least_recently_used():
+    store = MemorySessionStore(max_size=2)
+
+    async def main():
+        await store.create(1, "uz")
+        await store.create(2, "uz")
+        # 1 ga murojaat qilindi, endi eng eskisi 2
+        await store.get(1)
+        await store.create(3, "uz")
+        return [await store.exists(telegram_id) for telegram_id in (1, 2, 3)]
+
+    assert asyncio.run(main()) == [True, False, True]
+    assert store.stats()["sessions"] == 2
+
+
+def test_idle_session_expires_on_get(monkeypatch):
+    clock = with_clock(monkeypatch)
+    store = MemorySessionStore(idle_ttl=60)
+
+    async def main():
+        await store.create(1, "uz")
+        clock.now += 59
+        assert await store.get(1) is not None
+        # get faollik vaqtini yangiladi
+        clock.now += 59
+        assert await store.get(1) is not None
+        clock.now += 61
+        return await store.get(1)
+
+    assert asyncio.run(main()) is None
+    assert store.stats()["sessions"] == 0
+
+
+def test_sweep_removes_only_idle_sessions(monkeypatch):
+    clock = with_clock(monkeypatch)
+    store = MemorySessionStore(idle_ttl=60)
+
+    async def main():
+        await store.create(1, "uz")
+        await store.create(2, "uz")
+        clock.now += 30
+        session = await store.create(3, "uz")
+        await store.get(1)
+        clock.now += 40
+        await store.append(session, session.turn("user", "hi"), session.turn("model", "hello"))
+        return store.sweep()
+
+    # 2 ga 70 soniya davomida murojaat bo'lmadi; 1 va 3 faol
+    assert asyncio.run(main()) == 1
+    assert store.stats()["sessions"] == 2
+
+
+def test_sweeper_task_runs_in_background(monkeypatch):
+    clock = with_clock(monkeypatch)
+    store = MemorySessionStore(idle_ttl=60, sweep_interval=0.01)
+
+    async def main():
+        await store.create(1, "uz")
+        store.start()
+        clock.now += 61
+        await asyncio.sleep(0.05)
+        await store.close()
+        return store.stats()["sessions"]
+
+    assert asyncio.run(main()) == 0
+
+
+def test_stats_count_tokens():
+    store = MemorySessionStore()
+
+    async def main():
+        session = await store.create(1, "en")
+        await store.append(session, session.turn("user", "a" * 40), session.turn("model", "b" * 40))
+
+    asyncio.run(main())
+    assert store.stats() == {"sessions": 1, "approx_tokens": 20}
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from utils.ratelimit import SlidingWindowLimiter, TokenBucket, TokenBucketLimiter
+
+
+def test_token_bucket_limiter_burst_then_wait():
+    async def main():
+        limiter = TokenBucketLimiter("test", rate=10, capacity=2)
+        assert await limiter.hit(1) == 0
+        assert await limiter.hit(1) == 0
+        wait = await limiter.hit(1)
+        assert 0 < wait <= 0.1
+        # Boshqa foydalanuvchining o'z chelagi bor
+        assert await limiter.hit(2) == 0
+        await asyncio.sleep(wait + 0.01)
+        assert await limiter.hit(1) == 0
+
+    asyncio.run(main())
+
+
+def test_token_bucket_limiter_forgets_idle_keys():
+    async def main():
+        limiter = TokenBucketLimiter("test", rate=100, capacity=1)
+        for key in range(50):
+            await limiter.hit(key)
+        await asyncio.sleep(0.02)
+        await limiter.hit("new")
+        assert len(limiter._state) == 1
+
+    asyncio.run(main())
+
+
+def test_sliding_window_limiter():
+    async def main():
+        limiter = SlidingWindowLimiter("test", limit=3, window=0.2)
+        results = [await limiter.hit("user") for _ in range(4)]
+        assert results[:3] == [0, 0, 0]
+        assert 0 < results[3] <= 0.2
+        assert await limiter.hit("other") == 0
+        # Ikki oyna o'tgach oldingi so'rovlar hisobga olinmaydi
+        await asyncio.sleep(0.4)
+        assert await limiter.hit("user") == 0
+
+    asyncio.run(main())
+
+
+def test_token_bucket_rate_and_pause():
+    async def main():
+        bucket = TokenBucket(rate=50, capacity=1)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for _ in range(6):
+            await bucket.acquire()
+        assert loop.time() - started == pytest.approx(0.1, abs=0.05)
+        bucket.pause(0.1)
+        assert not bucket.try_acquire()
+        started = loop.time()
+        await bucket.acquire()
+        assert loop.time() - started >= 0.09
+
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+
+from utils import cache
+from utils.gemini import ResponseCache
+from utils.gemini import cache as gemini_cache
+from utils.gemini.cache import normalize_prompt
+from utils.metrics import Metrics
+
+
+class Clock:
+    """Stands in for the `time` module of utils.cache, so TTLs expire without sleeping."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class FakeResponseDb:
+    """gemini_responses table; `max_age` is checked against the same fake clock."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.rows = {}
+        self.selects = 0
+
+    async def select_gemini_response(self, prompt_hash, language, max_age):
+        self.selects += 1
+        created, text = self.rows.get((prompt_hash, language), (None, None))
+        if created is None or self.clock.now - created >= max_age:
+            return None
+        return text
+
+    async def add_gemini_response(self, prompt_hash, language, text):
+        self.rows[(prompt_hash, language)] = (self.clock.now, text)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", clock)
+    # Hisoblagichlar umumiy registrda: har bir test toza registr bilan boshlanadi
+    registry = Metrics()
+    monkeypatch.setattr(cache, "metrics", registry)
+    monkeypatch.setattr(gemini_cache, "metrics", registry)
+    return clock
+
+
+def test_normalize_prompt():
+    assert normalize_prompt("  What is   Python?? ") == "what is python"
+    assert normalize_prompt("Salom!\n") == "salom"
+
+
+def test_trivially_different_prompts_share_an_entry(clock):
+    responses = ResponseCache()
+
+    async def main():
+        await responses.set("What is Python?", "eng", "A language.")
+        return await responses.get("  what is python ", "eng"), await responses.get("what is python", "ru")
+
+    assert asyncio.run(main()) == ("A language.", None)
+
+
+def test_allowlist_is_normalised(clock):
+    responses = ResponseCache(allowlist=["What is Python?", "  Salom "])
+    assert responses.allows("what is python")
+    assert responses.allows("SALOM!")
+    assert not responses.allows("what is java")
+    assert ResponseCache().allows("anything")
+
+
+def test_memory_then_database(clock):
+    db = FakeResponseDb(clock)
+    writer, reader = ResponseCache(db=db), ResponseCache(db=db)
+
+    async def main():
+        await writer.set("What is Python?", "eng", "A language.")
+        # Boshqa replika: xotirasi bo'sh, javob bazadan keladi va xotirada qoladi
+        first = await reader.get("what is python", "eng")
+        second = await reader.get("what is python", "eng")
+        return first, second
+
+    assert asyncio.run(main()) == ("A language.", "A language.")
+    assert db.selects == 1
+    assert reader.db_hits.value == 1
+
+
+def test_entries_expire_after_ttl(clock):
+    db = FakeResponseDb(clock)
+    responses = ResponseCache(db=db, ttl=60)
+
+    async def main():
+        await responses.set("hi", "eng", "Hello!")
+        clock.now += 59
+        assert await responses.get("hi", "eng") == "Hello!"
+        clock.now += 2
+        # Xotirada ham, bazada ham eskirgan
+        return await responses.get("hi", "eng")
+
+    assert asyncio.run(main()) is None
+    assert db.selects == 1
+
+
+def test_hit_rate_counts_both_tiers(clock):
+    db = FakeResponseDb(clock)
+    writer, responses = ResponseCache(db=db), ResponseCache(db=db)
+
+    async def main():
+        await writer.set("hi", "eng", "Hello!")
+        await responses.get("bye", "eng")  # ikkala qatlamda ham yo'q
+        await responses.get("hi", "eng")  # bazadan
+        await responses.get("hi", "eng")  # xotiradan
+
+    asyncio.run(main())
+    # Hisoblagichlar ikkala nusxa uchun umumiy: 3 ta qidiruv, 2 tasi topildi
+    assert responses.hit_rate == pytest.approx(2 / 3)
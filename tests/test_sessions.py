@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+
+from utils.sessions import MemorySessionStore, PostgresSessionStore, UserSession
+
+
+class FakeSessionDb:
+    """In-memory stand-in for the chat_sessions / chat_turns queries of Database."""
+
+    def __init__(self):
+        self.sessions = {}
+        self.turns = {}
+
+    async def create_chat_session(self, telegram_id, language):
+        self.sessions[telegram_id] = {"language": language, "message_count": 0, "summary": ""}
+        self.turns[telegram_id] = []
+
+    async def select_chat_session(self, telegram_id, idle_seconds):
+        return self.sessions.get(telegram_id)
+
+    async def select_chat_turns(self, telegram_id):
+        return [{"role": role, "text": text} for role, text in self.turns.get(telegram_id, [])]
+
+    async def append_chat_turns(self, telegram_id, turns):
+        if telegram_id not in self.sessions:
+            return False
+        self.turns[telegram_id].extend(turns)
+        self.sessions[telegram_id]["message_count"] += 1
+        return True
+
+    async def compact_chat_session(self, telegram_id, summary, drop):
+        if telegram_id not in self.sessions:
+            return False
+        self.sessions[telegram_id]["summary"] = summary
+        del self.turns[telegram_id][:drop]
+        return True
+
+    async def delete_chat_session(self, telegram_id):
+        self.turns.pop(telegram_id, None)
+        return self.sessions.pop(telegram_id, None) is not None
+
+
+def memory_store():
+    return MemorySessionStore()
+
+
+def postgres_store():
+    return PostgresSessionStore(FakeSessionDb())
+
+
+def redis_store():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    from utils.sessions.redis import RedisSessionStore
+    return RedisSessionStore(redis=fakeredis.FakeAsyncRedis(decode_responses=True))
+
+
+@pytest.fixture(params=[memory_store, postgres_store, redis_store], ids=["memory", "postgres", "redis"])
+def store(request):
+    return request.param()
+
+
+def exchange(question, answer):
+    return UserSession.turn("user", question), UserSession.turn("model", answer)
+
+
+def test_create_append_get(store):
+    async def main():
+        session = await store.create(1, "uz")
+        await store.append(session, *exchange("salom", "assalomu alaykum"))
+        await store.append(session, *exchange("qalaysan", "yaxshi"))
+        return await store.get(1)
+
+    session = asyncio.run(main())
+    assert session.language == "uz"
+    assert session.message_count == 2
+    assert [turn["parts"][0] for turn in session.history] == ["salom", "assalomu alaykum", "qalaysan", "yaxshi"]
+    assert session.history[1]["role"] == "model"
+
+
+def test_compact_replaces_oldest_turns(store):
+    async def main():
+        session = await store.create(1, "en")
+        await store.append(session, *exchange("a", "b"))
+        await store.append(session, *exchange("c", "d"))
+        await store.compact(session, "summary of a, b", 2)
+        return session, await store.get(1)
+
+    session, stored = asyncio.run(main())
+    for result in (session, stored):
+        assert result.summary == "summary of a, b"
+        assert [turn["parts"][0] for turn in result.history] == ["c", "d"]
+
+
+def test_create_replaces_existing_session(store):
+    async def main():
+        session = await store.create(1, "en")
+        await store.append(session, *exchange("a", "b"))
+        await store.create(1, "ru")
+        return await store.get(1)
+
+    session = asyncio.run(main())
+    assert session.language == "ru"
+    assert session.history == [] and session.message_count == 0
+
+
+def test_delete(store):
+    async def main():
+        await store.create(1, "en")
+        assert await store.exists(1)
+        assert await store.delete(1)
+        assert not await store.delete(1)
+        return await store.get(1)
+
+    assert asyncio.run(main()) is None
+
+
+def test_append_and_compact_after_delete_are_noops(store):
+    async def main():
+        # Javob kutilayotganda foydalanuvchi suhbatni tugatdi
+        session = await store.create(1, "en")
+        await store.delete(1)
+        await store.append(session, *exchange("late", "answer"))
+        await store.compact(session, "summary", 1)
+        return session, await store.get(1)
+
+    session, stored = asyncio.run(main())
+    assert stored is None
+    assert session.history == [] and session.message_count == 0 and session.summary == ""
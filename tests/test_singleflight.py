@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from utils.gemini import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    async def main():
+        flights = SingleFlight("test")
+        calls = 0
+
+        async def call():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "answer"
+
+        results = await asyncio.gather(*(flights.run("key", call) for _ in range(5)))
+        assert calls == 1
+        assert [result for result, _ in results] == ["answer"] * 5
+        assert sorted(shared for _, shared in results) == [False] + [True] * 4
+        assert len(flights) == 0
+
+    asyncio.run(main())
+
+
+def test_followers_fall_back_when_leader_fails():
+    async def main():
+        flights = SingleFlight("test")
+        calls = 0
+
+        async def call():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            if calls == 1:
+                raise RuntimeError("boom")
+            return "retried"
+
+        leader = asyncio.create_task(flights.run("key", call))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.run("key", call))
+        with pytest.raises(RuntimeError):
+            await leader
+        assert await follower == ("retried", False)
+
+    asyncio.run(main())
+
+
+def test_follower_wait_timeout():
+    async def main():
+        flights = SingleFlight("test", wait_timeout=0.01)
+
+        async def slow():
+            await asyncio.sleep(0.1)
+            return "slow"
+
+        async def fast():
+            return "fast"
+
+        leader = asyncio.create_task(flights.run("key", slow))
+        await asyncio.sleep(0)
+        assert await flights.run("key", fast) == ("fast", False)
+        assert await leader == ("slow", False)
+
+    asyncio.run(main())
@@ -0,0 +1,53 @@
+import asyncio
+import random
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest
+
+from utils.markdown import render_markdown, split_html, to_plain_text, _size
+from utils.stream_reply import send_chunks
+from html_check import assert_valid
+
+
+def test_split_html_short_text_is_one_chunk():
+    assert split_html("<b>hi</b>", 100) == ["<b>hi</b>"]
+
+
+@pytest.mark.parametrize("limit", [64, 256, 1000, 4096])
+def test_split_html_respects_limit_and_nesting(limit):
+    rng = random.Random(limit)
+    words = ["**bold**", "*it*", "`code`", "plain", "&", "<", "emoji😀", "[l](https://example.com/x)", "\n", "word" * 30]
+    text = "```\n" + " ".join(rng.choice(words) for _ in range(400)) + "\n```\n"
+    text += " ".join(rng.choice(words) for _ in range(2000))
+    html = render_markdown(text)
+    chunks = split_html(html, limit)
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert _size(chunk) <= limit
+        assert_valid(chunk)
+    assert "".join(to_plain_text(chunk) for chunk in chunks).split() == to_plain_text(html).split()
+
+
+def test_split_html_drops_link_too_long_to_reopen():
+    html = f'<a href="https://example.com/{"x" * 200}">{"word " * 100}</a>'
+    chunks = split_html(html, 128)
+    for chunk in chunks:
+        assert _size(chunk) <= 128
+        assert "<a" not in chunk
+
+
+def test_to_plain_text():
+    assert to_plain_text("<b>a &lt; b</b> &amp; c") == "a < b & c"
+
+
+def test_send_chunks_falls_back_to_plain_text():
+    sent = []
+
+    class Message:
+        async def answer(self, text, parse_mode=None, reply_markup=None):
+            if parse_mode is not None and "<" in text:
+                raise TelegramBadRequest(method=None, message="can't parse entities")
+            sent.append((text, parse_mode, reply_markup))
+
+    asyncio.run(send_chunks(Message(), ["<b>one</b>", "two &amp; <i>three</i>"], reply_markup="keyboard"))
+    assert sent == [("one", None, None), ("two & three", None, "keyboard")]
@@ -0,0 +1,91 @@
+import asyncio
+
+from utils.gemini import GeminiExecutor
+from utils.markdown import MarkdownRenderer
+from utils.stream_reply import StreamingReply
+from fakes import FakeModel
+
+
+class FakeMessage:
+    """Records what would be sent to Telegram."""
+
+    def __init__(self, log: list, text: str = ""):
+        self.log = log
+        self.text = text
+
+    async def answer(self, text, parse_mode=None, reply_markup=None):
+        message = FakeMessage(self.log, text)
+        self.log.append(("send", message, reply_markup))
+        return message
+
+    async def edit_text(self, text, parse_mode=None):
+        self.text = text
+        self.log.append(("edit", self, None))
+
+    async def delete(self):
+        self.log.append(("delete", self, None))
+
+
+def test_executor_streams_text_and_closes_response():
+    model = FakeModel(script=["a b c"])
+    executor = GeminiExecutor(timeout=1)
+
+    async def main():
+        return [chunk async for chunk in executor.stream_message(model.start_chat(), "hi")]
+
+    assert asyncio.run(main()) == ["a", "b", "c"]
+    assert model.streams[0].closed
+
+
+def test_edits_are_coalesced():
+    log = []
+    placeholder = FakeMessage(log, "thinking")
+
+    async def main():
+        reply = StreamingReply(placeholder, MarkdownRenderer(), edit_interval=60)
+        for word in ["one ", "**two** ", "three"]:
+            await reply.feed(word)
+        await reply.finish()
+        return reply
+
+    reply = asyncio.run(main())
+    # Birinchi bo'lak darhol, qolgani faqat yakunda tahrirlanadi
+    assert [action for action, _, _ in log] == ["edit", "edit"]
+    assert placeholder.text == "one <b>two</b> three"
+    assert reply.text == "one **two** three"
+
+
+def test_keyboard_goes_on_the_last_message():
+    log = []
+    placeholder = FakeMessage(log, "thinking")
+
+    async def main():
+        reply = StreamingReply(placeholder, MarkdownRenderer(), edit_interval=0)
+        await reply.feed("short answer")
+        await reply.finish(reply_markup="keyboard")
+        return reply
+
+    reply = asyncio.run(main())
+    sent = [(message, markup) for action, message, markup in log if action == "send"]
+    assert sent == [(reply.messages[-1], "keyboard")]
+    assert ("delete", placeholder, None) in log
+    assert reply.messages[-1].text == "short answer"
+
+
+def test_long_answer_rolls_over_into_new_messages():
+    log = []
+    placeholder = FakeMessage(log, "thinking")
+
+    async def main():
+        reply = StreamingReply(placeholder, MarkdownRenderer(), edit_interval=0, limit=100)
+        for index in range(30):
+            await reply.feed(f"line {index}\n")
+        await reply.finish(reply_markup="keyboard")
+        return reply
+
+    reply = asyncio.run(main())
+    assert len(reply.messages) > 2
+    assert all(len(message.text) <= 100 for message in reply.messages)
+    markups = [markup for action, _, markup in log if action == "send" and markup]
+    assert markups == ["keyboard"]
+    assert "line 29" in reply.messages[-1].text
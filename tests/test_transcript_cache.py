@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+
+from utils import cache
+from utils.metrics import Metrics
+from utils.voice import TranscriptCache
+
+
+class Clock:
+    """Stands in for the `time` module of utils.cache, so TTLs expire without sleeping."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class FakeTranscriptDb:
+    def __init__(self, rows=None):
+        self.rows = dict(rows or {})
+        self.selects = 0
+
+    async def select_voice_transcript(self, file_unique_id, language):
+        self.selects += 1
+        return self.rows.get((file_unique_id, language))
+
+    async def add_voice_transcript(self, file_unique_id, language, text):
+        self.rows[(file_unique_id, language)] = text
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", clock)
+    return clock
+
+
+def test_memory_hit_skips_the_database():
+    db = FakeTranscriptDb()
+    transcripts = TranscriptCache(db=db)
+
+    async def main():
+        await transcripts.set("file-1", "uz", "salom")
+        return await transcripts.get("file-1", "uz")
+
+    assert asyncio.run(main()) == "salom"
+    assert db.rows == {("file-1", "uz"): "salom"}
+    assert db.selects == 0
+
+
+def test_database_hit_is_kept_in_memory():
+    # Boshqa replika yoki qayta ishga tushishdan oldin saqlangan
+    db = FakeTranscriptDb({("file-1", "uz"): "salom"})
+    transcripts = TranscriptCache(db=db)
+
+    async def main():
+        return [await transcripts.get("file-1", "uz") for _ in range(3)]
+
+    assert asyncio.run(main()) == ["salom"] * 3
+    assert db.selects == 1
+
+
+def test_language_is_part_of_the_key():
+    db = FakeTranscriptDb()
+    transcripts = TranscriptCache(db=db)
+
+    async def main():
+        await transcripts.set("file-1", "uz", "salom")
+        return await transcripts.get("file-1", "ru")
+
+    assert asyncio.run(main()) is None
+    assert db.selects == 1
+
+
+def test_database_miss_is_not_cached():
+    db = FakeTranscriptDb()
+    transcripts = TranscriptCache(db=db)
+
+    async def main():
+        assert await transcripts.get("file-1", "uz") is None
+        db.rows[("file-1", "uz")] = "salom"
+        return await transcripts.get("file-1", "uz")
+
+    assert asyncio.run(main()) == "salom"
+    assert db.selects == 2
+
+
+def test_memory_entry_expires_after_ttl(clock):
+    db = FakeTranscriptDb()
+    transcripts = TranscriptCache(db=db, ttl=60)
+
+    async def main():
+        await transcripts.set("file-1", "uz", "salom")
+        clock.now += 59
+        assert await transcripts.get("file-1", "uz") == "salom"
+        assert db.selects == 0
+        clock.now += 2
+        # Xotiradagi yozuv eskirdi, baza hali javob beradi
+        return await transcripts.get("file-1", "uz")
+
+    assert asyncio.run(main()) == "salom"
+    assert db.selects == 1
+
+
+def test_works_without_database(clock):
+    transcripts = TranscriptCache(ttl=60)
+
+    async def main():
+        await transcripts.set("file-1", "uz", "salom")
+        assert await transcripts.get("file-1", "uz") == "salom"
+        clock.now += 61
+        return await transcripts.get("file-1", "uz")
+
+    assert asyncio.run(main()) is None
+
+
+def test_hit_rate_counts_memory_lookups(monkeypatch):
+    # Hisoblagichlar umumiy registrda: toza registr bilan boshlanadi
+    monkeypatch.setattr(cache, "metrics", Metrics())
+    transcripts = TranscriptCache()
+
+    async def main():
+        await transcripts.get("file-1", "uz")
+        await transcripts.set("file-1", "uz", "salom")
+        for _ in range(3):
+            await transcripts.get("file-1", "uz")
+
+    asyncio.run(main())
+    assert transcripts.memory.hit_rate == 0.75
@@ -0,0 +1,129 @@
+import asyncio
+
+from utils.db.postgres import Database
+
+
+class FakeConnection:
+    """Answers the handful of `users` queries Database issues, counting each one."""
+
+    def __init__(self, users: dict):
+        self.users = users
+        self.queries = []
+
+    def transaction(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def fetchrow(self, sql, *args):
+        self.queries.append(sql)
+        if sql.lstrip().startswith("INSERT"):
+            full_name, username, telegram_id, language = args
+            self.users[telegram_id] = {"full_name": full_name, "username": username, "telegram_id": telegram_id,
+                                       "language": language, "is_active": True}
+            return dict(self.users[telegram_id])
+        assert sql == "SELECT * FROM users WHERE telegram_id = $1", sql
+        user = self.users.get(args[0])
+        return dict(user) if user else None
+
+    async def execute(self, sql, *args):
+        self.queries.append(sql)
+        if sql.startswith("DELETE FROM users"):
+            self.users.clear()
+            return "DELETE"
+        value, telegram_id = args
+        column = next(name for name in ("language", "username", "is_active") if sql.startswith(f"UPDATE users SET {name}"))
+        self.users[telegram_id][column] = value
+        return "UPDATE 1"
+
+
+class FakePool:
+    def __init__(self):
+        self.connection = FakeConnection({})
+
+    def acquire(self):
+        return self.connection
+
+
+def database():
+    db = Database()
+    db.pool = FakePool()
+    return db, db.pool.connection
+
+
+def test_select_user_is_cached():
+    db, connection = database()
+    connection.users[1] = {"telegram_id": 1, "language": "uz"}
+    hits, misses = db.user_cache.hits.value, db.user_cache.misses.value
+
+    async def main():
+        first = await db.select_user(telegram_id=1)
+        second = await db.select_user(telegram_id=1)
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first == second == {"telegram_id": 1, "language": "uz"}
+    assert len(connection.queries) == 1
+    assert db.user_cache.misses.value == misses + 1
+    assert db.user_cache.hits.value == hits + 1
+
+
+def test_unknown_user_is_cached_as_none():
+    db, connection = database()
+
+    async def main():
+        return [await db.select_user(telegram_id=42) for _ in range(3)]
+
+    assert asyncio.run(main()) == [None, None, None]
+    assert len(connection.queries) == 1
+
+
+def test_add_user_fills_the_cache():
+    db, connection = database()
+
+    async def main():
+        await db.select_user(telegram_id=1)
+        await db.add_user("Ali", "ali", 1, "uz")
+        return await db.select_user(telegram_id=1)
+
+    # Avval "topilmadi" keshlangan edi; add_user uni yangi yozuv bilan almashtiradi
+    assert asyncio.run(main())["full_name"] == "Ali"
+    assert len(connection.queries) == 2
+
+
+def test_updates_invalidate_the_cache():
+    db, connection = database()
+    updates = [
+        (lambda: db.update_user_language(1, "ru"), "language", "ru"),
+        (lambda: db.update_user_username("new_name", 1), "username", "new_name"),
+        (lambda: db.set_user_active(1, False), "is_active", False),
+    ]
+
+    async def main():
+        await db.add_user("Ali", "ali", 1, "uz")
+        for update, column, value in updates:
+            assert (await db.select_user(telegram_id=1))[column] != value
+            misses = db.user_cache.misses.value
+            await update()
+            assert (await db.select_user(telegram_id=1))[column] == value
+            assert db.user_cache.misses.value == misses + 1
+
+    asyncio.run(main())
+
+
+def test_delete_users_clears_the_cache():
+    db, connection = database()
+
+    async def main():
+        await db.add_user("Ali", "ali", 1, "uz")
+        await db.add_user("Vali", "vali", 2, "en")
+        await db.delete_users()
+        return await db.select_user(telegram_id=1), await db.select_user(telegram_id=2)
+
+    assert asyncio.run(main()) == (None, None)
+    # Ikkala select ham bazaga bordi: add_user keshlagan yozuvlar tozalangan
+    assert connection.queries[-2:] == ["SELECT * FROM users WHERE telegram_id = $1"] * 2
@@ -0,0 +1,87 @@
+import asyncio
+
+from utils.voice import AssemblyAIBackend, VoiceProcessor
+from stub_transcription import StubTranscriptionServer
+
+
+def test_transcribes_through_rest_api():
+    async def main():
+        stub = StubTranscriptionServer(text="hello", delay=0.02)
+        async with stub as base_url:
+            backend = AssemblyAIBackend(api_key="test", base_url=base_url, poll_interval=0.01)
+            try:
+                text = await backend.transcribe(b"OggS-audio", "eng")
+            finally:
+                await backend.close()
+        assert text == "hello"
+        assert stub.uploads == [b"OggS-audio"]
+        assert stub.requests[0]["language_code"] == "en"
+        assert stub.polls >= 1
+
+    asyncio.run(main())
+
+
+def test_language_without_code_is_auto_detected():
+    async def main():
+        stub = StubTranscriptionServer()
+        async with stub as base_url:
+            backend = AssemblyAIBackend(api_key="test", base_url=base_url, poll_interval=0.01)
+            await backend.transcribe(b"audio", "uz")
+            await backend.close()
+        assert "language_code" not in stub.requests[0]
+
+    asyncio.run(main())
+
+
+def test_failures_return_none():
+    async def main():
+        async with StubTranscriptionServer(error="bad audio") as base_url:
+            processor = VoiceProcessor(AssemblyAIBackend(api_key="test", base_url=base_url, poll_interval=0.01))
+            assert await processor.transcribe_voice(b"audio", "ru") is None
+            await processor.close()
+        async with StubTranscriptionServer() as base_url:
+            processor = VoiceProcessor(AssemblyAIBackend(api_key="wrong", base_url=base_url))
+            assert await processor.transcribe_voice(b"audio", "ru") is None
+            await processor.close()
+
+    asyncio.run(main())
+
+
+def test_timeout_returns_none():
+    async def main():
+        async with StubTranscriptionServer(delay=10) as base_url:
+            backend = AssemblyAIBackend(api_key="test", base_url=base_url, poll_interval=0.01)
+            processor = VoiceProcessor(backend, timeout=0.1)
+            assert await processor.transcribe_voice(b"audio", "ru") is None
+            await processor.close()
+
+    asyncio.run(main())
+
+
+def test_concurrent_voice_notes_do_not_serialise_the_loop():
+    async def main():
+        async with StubTranscriptionServer(delay=0.2) as base_url:
+            backend = AssemblyAIBackend(api_key="test", base_url=base_url, poll_interval=0.02)
+            processor = VoiceProcessor(backend, max_concurrency=8)
+            loop = asyncio.get_running_loop()
+            lag = 0.0
+
+            async def heartbeat():
+                nonlocal lag
+                while True:
+                    started = loop.time()
+                    await asyncio.sleep(0.01)
+                    lag = max(lag, loop.time() - started - 0.01)
+
+            watcher = asyncio.create_task(heartbeat())
+            started = loop.time()
+            texts = await asyncio.gather(*(processor.transcribe_voice(b"audio", "ru") for _ in range(8)))
+            elapsed = loop.time() - started
+            watcher.cancel()
+            await processor.close()
+        assert texts == ["salom dunyo"] * 8
+        # Sakkizta 0.2 s lik xabar ketma-ket bo'lsa 1.6 s ketardi
+        assert elapsed < 0.8
+        assert lag < 0.1
+
+    asyncio.run(main())
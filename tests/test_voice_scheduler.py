@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from utils.scheduling import QueueFull
+from utils.voice.scheduler import VoiceScheduler
+
+
+def recorder(order, name):
+    async def job():
+        order.append(name)
+        return name
+    return job
+
+
+def test_users_are_served_round_robin():
+    async def main():
+        scheduler = VoiceScheduler(workers=1, max_queue=10, max_per_user=5)
+        order = []
+        # Ishchilar hali ishga tushmagan: hamma narsa navbatda turadi
+        futures = [scheduler.submit(1, recorder(order, f"a{index}"))[1] for index in range(3)]
+        futures += [scheduler.submit(2, recorder(order, f"b{index}"))[1] for index in range(2)]
+        futures.append(scheduler.submit(3, recorder(order, "c0"))[1])
+        scheduler.start()
+        assert await asyncio.gather(*futures) == ["a0", "a1", "a2", "b0", "b1", "c0"]
+        await scheduler.close()
+        return order
+
+    # A ning uchta xabari B va C ni orqaga surmaydi
+    assert asyncio.run(main()) == ["a0", "b0", "c0", "a1", "b1", "a2"]
+
+
+def test_position_reflects_jobs_ahead():
+    async def main():
+        scheduler = VoiceScheduler(workers=1, max_queue=10, max_per_user=5)
+        order = []
+        positions = [
+            scheduler.submit(1, recorder(order, "a0"))[0],
+            scheduler.submit(2, recorder(order, "b0"))[0],
+            scheduler.submit(1, recorder(order, "a1"))[0],
+            scheduler.submit(3, recorder(order, "c0"))[0],
+        ]
+        scheduler.start()
+        await asyncio.sleep(0.01)
+        await scheduler.close()
+        return positions, order
+
+    positions, order = asyncio.run(main())
+    # Bo'sh ishchi darhol oladi (0); c0 a1 dan oldin xizmat ko'radi
+    assert positions == [0, 1, 2, 2]
+    assert order == ["a0", "b0", "c0", "a1"]
+
+
+def test_per_user_backpressure():
+    async def main():
+        scheduler = VoiceScheduler(workers=1, max_queue=10, max_per_user=2)
+        order = []
+        scheduler.submit(1, recorder(order, "a0"))
+        scheduler.submit(1, recorder(order, "a1"))
+        with pytest.raises(QueueFull):
+            scheduler.submit(1, recorder(order, "a2"))
+        # Boshqa foydalanuvchi hali navbatga qo'shila oladi
+        scheduler.submit(2, recorder(order, "b0"))
+        assert scheduler.queue_depth == 3
+
+    asyncio.run(main())
+
+
+def test_total_backpressure():
+    async def main():
+        scheduler = VoiceScheduler(workers=1, max_queue=2, max_per_user=5)
+        order = []
+        scheduler.submit(1, recorder(order, "a0"))
+        scheduler.submit(2, recorder(order, "b0"))
+        with pytest.raises(QueueFull):
+            scheduler.submit(3, recorder(order, "c0"))
+
+        scheduler.start()
+        await asyncio.sleep(0.01)
+        # Navbat bo'shagach yana qabul qilinadi
+        position, future = scheduler.submit(3, recorder(order, "c0"))
+        assert await future == "c0"
+        await scheduler.close()
+
+    asyncio.run(main())
+
+
+def test_failing_job_releases_its_worker():
+    async def main():
+        scheduler = VoiceScheduler(workers=1, max_queue=10, max_per_user=5)
+        scheduler.start()
+
+        async def broken():
+            raise RuntimeError("ffmpeg crashed")
+
+        _, failed = scheduler.submit(1, broken)
+        with pytest.raises(RuntimeError):
+            await failed
+        assert scheduler.busy == 0
+
+        _, future = scheduler.submit(1, recorder([], "next"))
+        assert await asyncio.wait_for(future, timeout=1) == "next"
+        assert scheduler.busy == 0 and scheduler.queue_depth == 0
+        await scheduler.close()
+
+    asyncio.run(main())
@@ -0,0 +1,235 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+
+from utils.ratelimit import TokenBucket
+
+
+class BroadcastRunning(Exception):
+    """Raised by `Broadcast.start` while another job is starting or running."""
+
+
+class Broadcast:
+    """Copies one message to every active user in the background.
+
+    Each run is a row in `broadcast_jobs` and every recipient's outcome
+    (sent, blocked, failed, retry_after) is stored in
+    `broadcast_recipients`, so a job interrupted by a restart resumes from
+    its checkpoint and skips everyone whose outcome was saved. Outcomes are
+    buffered, so a crash can repeat the sends made since the last write (at
+    most `status_batch` recipients or `progress_interval` seconds' worth).
+    Recipients still rate limited after `max_retries` keep the `retry_after`
+    status: they get one more pass at the end of the run and, until then,
+    hold the checkpoint back so a resumed job retries them. Users that
+    blocked the bot are marked inactive and skipped by later broadcasts.
+
+    Recipients are read from Postgres page by page (keyset pagination, no
+    long-lived cursor) into a bounded queue; `workers` senders drain it
+    concurrently while a shared token bucket keeps the overall rate under
+    Telegram's limits. A `TelegramRetryAfter` pauses the whole bucket, not
+    just one sender. Recipient statuses are buffered and written with one
+    `executemany` every `status_batch` sends and at each checkpoint.
+    """
+
+    def __init__(self, bot: Bot, db, rate: float = 25, workers: int = 10, progress_interval: float = 5,
+                 max_retries: int = 3, status_batch: int = 100):
+        self.bot = bot
+        self.db = db
+        self.bucket = TokenBucket(rate=rate)
+        self.workers = workers
+        self.progress_interval = progress_interval
+        self.max_retries = max_retries
+        self.status_batch = status_batch
+        self.task: Optional[asyncio.Task] = None
+        self.total = self.sent = self.blocked = self.failed = 0
+        # Navbatda yoki yuborilayotgan telegram_id lar (checkpoint shulardan kichik bo'ladi)
+        self._pending: set[int] = set()
+        self._last_queued = 0
+        # Bazaga hali yozilmagan oluvchi holatlari: (telegram_id, status, error)
+        self._statuses: list[tuple[int, str, Optional[str]]] = []
+        self._flush_lock = asyncio.Lock()
+        # Flood limit tufayli yuborilmay qolganlar: yakunda yana bir marta urinib ko'riladi
+        self._retry: set[int] = set()
+        self._starting = False
+
+    @property
+    def running(self) -> bool:
+        return self._starting or (self.task is not None and not self.task.done())
+
+    @property
+    def processed(self) -> int:
+        return self.sent + self.blocked + self.failed
+
+    def progress_text(self, finished: bool = False, failed: bool = False) -> str:
+        if failed:
+            title = "❌ Reklama yuborish xatolik bilan to'xtadi"
+        elif finished:
+            title = "✅ Reklama yuborildi"
+        else:
+            title = "📤 Reklama yuborilmoqda..."
+        return (f"{title}\n\n"
+                f"Jami: {self.total}\n"
+                f"Yuborildi: {self.sent}\n"
+                f"Bloklagan: {self.blocked}\n"
+                f"Xatolik: {self.failed}\n"
+                f"Qayta urinish kutmoqda: {len(self._retry)}\n"
+                f"Jarayon: {self.processed}/{self.total}")
+
+    async def start(self, from_chat_id: int, message_id: int, status_message):
+        """Create a job and run it in the background; `status_message` is edited with progress.
+
+        Raises `BroadcastRunning` if another job is already starting or running.
+        """
+        if self.running:
+            raise BroadcastRunning
+        # Birinchi await'dan oldin band qilinadi, aks holda ikki admin bir vaqtda ikkita ish boshlab yuborardi
+        self._starting = True
+        try:
+            total = await self.db.count_active_users()
+            job = await self.db.create_broadcast_job(from_chat_id, message_id, total)
+            self.task = asyncio.create_task(self.run(job, status_message))
+        finally:
+            self._starting = False
+        return self.task
+
+    async def resume(self):
+        """Continue the job that was running when the bot stopped, if there is one."""
+        job = await self.db.select_unfinished_broadcast_job()
+        if job is None:
+            return None
+        logging.info(f"Resuming broadcast job {job['id']} from checkpoint {job['checkpoint']}")
+        status_message = await self.bot.send_message(
+            chat_id=job["from_chat_id"], text="📤 Reklama yuborish davom ettirilmoqda..."
+        )
+        self.task = asyncio.create_task(self.run(job, status_message))
+        return self.task
+
+    async def run(self, job, status_message):
+        counts = await self.db.count_broadcast_recipients(job["id"])
+        self.total = job["total"]
+        self.sent = counts.get("sent", 0)
+        self.blocked = counts.get("blocked", 0)
+        self.failed = counts.get("failed", 0)
+        self._pending = set()
+        self._statuses = []
+        self._retry = set()
+        self._last_queued = job["checkpoint"]
+
+        reporter = asyncio.create_task(self._report(job, status_message))
+        finished = failed = False
+        try:
+            await self._drain(job, self.db.iterate_user_ids(job_id=job["id"], after=job["checkpoint"]))
+            if self._retry:
+                retry, self._retry = sorted(self._retry), set()
+                await self._drain(job, self._iterate(retry))
+            await self.db.finish_broadcast_job(job["id"])
+            finished = True
+        except Exception as e:
+            failed = True
+            logging.exception(f"Broadcast job {job['id']} failed: {e!r}")
+            raise
+        finally:
+            reporter.cancel()
+            await self._save_checkpoint(job)
+            await self._edit_status(status_message, self.progress_text(finished=finished, failed=failed))
+
+    async def _drain(self, job, user_ids):
+        queue = asyncio.Queue(maxsize=self.workers * 10)
+
+        async def produce():
+            async for user_id in user_ids:
+                self._pending.add(user_id)
+                self._last_queued = max(self._last_queued, user_id)
+                await queue.put(user_id)
+            for _ in range(self.workers):
+                await queue.put(None)
+
+        async def consume():
+            while (user_id := await queue.get()) is not None:
+                if await self.send(job, user_id) == "retry_after":
+                    self._retry.add(user_id)
+                self._pending.discard(user_id)
+
+        # Biror vazifa xato bilan tugasa, TaskGroup qolganlarini bekor qiladi (ishchilar navbatda osilib qolmaydi)
+        async with asyncio.TaskGroup() as group:
+            group.create_task(produce())
+            for _ in range(self.workers):
+                group.create_task(consume())
+
+    @staticmethod
+    async def _iterate(user_ids):
+        for user_id in user_ids:
+            yield user_id
+
+    async def send(self, job, user_id: int) -> str:
+        status, error = "failed", None
+        for _ in range(self.max_retries):
+            await self.bucket.acquire()
+            try:
+                await self.bot.copy_message(chat_id=user_id, from_chat_id=job["from_chat_id"], message_id=job["message_id"])
+                status, error = "sent", None
+                self.sent += 1
+                break
+            except TelegramRetryAfter as e:
+                logging.info(f"Flood limit hit, pausing broadcast for {e.retry_after}s")
+                self.bucket.pause(e.retry_after)
+                status, error = "retry_after", str(e)
+            except TelegramForbiddenError as e:
+                status, error = "blocked", str(e)
+                self.blocked += 1
+                await self.db.set_user_active(user_id, False)
+                break
+            except Exception as e:
+                logging.info(f"Ad did not send to user: {user_id}. Error: {e}")
+                status, error = "failed", str(e)
+                self.failed += 1
+                break
+        # max_retries tugasa ham holat retry_after bo'lib qoladi: iterate_user_ids uni yakuniy deb hisoblamaydi
+        self._statuses.append((user_id, status, error))
+        if len(self._statuses) >= self.status_batch:
+            await self._flush_statuses(job)
+        return status
+
+    async def _flush_statuses(self, job):
+        # Qulf checkpoint boshqa ishchi yozayotgan holatlar bazaga tushishidan oldin surilib ketmasligi uchun
+        async with self._flush_lock:
+            statuses, self._statuses = self._statuses, []
+            if not statuses:
+                return
+            try:
+                await self.db.set_broadcast_recipient_statuses(job["id"], statuses)
+            except Exception:
+                # Keyingi urinishda qayta yoziladi
+                self._statuses[:0] = statuses
+                raise
+
+    async def _save_checkpoint(self, job):
+        # Navbatdagi (yoki qayta urinish kutayotgan) eng kichik id dan oldingi barcha oluvchilar yakunlangan;
+        # ularning holatlari checkpoint'dan oldin yoziladi, aks holda qayta ishga tushganda hisob yo'qolardi
+        waiting = self._pending | self._retry
+        checkpoint = min(waiting) - 1 if waiting else self._last_queued
+        try:
+            await self._flush_statuses(job)
+            await self.db.update_broadcast_checkpoint(job["id"], checkpoint)
+        except Exception as e:
+            logging.exception(f"Could not save broadcast checkpoint: {e}")
+
+    async def _report(self, job, status_message):
+        started = time.monotonic()
+        processed_at_start = self.processed
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            await self._save_checkpoint(job)
+            elapsed = time.monotonic() - started
+            rate = (self.processed - processed_at_start) / elapsed if elapsed else 0
+            await self._edit_status(status_message, f"{self.progress_text()}\nTezlik: {rate:.1f} ta/s")
+
+    async def _edit_status(self, status_message, text: str):
+        try:
+            await status_message.edit_text(text)
+        except Exception as e:
+            logging.info(f"Could not update broadcast progress: {e}")
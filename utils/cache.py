@@ -0,0 +1,56 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from utils.metrics import metrics
+
+
+MISSING = object()
+
+
+class TTLCache:
+    """In-process LRU cache whose entries also expire `ttl` seconds after being stored.
+
+    Hits and misses are counted in the shared metrics registry under
+    `<name>_cache_hits` / `<name>_cache_misses`.
+    """
+
+    def __init__(self, name: str, maxsize: int = 10_000, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = metrics.counter(f"{name}_cache_hits")
+        self.misses = metrics.counter(f"{name}_cache_misses")
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """Return the cached value, or `default` (the `MISSING` sentinel if omitted) on a miss."""
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses.inc()
+            return default
+        self._data.move_to_end(key)
+        self.hits.inc()
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits.value + self.misses.value
+        return self.hits.value / total if total else 0.0
+
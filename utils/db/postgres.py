@@ -2,11 +2,16 @@ from typing import Optional, Union, List
 import asyncpg
 from asyncpg import Connection, Pool
 from data import config
+from utils.cache import TTLCache, MISSING
 
 
 class Database:
     def __init__(self):
         self.pool: Optional[Pool] = None
+        # telegram_id bo'yicha foydalanuvchi yozuvlari keshi (topilmaganlar ham None sifatida saqlanadi)
+        self.user_cache = TTLCache(
+            "users", maxsize=config.USER_CACHE_SIZE, ttl=config.USER_CACHE_TTL
+        )
 
     async def create(self):
         """PostgreSQL bilan ulanishni yaratish."""
@@ -73,17 +78,79 @@ class Database:
         INSERT INTO users (full_name, username, telegram_id, language) 
         VALUES ($1, $2, $3, $4) RETURNING *;
         """
-        return await self.execute(sql, full_name, username, telegram_id, language, fetchrow=True)
+        user = await self.execute(sql, full_name, username, telegram_id, language, fetchrow=True)
+        self.user_cache.set(telegram_id, user)
+        return user
 
     async def select_all_users(self):
         """Barcha foydalanuvchilarni olish."""
         sql = "SELECT * FROM users"
         return await self.execute(sql, fetch=True)
 
+    async def iterate_users(self, batch_size: int = 1000):
+        """Barcha foydalanuvchilarni server tomonidagi cursor orqali sahifalab (ro'yxat ko'rinishida) olish."""
+        sql = """
+        SELECT id, full_name, username, telegram_id, created_at, language, is_active
+        FROM users ORDER BY id
+        """
+        async with self.pool.acquire() as connection:
+            connection: Connection
+            async with connection.transaction():
+                cursor = await connection.cursor(sql)
+                while rows := await cursor.fetch(batch_size):
+                    yield rows
+
+    async def iterate_user_ids(self, job_id: int, after: int = 0, batch_size: int = 1000):
+        """Reklama oluvchilarni keyset sahifalash orqali bo'laklab olish.
+
+        Faqat faol foydalanuvchilar, `after` dan katta telegram_id lar va shu job
+        bo'yicha hali yakuniy holatga ega bo'lmaganlar qaytariladi. Har bir sahifa
+        alohida qisqa so'rov (telegram_id > oxirgi id ... LIMIT), shuning uchun
+        reklama soatlab davom etsa ham ulanish va tranzaksiya band bo'lib turmaydi.
+        """
+        sql = """
+        SELECT telegram_id FROM users u
+        WHERE u.is_active AND u.telegram_id > $2 AND NOT EXISTS (
+            SELECT 1 FROM broadcast_recipients r
+            WHERE r.job_id = $1 AND r.telegram_id = u.telegram_id AND r.status <> 'retry_after'
+        )
+        ORDER BY u.telegram_id
+        LIMIT $3
+        """
+        while True:
+            rows = await self.execute(sql, job_id, after, batch_size, fetch=True)
+            for row in rows:
+                yield row["telegram_id"]
+            if len(rows) < batch_size:
+                return
+            after = rows[-1]["telegram_id"]
+
     async def select_user(self, **kwargs):
-        """Bitta foydalanuvchini olish."""
+        """Bitta foydalanuvchini olish.
+
+        Faqat telegram_id bo'yicha so'rovlar keshdan o'qiladi.
+        """
+        cacheable = kwargs.keys() == {"telegram_id"}
+        if cacheable:
+            user = self.user_cache.get(kwargs["telegram_id"])
+            if user is not MISSING:
+                return user
         sql, parameters = self.format_args(kwargs)
-        return await self.execute(sql, *parameters, fetchrow=True)
+        user = await self.execute(sql, *parameters, fetchrow=True)
+        if cacheable:
+            self.user_cache.set(kwargs["telegram_id"], user)
+        return user
+
+    async def count_active_users(self):
+        """Faol (botni bloklamagan) foydalanuvchilar soni."""
+        sql = "SELECT COUNT(*) FROM users WHERE is_active"
+        return await self.execute(sql, fetchval=True)
+
+    async def set_user_active(self, telegram_id: int, is_active: bool):
+        """Foydalanuvchini faol/nofaol deb belgilash (botni bloklaganlar nofaol)."""
+        sql = "UPDATE users SET is_active = $1 WHERE telegram_id = $2"
+        await self.execute(sql, is_active, telegram_id, execute=True)
+        self.user_cache.pop(telegram_id)
 
     async def is_user_exists(self, telegram_id: int) -> bool:
         """Foydalanuvchi mavjudligini tekshirish."""
@@ -97,6 +164,7 @@ class Database:
                 "UPDATE users SET language = $1 WHERE telegram_id = $2",
                 language, telegram_id
             )
+        self.user_cache.pop(telegram_id)
 
     async def count_users(self):
         """Jami foydalanuvchilar sonini olish."""
@@ -106,12 +174,235 @@ class Database:
     async def update_user_username(self, username: str, telegram_id: int):
         """Foydalanuvchi username'ini yangilash."""
         sql = "UPDATE users SET username=$1 WHERE telegram_id=$2"
-        return await self.execute(sql, username, telegram_id, execute=True)
+        result = await self.execute(sql, username, telegram_id, execute=True)
+        self.user_cache.pop(telegram_id)
+        return result
 
     async def delete_users(self):
         """Barcha foydalanuvchilarni o‘chirish."""
         await self.execute("DELETE FROM users WHERE TRUE", execute=True)
+        self.user_cache.clear()
 
     async def drop_users(self):
         """Foydalanuvchilar jadvalini o‘chirish."""
-        await self.execute("DROP TABLE users", execute=True)
\ No newline at end of file
+        await self.execute("DROP TABLE users", execute=True)
+        self.user_cache.clear()
+
+    async def create_table_chat_sessions(self):
+        """Chat sessiyalari va ularning xabarlari (turn) jadvallarini yaratish."""
+        sql = """
+        CREATE TABLE IF NOT EXISTS chat_sessions (
+            telegram_id BIGINT PRIMARY KEY,
+            language VARCHAR(255) NOT NULL,
+            message_count INTEGER NOT NULL DEFAULT 0,
+            summary TEXT NOT NULL DEFAULT '',
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE IF NOT EXISTS chat_turns (
+            id BIGSERIAL PRIMARY KEY,
+            telegram_id BIGINT NOT NULL REFERENCES chat_sessions (telegram_id) ON DELETE CASCADE,
+            role CHAR(1) NOT NULL,
+            text TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS chat_turns_telegram_id_idx ON chat_turns (telegram_id, id);
+        """
+        await self.execute(sql, execute=True)
+
+    async def create_chat_session(self, telegram_id: int, language: str):
+        """Yangi chat sessiyasini ochish (eski sessiya va uning xabarlari o'chiriladi)."""
+        async with self.pool.acquire() as connection:
+            async with connection.transaction():
+                await connection.execute("DELETE FROM chat_sessions WHERE telegram_id = $1", telegram_id)
+                await connection.execute(
+                    "INSERT INTO chat_sessions (telegram_id, language) VALUES ($1, $2)",
+                    telegram_id, language
+                )
+
+    async def select_chat_session(self, telegram_id: int, idle_seconds: float):
+        """Faol (idle_seconds dan ko'p kutib qolmagan) chat sessiyasini olish."""
+        sql = """
+        SELECT * FROM chat_sessions
+        WHERE telegram_id = $1 AND updated_at > NOW() - make_interval(secs => $2)
+        """
+        return await self.execute(sql, telegram_id, idle_seconds, fetchrow=True)
+
+    async def select_chat_turns(self, telegram_id: int):
+        """Sessiyadagi xabarlarni tartib bo'yicha olish."""
+        sql = "SELECT role, text FROM chat_turns WHERE telegram_id = $1 ORDER BY id"
+        return await self.execute(sql, telegram_id, fetch=True)
+
+    async def append_chat_turns(self, telegram_id: int, turns: list[tuple[str, str]]) -> bool:
+        """Sessiyaga yangi xabarlarni qo'shish (butun tarix qayta yozilmaydi).
+
+        Sessiya o'chirilgan bo'lsa hech narsa yozilmaydi va False qaytariladi.
+        """
+        async with self.pool.acquire() as connection:
+            async with connection.transaction():
+                # Sessiya qatori qulflanadi: shu tranzaksiya davomida o'chirilib ketmaydi
+                result = await connection.execute(
+                    "UPDATE chat_sessions SET message_count = message_count + 1, updated_at = NOW() "
+                    "WHERE telegram_id = $1",
+                    telegram_id
+                )
+                if result == "UPDATE 0":
+                    return False
+                await connection.executemany(
+                    "INSERT INTO chat_turns (telegram_id, role, text) "
+                    "SELECT $1, $2, $3 WHERE EXISTS (SELECT 1 FROM chat_sessions WHERE telegram_id = $1)",
+                    [(telegram_id, role, text) for role, text in turns]
+                )
+        return True
+
+    async def compact_chat_session(self, telegram_id: int, summary: str, drop: int) -> bool:
+        """Eng eski `drop` ta xabarni o'chirib, ularning o'rniga qisqacha mazmunni saqlash.
+
+        Sessiya o'chirilgan bo'lsa False qaytariladi.
+        """
+        async with self.pool.acquire() as connection:
+            async with connection.transaction():
+                result = await connection.execute(
+                    "UPDATE chat_sessions SET summary = $1 WHERE telegram_id = $2",
+                    summary, telegram_id
+                )
+                if result == "UPDATE 0":
+                    return False
+                await connection.execute(
+                    "DELETE FROM chat_turns WHERE id IN "
+                    "(SELECT id FROM chat_turns WHERE telegram_id = $1 ORDER BY id LIMIT $2)",
+                    telegram_id, drop
+                )
+        return True
+
+    async def delete_chat_session(self, telegram_id: int) -> bool:
+        """Chat sessiyasini o'chirish."""
+        sql = "DELETE FROM chat_sessions WHERE telegram_id = $1"
+        result = await self.execute(sql, telegram_id, execute=True)
+        return result != "DELETE 0"
+
+    async def delete_idle_chat_sessions(self, idle_seconds: float) -> int:
+        """Uzoq vaqt faol bo'lmagan sessiyalarni o'chirish."""
+        sql = "DELETE FROM chat_sessions WHERE updated_at < NOW() - make_interval(secs => $1)"
+        result = await self.execute(sql, idle_seconds, execute=True)
+        return int(result.split()[-1])
+
+    async def create_table_broadcasts(self):
+        """Reklama yuborish ishlari va har bir oluvchi holati jadvallarini yaratish."""
+        sql = """
+        ALTER TABLE users ADD COLUMN IF NOT EXISTS is_active BOOLEAN NOT NULL DEFAULT TRUE;
+        CREATE TABLE IF NOT EXISTS broadcast_jobs (
+            id SERIAL PRIMARY KEY,
+            from_chat_id BIGINT NOT NULL,
+            message_id BIGINT NOT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT 'running',
+            total INTEGER NOT NULL DEFAULT 0,
+            checkpoint BIGINT NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            finished_at TIMESTAMP
+        );
+        CREATE TABLE IF NOT EXISTS broadcast_recipients (
+            job_id INTEGER NOT NULL REFERENCES broadcast_jobs (id) ON DELETE CASCADE,
+            telegram_id BIGINT NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            error TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (job_id, telegram_id)
+        );
+        """
+        await self.execute(sql, execute=True)
+
+    async def create_broadcast_job(self, from_chat_id: int, message_id: int, total: int):
+        """Yangi reklama yuborish ishini yaratish."""
+        sql = """
+        INSERT INTO broadcast_jobs (from_chat_id, message_id, total)
+        VALUES ($1, $2, $3) RETURNING *
+        """
+        return await self.execute(sql, from_chat_id, message_id, total, fetchrow=True)
+
+    async def select_unfinished_broadcast_job(self):
+        """Oxirgi tugallanmagan reklama ishini olish (qayta ishga tushganda davom ettirish uchun)."""
+        sql = "SELECT * FROM broadcast_jobs WHERE status = 'running' ORDER BY id DESC LIMIT 1"
+        return await self.execute(sql, fetchrow=True)
+
+    async def update_broadcast_checkpoint(self, job_id: int, checkpoint: int):
+        """Shu telegram_id gacha barcha oluvchilar qayta ishlanganini belgilash."""
+        sql = "UPDATE broadcast_jobs SET checkpoint = GREATEST(checkpoint, $2) WHERE id = $1"
+        await self.execute(sql, job_id, checkpoint, execute=True)
+
+    async def finish_broadcast_job(self, job_id: int):
+        """Reklama ishini yakunlangan deb belgilash."""
+        sql = "UPDATE broadcast_jobs SET status = 'finished', finished_at = NOW() WHERE id = $1"
+        await self.execute(sql, job_id, execute=True)
+
+    async def set_broadcast_recipient_statuses(self, job_id: int, statuses: list[tuple[int, str, Optional[str]]]):
+        """Oluvchilar holatini bitta executemany bilan saqlash: (telegram_id, status, error) ro'yxati."""
+        sql = """
+        INSERT INTO broadcast_recipients (job_id, telegram_id, status, error)
+        VALUES ($1, $2, $3, $4)
+        ON CONFLICT (job_id, telegram_id)
+        DO UPDATE SET status = EXCLUDED.status, error = EXCLUDED.error, updated_at = NOW()
+        """
+        async with self.pool.acquire() as connection:
+            connection: Connection
+            async with connection.transaction():
+                await connection.executemany(sql, [(job_id, *status) for status in statuses])
+
+    async def count_broadcast_recipients(self, job_id: int) -> dict:
+        """Reklama ishi bo'yicha holatlar soni."""
+        sql = "SELECT status, COUNT(*) AS count FROM broadcast_recipients WHERE job_id = $1 GROUP BY status"
+        rows = await self.execute(sql, job_id, fetch=True)
+        return {row["status"]: row["count"] for row in rows}
+
+    async def create_table_voice_transcripts(self):
+        """Ovozli xabarlar transkripsiyasi keshi jadvalini yaratish."""
+        sql = """
+        CREATE TABLE IF NOT EXISTS voice_transcripts (
+            file_unique_id VARCHAR(255) NOT NULL,
+            language VARCHAR(255) NOT NULL,
+            text TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (file_unique_id, language)
+        );
+        """
+        await self.execute(sql, execute=True)
+
+    async def select_voice_transcript(self, file_unique_id: str, language: str) -> Optional[str]:
+        """Ovozli xabarning saqlangan matnini olish."""
+        sql = "SELECT text FROM voice_transcripts WHERE file_unique_id = $1 AND language = $2"
+        return await self.execute(sql, file_unique_id, language, fetchval=True)
+
+    async def add_voice_transcript(self, file_unique_id: str, language: str, text: str):
+        """Ovozli xabar matnini saqlash."""
+        sql = """
+        INSERT INTO voice_transcripts (file_unique_id, language, text) VALUES ($1, $2, $3)
+        ON CONFLICT (file_unique_id, language) DO NOTHING
+        """
+        await self.execute(sql, file_unique_id, language, text, execute=True)
+
+    async def create_table_gemini_responses(self):
+        """Birinchi savollarga Gemini javoblari keshi jadvalini yaratish."""
+        sql = """
+        CREATE TABLE IF NOT EXISTS gemini_responses (
+            prompt_hash VARCHAR(64) NOT NULL,
+            language VARCHAR(255) NOT NULL,
+            text TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (prompt_hash, language)
+        );
+        """
+        await self.execute(sql, execute=True)
+
+    async def select_gemini_response(self, prompt_hash: str, language: str, max_age: float) -> Optional[str]:
+        """Eskirmagan (max_age soniyadan yosh) keshlangan javobni olish."""
+        sql = """
+        SELECT text FROM gemini_responses
+        WHERE prompt_hash = $1 AND language = $2 AND created_at > NOW() - make_interval(secs => $3)
+        """
+        return await self.execute(sql, prompt_hash, language, max_age, fetchval=True)
+
+    async def add_gemini_response(self, prompt_hash: str, language: str, text: str):
+        """Javobni keshga yozish (eskisi bo'lsa yangilanadi)."""
+        sql = """
+        INSERT INTO gemini_responses (prompt_hash, language, text) VALUES ($1, $2, $3)
+        ON CONFLICT (prompt_hash, language) DO UPDATE SET text = EXCLUDED.text, created_at = CURRENT_TIMESTAMP
+        """
+        await self.execute(sql, prompt_hash, language, text, execute=True)
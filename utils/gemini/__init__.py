@@ -0,0 +1,7 @@
+from .executor import GeminiExecutor  # noqa
+from .client import GeminiClient, CircuitOpen  # noqa
+from .cache import ResponseCache  # noqa
+from .singleflight import SingleFlight  # noqa
+from .keys import KeyPool, KeysExhausted  # noqa
+from .scheduler import ChatScheduler, Superseded  # noqa
+from .models import KeyBoundModel  # noqa
@@ -0,0 +1,64 @@
+import hashlib
+import re
+from typing import Iterable, Optional
+
+from utils.cache import TTLCache, MISSING
+from utils.metrics import metrics
+
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_prompt(text: str) -> str:
+    """Case-fold, collapse whitespace and drop trailing punctuation, so trivially different prompts share a key."""
+    return _SPACES.sub(" ", text.casefold()).strip().rstrip("?!.").rstrip()
+
+
+class ResponseCache:
+    """Gemini answers to first-turn (history-free) prompts, keyed by normalised text and language.
+
+    Only prompts without chat history are cached: with history the answer
+    depends on the conversation. When `allowlist` is given, only those
+    prompts (compared after normalisation) are cached. Lookups go to an
+    in-memory LRU first and then, when `db` is given, to the
+    `gemini_responses` table shared between replicas.
+    """
+
+    def __init__(self, db=None, maxsize: int = 1000, ttl: float = 86400, allowlist: Iterable[str] = ()):
+        self.db = db
+        self.ttl = ttl
+        self.allowlist = {normalize_prompt(prompt) for prompt in allowlist}
+        self.memory = TTLCache("gemini_responses", maxsize=maxsize, ttl=ttl)
+        self.db_hits = metrics.counter("gemini_responses_db_hits")
+
+    def allows(self, text: str) -> bool:
+        return not self.allowlist or normalize_prompt(text) in self.allowlist
+
+    @staticmethod
+    def _key(text: str, language: str) -> tuple[str, str]:
+        return hashlib.sha256(normalize_prompt(text).encode()).hexdigest(), language
+
+    async def get(self, text: str, language: str) -> Optional[str]:
+        key = self._key(text, language)
+        answer = self.memory.get(key)
+        if answer is not MISSING:
+            return answer
+        if self.db is None:
+            return None
+        answer = await self.db.select_gemini_response(*key, max_age=self.ttl)
+        if answer is not None:
+            self.db_hits.inc()
+            self.memory.set(key, answer)
+        return answer
+
+    async def set(self, text: str, language: str, answer: str):
+        key = self._key(text, language)
+        self.memory.set(key, answer)
+        if self.db is not None:
+            await self.db.add_gemini_response(*key, answer)
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of lookups answered from either tier."""
+        lookups = self.memory.hits.value + self.memory.misses.value
+        return (self.memory.hits.value + self.db_hits.value) / lookups if lookups else 0.0
@@ -0,0 +1,220 @@
+import asyncio
+import logging
+import random
+import re
+import time
+from contextlib import aclosing
+from typing import Optional
+
+from utils.metrics import metrics
+from .keys import KeysExhausted
+
+
+# Qayta urinib ko'rishga arziydigan HTTP holatlari (kvota, vaqtinchalik nosozliklar)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpen(Exception):
+    """Raised without calling Gemini while every configured model's circuit is open."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Timeouts and 429/5xx answers (google.api_core errors carry the HTTP status in `code`)."""
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    return getattr(error, "code", None) in RETRYABLE_STATUS
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    After `failure_threshold` failures in a row the circuit opens and
+    calls are refused for `reset_timeout` seconds. Then a single probe is
+    let through (half-open): success closes the circuit, failure opens it
+    again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe_at: Optional[float] = None
+        self.opens = metrics.counter(f"{name}_circuit_opens")
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        # Sinov so'rovi javobsiz qolib ketsa (masalan, bekor qilinsa), reset_timeout'dan keyin yangisi o'tkaziladi
+        now = time.monotonic()
+        if state == "half_open" and (self._probe_at is None or now - self._probe_at >= self.reset_timeout):
+            self._probe_at = now
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probe_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self._probe_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self._probe_at is not None:
+                self.opens.inc()
+            self.opened_at = time.monotonic()
+            self._probe_at = None
+
+
+class GeminiClient:
+    """Resilient front for Gemini models, built on a `GeminiExecutor`.
+
+    Each request builds a fresh chat from `history`, so it can be retried
+    safely. Timeouts and 429/5xx errors are retried up to `retries` times
+    with full-jitter exponential backoff; other errors (bad request,
+    safety block) are raised at once. Every model has its own circuit
+    breaker: while `model`'s circuit is open, or once its retries are
+    spent, the request goes to the lighter `fallback` model if one is
+    configured, otherwise `CircuitOpen` is raised immediately.
+
+    Models only need `model_name` and `start_chat(history=...)` returning
+    an object with `send_message_async`, so a local fake can stand in
+    for `google.generativeai.GenerativeModel`. A model may also offer an
+    async `wait_ready()` (see `KeyPool`), awaited before every attempt
+    outside the executor; running out of API keys (`KeysExhausted`) is
+    then retried after that wait and never trips a breaker. Latency is recorded per
+    model in `gemini_<model>_latency_seconds` (`gemini_<model>_ttft_seconds`
+    for streams).
+    """
+
+    def __init__(self, executor, model, fallback=None, retries: int = 2, backoff: float = 0.5,
+                 max_backoff: float = 8, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.executor = executor
+        self.models = [model] + ([fallback] if fallback is not None else [])
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breakers = {
+            self._name(candidate): CircuitBreaker(
+                f"gemini_{self._name(candidate)}", failure_threshold=failure_threshold, reset_timeout=reset_timeout
+            )
+            for candidate in self.models
+        }
+        self.retried = metrics.counter("gemini_retries")
+        self.fallbacks = metrics.counter("gemini_fallbacks")
+
+    @staticmethod
+    def _name(model) -> str:
+        name = getattr(model, "model_name", str(model)).rsplit("/", 1)[-1]
+        return re.sub(r"\W+", "_", name)
+
+    def _delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    @staticmethod
+    async def _wait_ready(model):
+        # Kalitlar band bo'lsa, qisqa backoff o'rniga birinchi kalit bo'shashini kutamiz
+        # (kutish max_wait'dan oshsa KeysExhausted to'g'ridan-to'g'ri chaqiruvchiga chiqadi)
+        wait_ready = getattr(model, "wait_ready", None)
+        if wait_ready is not None:
+            await wait_ready()
+
+    def _candidates(self):
+        """Models whose circuit lets a request through, primary first."""
+        allowed = False
+        for index, model in enumerate(self.models):
+            if self.breakers[self._name(model)].allow():
+                allowed = True
+                if index:
+                    self.fallbacks.inc()
+                yield model
+        if not allowed:
+            raise CircuitOpen("Gemini is unavailable, all circuits are open")
+
+    async def send_message(self, text: str, history: Optional[list] = None):
+        """Send `text` after `history` and return the full response."""
+        error = None
+        for model in self._candidates():
+            name = self._name(model)
+            breaker = self.breakers[name]
+            for attempt in range(self.retries + 1):
+                await self._wait_ready(model)
+                started = time.monotonic()
+                try:
+                    response = await self.executor.send_message(model.start_chat(history=history or []), text)
+                except KeysExhausted as e:
+                    error = e
+                    continue
+                except Exception as e:
+                    if not is_retryable(e):
+                        # Gemini javob berdi (masalan, 400) - bu nosozlik emas
+                        breaker.record_success()
+                        raise
+                    error = e
+                    breaker.record_failure()
+                    logging.warning(f"Gemini {name} attempt {attempt + 1} failed: {e!r}")
+                    if attempt < self.retries and breaker.state == "closed":
+                        self.retried.inc()
+                        await asyncio.sleep(self._delay(attempt))
+                        continue
+                    break
+                breaker.record_success()
+                metrics.histogram(f"gemini_{name}_latency_seconds").observe(time.monotonic() - started)
+                return response
+        raise error
+
+    async def stream_message(self, text: str, history: Optional[list] = None):
+        """Yield the response text chunk by chunk.
+
+        Retries and the fallback apply only until the first chunk arrives;
+        once text has been yielded an error is raised as is, since
+        repeating the request would duplicate what the user already saw.
+        """
+        error = None
+        for model in self._candidates():
+            name = self._name(model)
+            breaker = self.breakers[name]
+            for attempt in range(self.retries + 1):
+                await self._wait_ready(model)
+                started = time.monotonic()
+                yielded = False
+                try:
+                    stream = self.executor.stream_message(model.start_chat(history=history or []), text)
+                    async with aclosing(stream) as chunks:
+                        async for chunk in chunks:
+                            if not yielded:
+                                yielded = True
+                                metrics.histogram(f"gemini_{name}_ttft_seconds").observe(time.monotonic() - started)
+                            yield chunk
+                except KeysExhausted as e:
+                    if yielded:
+                        raise
+                    error = e
+                    continue
+                except Exception as e:
+                    if yielded or not is_retryable(e):
+                        if is_retryable(e):
+                            breaker.record_failure()
+                        else:
+                            breaker.record_success()
+                        raise
+                    error = e
+                    breaker.record_failure()
+                    logging.warning(f"Gemini {name} stream attempt {attempt + 1} failed: {e!r}")
+                    if attempt < self.retries and breaker.state == "closed":
+                        self.retried.inc()
+                        await asyncio.sleep(self._delay(attempt))
+                        continue
+                    break
+                breaker.record_success()
+                return
+        raise error
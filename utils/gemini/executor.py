@@ -0,0 +1,73 @@
+import asyncio
+import logging
+import time
+
+from utils.metrics import metrics
+
+
+class GeminiExecutor:
+    """Runs Gemini calls on the SDK's async API with a concurrency cap and per-call timeout."""
+
+    def __init__(self, max_concurrency: int = 16, timeout: float = 60):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.in_flight = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def send_message(self, chat, text: str):
+        """Send a message to a chat session without blocking the event loop.
+
+        Waits for a free slot, then awaits the call for at most `timeout`
+        seconds. On timeout the underlying request is cancelled and
+        `asyncio.TimeoutError` bubbles up to the caller.
+        """
+        async with self._semaphore:
+            self.in_flight += 1
+            started = time.monotonic()
+            try:
+                response = await asyncio.wait_for(chat.send_message_async(text), timeout=self.timeout)
+                metrics.histogram("gemini_latency_seconds").observe(time.monotonic() - started)
+                return response
+            except asyncio.TimeoutError:
+                logging.warning(f"Gemini request timed out after {self.timeout}s")
+                raise
+            finally:
+                self.in_flight -= 1
+
+    async def stream_message(self, chat, text: str):
+        """Yield the response text chunk by chunk as Gemini streams it.
+
+        `timeout` applies to the gap between chunks, so long answers are
+        not cut off while a stalled stream still fails. Time to first
+        token is recorded in the `gemini_ttft_seconds` histogram. The
+        response stream is closed as soon as this generator is, even if
+        the caller stopped reading early.
+        """
+        async with self._semaphore:
+            self.in_flight += 1
+            started = time.monotonic()
+            first_chunk = True
+            chunks = None
+            try:
+                response = await asyncio.wait_for(chat.send_message_async(text, stream=True), timeout=self.timeout)
+                chunks = response.__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), timeout=self.timeout)
+                    except StopAsyncIteration:
+                        break
+                    if first_chunk:
+                        first_chunk = False
+                        metrics.histogram("gemini_ttft_seconds").observe(time.monotonic() - started)
+                    if chunk.text:
+                        yield chunk.text
+                metrics.histogram("gemini_latency_seconds").observe(time.monotonic() - started)
+            except asyncio.TimeoutError:
+                logging.warning(f"Gemini stream stalled for more than {self.timeout}s")
+                raise
+            finally:
+                self.in_flight -= 1
+                # Tashlab ketilgan oqim GC'ni kutmasdan yopiladi
+                aclose = getattr(chunks, "aclose", None)
+                if aclose is not None:
+                    await aclose()
@@ -0,0 +1,237 @@
+import asyncio
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from utils.metrics import metrics
+
+
+class KeysExhausted(Exception):
+    """Every key is cooling down or out of quota.
+
+    This is local quota, not a Gemini failure: `GeminiClient` does not
+    count it against the circuit breaker. `retry_after` is how long until
+    the first key frees up.
+    """
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def retry_delay(error: BaseException) -> Optional[float]:
+    """Wait suggested by a 429 (`google.rpc.RetryInfo` in the error details), if any."""
+    for detail in getattr(error, "details", None) or ():
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None:
+            return delay.seconds + delay.nanos / 1e9
+        if isinstance(detail, dict) and "retryDelay" in detail:
+            return float(str(detail["retryDelay"]).rstrip("s"))
+    return None
+
+
+class ApiKey:
+    """One API key: its models, per-minute usage window, in-flight count and 429 cooldown."""
+
+    def __init__(self, index: int, key: str, rpm: int):
+        self.index = index
+        self.key = key
+        self.rpm = rpm
+        self.in_flight = 0
+        self.strikes = 0
+        self.cooldown_until = 0.0
+        self.models = {}
+        self._sent = deque()
+        self.requests = metrics.counter(f"gemini_key{index}_requests")
+        self.rate_limited = metrics.counter(f"gemini_key{index}_rate_limited")
+        self.errors = metrics.counter(f"gemini_key{index}_errors")
+
+    def remaining(self, now: float) -> int:
+        """Requests left in the current one-minute window (in-flight ones included)."""
+        while self._sent and self._sent[0] <= now - 60:
+            self._sent.popleft()
+        return self.rpm - len(self._sent)
+
+    def available(self, now: float) -> bool:
+        return now >= self.cooldown_until and self.remaining(now) > 0
+
+    def available_in(self, now: float) -> float:
+        """Seconds until the key can take a request (0 if it can now)."""
+        wait = max(0.0, self.cooldown_until - now)
+        if self.remaining(now) <= 0:
+            wait = max(wait, self._sent[0] + 60 - now)
+        return wait
+
+    def __repr__(self):
+        return f"<ApiKey #{self.index} ...{self.key[-4:]}>"
+
+
+class KeyPool:
+    """Spreads Gemini requests over several API keys.
+
+    Each request goes to the key with the most quota left in its
+    one-minute window (`rpm` per key), preferring keys without recent
+    429s and with fewer requests in flight. A 429 takes the key out of
+    rotation for as long as Gemini asks (`RetryInfo`), otherwise for
+    `cooldown` seconds doubling on consecutive 429s, but never longer
+    than `max_wait`, so even a lone key is waited for instead of failing
+    every request; a rejected key (401/403) is parked for
+    `max_cooldown`. Usage is counted per key as
+    `gemini_key<N>_requests` / `_rate_limited` / `_errors`.
+
+    When every key is out, `wait_available` waits for the first one to
+    free up, for at most `max_wait` seconds.
+
+    `model_factory(model_name, api_key)` builds a model bound to one key,
+    so a fake can be plugged in for tests.
+    """
+
+    def __init__(self, keys: list[str], model_factory: Callable, rpm: int = 60,
+                 cooldown: float = 10, max_cooldown: float = 600, max_wait: float = 30):
+        if not keys:
+            raise ValueError("KeyPool needs at least one API key")
+        self.keys = [ApiKey(index, key, rpm) for index, key in enumerate(keys)]
+        self.model_factory = model_factory
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.max_wait = max_wait
+        self.waits = metrics.counter("gemini_key_waits")
+
+    def model(self, model_name: str) -> "PooledModel":
+        return PooledModel(self, model_name)
+
+    def acquire(self) -> ApiKey:
+        """Reserve the best available key; pair every call with `release`."""
+        now = time.monotonic()
+        candidates = [key for key in self.keys if key.available(now)]
+        if not candidates:
+            raise KeysExhausted("All Gemini API keys are rate limited", retry_after=self.available_in(now))
+        key = max(candidates, key=lambda item: (item.remaining(now), -item.strikes, -item.in_flight))
+        key._sent.append(now)
+        key.in_flight += 1
+        key.requests.inc()
+        return key
+
+    def available_in(self, now: Optional[float] = None) -> float:
+        """Seconds until the first key can take a request."""
+        now = time.monotonic() if now is None else now
+        return min(key.available_in(now) for key in self.keys)
+
+    async def wait_available(self):
+        """Wait until some key is available; raise `KeysExhausted` if that is more than `max_wait` away."""
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            now = time.monotonic()
+            wait = self.available_in(now)
+            if wait <= 0:
+                return
+            if now + wait > deadline:
+                raise KeysExhausted("All Gemini API keys are rate limited", retry_after=wait)
+            self.waits.inc()
+            await asyncio.sleep(wait)
+
+    def release(self, key: ApiKey, error: Optional[BaseException] = None):
+        key.in_flight -= 1
+        code = getattr(error, "code", None)
+        if code == 429:
+            key.rate_limited.inc()
+            key.strikes += 1
+            delay = retry_delay(error)
+            if delay is None:
+                # O'z hisobimizdagi dam olish max_wait'dan oshmaydi: yagona kalit bo'lsa ham so'rovlar kutib turadi
+                delay = min(self.max_cooldown, self.max_wait, self.cooldown * 2 ** (key.strikes - 1))
+            key.cooldown_until = time.monotonic() + delay
+        elif code in (401, 403):
+            key.errors.inc()
+            key.cooldown_until = time.monotonic() + self.max_cooldown
+        elif error is not None:
+            key.errors.inc()
+        else:
+            key.strikes = 0
+
+    def model_for(self, key: ApiKey, model_name: str):
+        model = key.models.get(model_name)
+        if model is None:
+            model = key.models[model_name] = self.model_factory(model_name, key.key)
+        return model
+
+    def stats(self) -> list[dict]:
+        now = time.monotonic()
+        return [
+            {
+                "key": repr(key),
+                "remaining": key.remaining(now),
+                "in_flight": key.in_flight,
+                "cooldown": max(0.0, key.cooldown_until - now),
+                "requests": key.requests.value,
+                "rate_limited": key.rate_limited.value,
+            }
+            for key in self.keys
+        ]
+
+
+class PooledModel:
+    """Model-like front that `GeminiClient` can use; every message is sent with a key picked from the pool."""
+
+    def __init__(self, pool: KeyPool, model_name: str):
+        self.pool = pool
+        self.model_name = model_name
+
+    def start_chat(self, history: Optional[list] = None) -> "PooledChat":
+        return PooledChat(self.pool, self.model_name, history or [])
+
+    async def wait_ready(self):
+        """Called by `GeminiClient` before each attempt, outside the executor's slot and timeout."""
+        await self.pool.wait_available()
+
+
+class PooledChat:
+    def __init__(self, pool: KeyPool, model_name: str, history: list):
+        self.pool = pool
+        self.model_name = model_name
+        self.history = history
+
+    async def send_message_async(self, text: str, stream: bool = False):
+        """Send with the best key; a key answering 429 is cooled down and the next one is tried at once."""
+        rate_limited = None
+        while True:
+            try:
+                key = self.pool.acquire()
+            except KeysExhausted as e:
+                # 429 lar kalitlar kvotasiga tegishli - Gemini nosozligi sifatida emas, KeysExhausted bo'lib chiqadi
+                if rate_limited is not None:
+                    raise e from rate_limited
+                raise
+            chat = self.pool.model_for(key, self.model_name).start_chat(history=self.history)
+            try:
+                response = await chat.send_message_async(text, stream=stream)
+            except BaseException as e:
+                self.pool.release(key, e)
+                if getattr(e, "code", None) == 429:
+                    rate_limited = e
+                    continue
+                raise
+            if not stream:
+                self.pool.release(key)
+                return response
+            return self._stream(key, response)
+
+    async def _stream(self, key: ApiKey, response):
+        # Kalit oqim oxirigacha (yoki uzilguncha) band hisoblanadi; generator yopilganda
+        # (GeminiExecutor uni oxirida aclose() qiladi) javob oqimi ham yopiladi va kalit bo'shaydi
+        error = None
+        chunks = response.__aiter__()
+        try:
+            async for chunk in chunks:
+                yield chunk
+        except BaseException as e:
+            if not isinstance(e, GeneratorExit):
+                error = e
+            raise
+        finally:
+            try:
+                aclose = getattr(chunks, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+            finally:
+                self.pool.release(key, error)
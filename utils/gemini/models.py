@@ -0,0 +1,49 @@
+from functools import lru_cache
+from typing import Optional
+
+
+@lru_cache(maxsize=None)
+def _client(api_key: str):
+    # Har bir kalit uchun bitta klient (asosiy va zaxira modellar uni baham ko'radi)
+    from google.ai.generativelanguage import GenerativeServiceAsyncClient
+    return GenerativeServiceAsyncClient(client_options={"api_key": api_key})
+
+
+class KeyBoundModel:
+    """A Gemini model called with one specific API key.
+
+    `google.generativeai.configure` sets a single global key, so this
+    talks to the public `generativelanguage` async client built with
+    `client_options={"api_key": ...}` and wraps its answers in the SDK's
+    public response types. It offers the same `model_name` /
+    `start_chat(history=...)` / `send_message_async` surface as
+    `GenerativeModel`, which is all `GeminiClient` and `KeyPool` use.
+    """
+
+    def __init__(self, model_name: str, api_key: str):
+        self.model_name = model_name if "/" in model_name else f"models/{model_name}"
+        self.api_key = api_key
+
+    def start_chat(self, history: Optional[list] = None) -> "KeyBoundChat":
+        return KeyBoundChat(self, history or [])
+
+
+class KeyBoundChat:
+    def __init__(self, model: KeyBoundModel, history: list):
+        self.model = model
+        self.history = history
+
+    async def send_message_async(self, text: str, stream: bool = False):
+        from google.generativeai import protos
+        from google.generativeai.types import AsyncGenerateContentResponse
+
+        contents = [
+            protos.Content(role=turn["role"], parts=[protos.Part(text=part) for part in turn["parts"]])
+            for turn in self.history
+        ]
+        contents.append(protos.Content(role="user", parts=[protos.Part(text=text)]))
+        request = protos.GenerateContentRequest(model=self.model.model_name, contents=contents)
+        client = _client(self.model.api_key)
+        if stream:
+            return await AsyncGenerateContentResponse.from_aiterator(await client.stream_generate_content(request))
+        return AsyncGenerateContentResponse.from_response(await client.generate_content(request))
@@ -0,0 +1,136 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Awaitable, Callable, Iterable
+
+from utils.metrics import metrics
+from utils.scheduling import QueueFull
+
+
+class Superseded(Exception):
+    """The job was replaced by a newer message from the same user before it started."""
+
+
+class _Job:
+    __slots__ = ("call", "future", "tag", "priority", "enqueued_at")
+
+    def __init__(self, call, future, tag, priority, enqueued_at):
+        self.call = call
+        self.future = future
+        self.tag = tag
+        self.priority = priority
+        self.enqueued_at = enqueued_at
+
+
+class ChatScheduler:
+    """Weighted fair queueing of AI requests across users.
+
+    Every user runs at most one request at a time and has at most one
+    waiting: a new message replaces the waiting one ("latest message
+    wins"), whose future fails with `Superseded`. Waiting requests are
+    served in order of their virtual finish tag (self-clocked fair
+    queueing), so a user who has just been served goes behind users who
+    have not, however fast they send. Users in `priority_users` (admins)
+    form a strict priority class served before everyone else and are
+    accepted even when the queue is full.
+
+    Queue depth, queue wait and coalesced/rejected requests are recorded
+    as `chat_queue_depth`, `chat_queue_wait_seconds`, `chat_coalesced`
+    and `chat_rejected`.
+    """
+
+    def __init__(self, workers: int = 16, max_queue: int = 500, priority_users: Iterable[int] = ()):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.priority_users = set(priority_users)
+        self.busy = 0
+        self._pending: dict[int, _Job] = {}
+        self._running: set[int] = set()
+        self._finish: dict[int, float] = {}
+        self._virtual = 0.0
+        self._heap: list[tuple] = []
+        self._seq = itertools.count()
+        self._ready = asyncio.Semaphore(0)
+        self._tasks: list[asyncio.Task] = []
+        self.coalesced = metrics.counter("chat_coalesced")
+        self.rejected = metrics.counter("chat_rejected")
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    def submit(self, user_id: int, call: Callable[[], Awaitable], cost: float = 1.0) -> asyncio.Future:
+        """Queue `call` for `user_id` and return a future with its result."""
+        future = asyncio.get_running_loop().create_future()
+        waiting = self._pending.get(user_id)
+        if waiting is not None:
+            # Foydalanuvchining kutayotgan so'rovi eng oxirgisi bilan almashtiriladi, navbatdagi o'rni saqlanadi
+            waiting.future.set_exception(Superseded())
+            waiting.future.exception()
+            waiting.call, waiting.future = call, future
+            self.coalesced.inc()
+            return future
+
+        # Adminlar navbat to'lganda ham qabul qilinadi
+        if len(self._pending) >= self.max_queue and user_id not in self.priority_users:
+            self.rejected.inc()
+            raise QueueFull()
+
+        tag = max(self._virtual, self._finish.get(user_id, 0.0)) + cost
+        self._finish[user_id] = tag
+        job = _Job(call, future, tag, 0 if user_id in self.priority_users else 1, time.monotonic())
+        self._pending[user_id] = job
+        metrics.histogram("chat_queue_depth").observe(len(self._pending))
+        if user_id not in self._running:
+            self._push(user_id, job)
+        return future
+
+    def _push(self, user_id: int, job: _Job):
+        heapq.heappush(self._heap, (job.priority, job.tag, next(self._seq), user_id))
+        self._ready.release()
+
+    def _next_job(self) -> tuple[int, _Job]:
+        _, tag, _, user_id = heapq.heappop(self._heap)
+        job = self._pending.pop(user_id)
+        self._running.add(user_id)
+        self._virtual = max(self._virtual, tag)
+        if len(self._finish) > self.max_queue * 4:
+            # Tegi virtual vaqtdan orqada qolgan foydalanuvchilar yangi kelganlardan farq qilmaydi
+            self._finish = {uid: f for uid, f in self._finish.items() if f > self._virtual}
+        return user_id, job
+
+    async def _worker(self):
+        while True:
+            await self._ready.acquire()
+            user_id, job = self._next_job()
+            started = time.monotonic()
+            metrics.histogram("chat_queue_wait_seconds").observe(started - job.enqueued_at)
+            self.busy += 1
+            try:
+                if not job.future.done():
+                    job.future.set_result(await job.call())
+            except Exception as e:
+                if not job.future.done():
+                    job.future.set_exception(e)
+            except asyncio.CancelledError:
+                job.future.cancel()
+                raise
+            finally:
+                self.busy -= 1
+                self._running.discard(user_id)
+                waiting = self._pending.get(user_id)
+                if waiting is not None:
+                    self._push(user_id, waiting)
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        if self._pending:
+            logging.info(f"Dropping {len(self._pending)} queued chat requests")
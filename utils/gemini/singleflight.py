@@ -0,0 +1,52 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+from utils.metrics import metrics
+
+
+class SingleFlight:
+    """Lets concurrent callers with the same key share one in-flight call.
+
+    The first caller for a key (the leader) runs `call`; callers arriving
+    while it is in flight wait for its result instead of starting their
+    own. A follower waits at most `wait_timeout` seconds, and if the
+    leader fails or the wait times out it falls back to running `call`
+    itself, so coalescing never turns one slow or failed request into
+    many failures.
+    """
+
+    def __init__(self, name: str, wait_timeout: float = 30):
+        self.wait_timeout = wait_timeout
+        self.shared = metrics.counter(f"{name}_singleflight_shared")
+        self.fallbacks = metrics.counter(f"{name}_singleflight_fallbacks")
+        self._flights: dict[Hashable, asyncio.Future] = {}
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+        """Return `(result, shared)`; `shared` is True when the result came from another caller's flight."""
+        flight = self._flights.get(key)
+        if flight is not None:
+            try:
+                result = await asyncio.wait_for(asyncio.shield(flight), self.wait_timeout)
+            except Exception:
+                self.fallbacks.inc()
+                return await call(), False
+            self.shared.inc()
+            return result, True
+
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        try:
+            result = await call()
+        except BaseException as e:
+            flight.set_exception(e if isinstance(e, Exception) else RuntimeError("single-flight leader was cancelled"))
+            # Kutayotganlar bo'lmasa ham "exception was never retrieved" ogohlantirishi chiqmasin
+            flight.exception()
+            raise
+        else:
+            flight.set_result(result)
+            return result, False
+        finally:
+            del self._flights[key]
+
+    def __len__(self):
+        return len(self._flights)
@@ -0,0 +1,290 @@
+import re
+from html import unescape
+
+
+# Gemini javoblaridagi Markdown'ni Telegram HTML'iga aylantirish
+
+_ESCAPES = {"&": "&amp;", "<": "&lt;", ">": "&gt;"}
+_SPECIAL = re.compile(r"[`*~\[&<>]")
+_LINK = re.compile(r"\[([^\]\n]+)\]\(([^)\s]+)\)")
+_FENCE = re.compile(r"^\s*```\s*([\w+#.-]*)\s*$")
+_HEADING = re.compile(r"^\s{0,3}#{1,6}\s+(.*?)\s*#*\s*$")
+_BULLET = re.compile(r"^(\s*)[-*+]\s+(.*)$")
+_ATOM = re.compile(r"<[^>]*>|&#?\w+;|\n|[ \t]+|[^<&\s]+|.", re.S)
+_TAG_NAME = re.compile(r"<(/?)(\w+)")
+_TAG = re.compile(r"<[^>]*>")
+_EMPTY_TAG = re.compile(r"<(\w+)[^>]*></\1>")
+_BOLD_TAG = re.compile(r"</?b>")
+
+# Telegram xabar matnining maksimal uzunligi (UTF-16 birliklarida)
+MESSAGE_LIMIT = 4096
+
+
+def escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _close(stack: list[str], tag: str, out: list[str]):
+    """Close `tag`, closing and reopening anything opened after it so nesting stays valid."""
+    index = len(stack) - 1 - stack[::-1].index(tag)
+    reopen = stack[index + 1:]
+    for name in reversed(stack[index:]):
+        out.append(f"</{name}>")
+    del stack[index:]
+    for name in reopen:
+        out.append(f"<{name}>")
+        stack.append(name)
+
+
+def render_inline(line: str) -> str:
+    """Render one line of inline Markdown (`code`, **bold**, *italic*, ~~strike~~, [links](url)).
+
+    A marker without a closing pair on the same line is kept as literal
+    text, and every tag opened on the line is closed at its end, so the
+    result is always valid Telegram HTML. Tags left empty (`***x***`
+    reopens italic right before closing it) are dropped.
+    """
+    out = []
+    stack = []
+    i = 0
+    length = len(line)
+    while i < length:
+        match = _SPECIAL.search(line, i)
+        if match is None:
+            out.append(line[i:])
+            break
+        start = match.start()
+        if start > i:
+            out.append(line[i:start])
+        char = line[start]
+        i = start + 1
+
+        if char in _ESCAPES:
+            out.append(_ESCAPES[char])
+        elif char == "`":
+            end = line.find("`", i)
+            if end == -1:
+                out.append("`")
+            else:
+                out.append(f"<code>{escape(line[i:end])}</code>")
+                i = end + 1
+        elif char == "[":
+            link = _LINK.match(line, start)
+            if link is None:
+                out.append("[")
+            else:
+                url = escape(link.group(2)).replace('"', "&quot;")
+                out.append(f'<a href="{url}">{render_inline(link.group(1))}</a>')
+                i = link.end()
+        elif char == "~" and line.startswith("~~", start):
+            i = start + 2
+            if "s" in stack:
+                _close(stack, "s", out)
+            elif line.find("~~", i) != -1:
+                out.append("<s>")
+                stack.append("s")
+            else:
+                out.append("~~")
+        elif char == "*" and line.startswith("**", start):
+            i = start + 2
+            if "b" in stack:
+                _close(stack, "b", out)
+            elif line.find("**", i) != -1:
+                out.append("<b>")
+                stack.append("b")
+            else:
+                out.append("**")
+        elif char == "*":
+            if "i" in stack:
+                _close(stack, "i", out)
+            elif i < length and not line[i].isspace() and line.find("*", i) != -1:
+                out.append("<i>")
+                stack.append("i")
+            else:
+                out.append("*")
+        else:
+            out.append(char)
+
+    for name in reversed(stack):
+        out.append(f"</{name}>")
+    html = "".join(out)
+    while "></" in html:
+        html, count = _EMPTY_TAG.subn("", html)
+        if not count:
+            break
+    return html
+
+
+class MarkdownRenderer:
+    """Single-pass, line-by-line Markdown to Telegram HTML renderer.
+
+    Handles fenced code blocks (as `<pre><code>`), headings (bold),
+    bullet lists and inline markup, and escapes `<`, `>` and `&`.
+    It can be fed a streamed response chunk by chunk: completed lines
+    are rendered once and kept, only the unfinished last line is
+    re-rendered on each `feed`, and `html` always returns valid HTML
+    (an open code block is closed provisionally).
+    """
+
+    def __init__(self):
+        self._done_html = ""
+        self._last = None
+        self._pending = ""
+        self._fence = None
+
+    def _render_line(self, line: str, fence):
+        """Render one complete line; returns (html, new fence state)."""
+        fence_match = _FENCE.match(line)
+        if fence is not None:
+            if fence_match and not fence_match.group(1):
+                return "</code></pre>", None
+            return escape(line), fence
+        if fence_match:
+            language = fence_match.group(1)
+            opening = f'<pre><code class="language-{language}">' if language else "<pre><code>"
+            return opening, language
+        heading = _HEADING.match(line)
+        if heading:
+            # Sarlavha butunlay qalin, ichidagi **...** qayta <b> ochmaydi
+            return f"<b>{_BOLD_TAG.sub('', render_inline(heading.group(1)))}</b>", None
+        bullet = _BULLET.match(line)
+        if bullet:
+            return f"{bullet.group(1)}• {render_inline(bullet.group(2))}", None
+        return render_inline(line), None
+
+    @staticmethod
+    def _separator(last, part: str) -> str:
+        # Kod bloki ochilgandan keyin va yopilishidan oldin yangi qator qo'yilmaydi
+        if last is None or last.startswith("<pre>") or part == "</code></pre>":
+            return ""
+        return "\n"
+
+    def feed(self, chunk: str):
+        """Add the next streamed chunk; only lines completed by it are rendered."""
+        self._pending += chunk
+        if "\n" not in chunk:
+            return
+        *lines, self._pending = self._pending.split("\n")
+        for line in lines:
+            part, self._fence = self._render_line(line, self._fence)
+            self._done_html += self._separator(self._last, part) + part
+            self._last = part
+
+    @property
+    def html(self) -> str:
+        """HTML of everything fed so far, with the unfinished line and open code block closed provisionally."""
+        html, last, fence = self._done_html, self._last, self._fence
+        if self._pending:
+            part, fence = self._render_line(self._pending, fence)
+            html += self._separator(last, part) + part
+            last = part
+        if fence is not None:
+            html += "</code></pre>"
+        return html
+
+
+def render_markdown(text: str) -> str:
+    """Render a complete Markdown text to Telegram HTML."""
+    renderer = MarkdownRenderer()
+    renderer.feed(text)
+    return renderer.html
+
+
+def _size(text: str) -> int:
+    # Telegram uzunlikni UTF-16 birliklarida hisoblaydi (emoji 2 ta birlik)
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _atoms(html: str, longest: int, longest_tag: int):
+    """Tokenize HTML into tags, entities, newlines, whitespace and words no longer than `longest`.
+
+    An opening tag longer than `longest_tag` (a link to a huge URL) is
+    dropped together with its closing tag, so its text is kept as plain
+    text and reopening it can never push a chunk over the limit.
+    """
+    dropped = []
+    for atom in _ATOM.findall(html):
+        tag = _TAG_NAME.match(atom) if atom.endswith(">") else None
+        if tag is not None:
+            closing, name = tag.groups()
+            if not closing and len(atom) > longest_tag:
+                dropped.append(name)
+                continue
+            if closing and dropped and dropped[-1] == name:
+                dropped.pop()
+                continue
+            yield atom
+        elif len(atom) > longest and atom[0] != "&":
+            for start in range(0, len(atom), longest):
+                yield atom[start:start + longest]
+        else:
+            yield atom
+
+
+def to_plain_text(html: str) -> str:
+    """Strip tags and unescape entities, for resending a chunk Telegram refused to parse."""
+    return unescape(_TAG.sub("", html))
+
+
+def _apply(stack: tuple, atom: str) -> tuple:
+    """Return the open-tag stack after `atom`; entries are (name, opening tag)."""
+    tag = _TAG_NAME.match(atom)
+    if tag is None or not atom.endswith(">"):
+        return stack
+    closing, name = tag.groups()
+    if not closing:
+        return stack + ((name, atom),)
+    for index in range(len(stack) - 1, -1, -1):
+        if stack[index][0] == name:
+            return stack[:index]
+    return stack
+
+
+def split_html(html: str, limit: int = MESSAGE_LIMIT) -> list[str]:
+    """Split Telegram HTML into chunks of at most `limit` characters.
+
+    Cuts prefer a line break, then a space, and never fall inside a tag
+    or an entity. Tags still open at a cut are closed at the end of the
+    chunk and reopened at the start of the next one, so every chunk is
+    valid HTML on its own (a code block stays a code block). Links whose
+    tag alone is too long to reopen are rendered as plain text.
+    """
+    if _size(html) <= limit:
+        return [html]
+    atoms = list(_atoms(html, limit // 4, max(limit // 16, 32)))
+    chunks = []
+    start = 0
+    opening = ()
+    while start < len(atoms):
+        stack = opening
+        size = sum(_size(tag) for _, tag in stack)
+        newline = space = None
+        end = start
+        while end < len(atoms):
+            atom = atoms[end]
+            after = _apply(stack, atom)
+            closing = sum(len(name) + 3 for name, _ in after)
+            if size + _size(atom) + closing > limit and end > start:
+                break
+            size += _size(atom)
+            stack = after
+            end += 1
+            if atom == "\n":
+                newline = (end, stack, size)
+            elif atom.isspace():
+                space = (end, stack, size)
+
+        if end < len(atoms):
+            # Qatordan bo'lish afzal, agar u bo'lakni juda qisqa qilib qo'ymasa
+            if newline and (newline[2] >= limit // 2 or space is None):
+                end, stack, _ = newline
+            elif space:
+                end, stack, _ = space
+
+        body = "".join(tag for _, tag in opening) + "".join(atoms[start:end])
+        body += "".join(f"</{name}>" for name, _ in reversed(stack))
+        if body.strip():
+            chunks.append(body)
+        start = end
+        opening = stack
+    return chunks
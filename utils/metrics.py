@@ -0,0 +1,77 @@
+from collections import deque
+
+
+class Counter:
+    """Monotonic counter."""
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        self.value += amount
+
+
+class Histogram:
+    """Keeps the last `window` observations and reports percentiles over them."""
+
+    def __init__(self, window: int = 1000):
+        self.count = 0
+        self.total = 0.0
+        self._samples = deque(maxlen=window)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        self._samples.append(value)
+
+    def percentile(self, p: float) -> float:
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "avg": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+        }
+
+
+class Metrics:
+    """Process-wide registry of named counters and histograms."""
+
+    def __init__(self):
+        self.counters: dict[str, Counter] = {}
+        self.histograms: dict[str, Histogram] = {}
+
+    def counter(self, name: str) -> Counter:
+        if name not in self.counters:
+            self.counters[name] = Counter()
+        return self.counters[name]
+
+    def histogram(self, name: str) -> Histogram:
+        if name not in self.histograms:
+            self.histograms[name] = Histogram()
+        return self.histograms[name]
+
+    def snapshot(self) -> dict:
+        data = {name: counter.value for name, counter in self.counters.items()}
+        data.update({name: histogram.snapshot() for name, histogram in self.histograms.items()})
+        return data
+
+    def report(self) -> str:
+        """Human-readable dump of every metric, one per line (histogram times in ms)."""
+        lines = [f"{name}: {counter.value}" for name, counter in sorted(self.counters.items())]
+        for name, histogram in sorted(self.histograms.items()):
+            data = histogram.snapshot()
+            scale = 1000 if name.endswith("_seconds") else 1
+            lines.append(
+                f"{name}: n={data['count']} avg={data['avg'] * scale:.1f} "
+                f"p50={data['p50'] * scale:.1f} p95={data['p95'] * scale:.1f}"
+            )
+        return "\n".join(lines)
+
+
+metrics = Metrics()
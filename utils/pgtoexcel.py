@@ -1,34 +1,55 @@
+import asyncio
+import csv
+
 import openpyxl
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font
 
 
-async def export_to_excel(data, headings, filepath):
+def _append_rows(sheet, rows):
+    for row in rows:
+        sheet.append(list(row))
+
+
+async def export_to_excel(batches, headings, filepath):
     """
-    Exports data from PostgreSQL to an Excel spreadsheet using psycopg2.
+    Streams rows into an Excel spreadsheet without holding them all in memory.
 
     Arguments:
-    connection - an open psycopg2 (this function does not close the connection)
-    query_string - SQL to get data
+    batches - async iterable yielding lists of rows (e.g. Database.iterate_users)
     headings - list of strings to use as column headings
     filepath - path and filename of the Excel file
 
-    psycopg2 and file handling errors bubble up to calling code.
+    A write-only workbook keeps only the current row in memory; appending
+    and saving run in a worker thread so the event loop is never blocked.
+    Database and file handling errors bubble up to calling code.
     """
 
-    wb = openpyxl.Workbook()
-    sheet = wb.active
+    wb = openpyxl.Workbook(write_only=True)
+    sheet = wb.create_sheet()
+
+    header = []
+    for heading in headings:
+        cell = WriteOnlyCell(sheet, value=heading)
+        cell.font = Font(bold=True)
+        header.append(cell)
+    sheet.append(header)
 
-    sheet.row_dimensions[1].font = Font(bold=True)
+    async for rows in batches:
+        await asyncio.to_thread(_append_rows, sheet, rows)
 
-    # Spreadsheet row and column indexes start at 1,
-    # so we use "start = 1" in enumerate, so
-    # we don't need to add 1 to the indexes.
-    for colno, heading in enumerate(headings, start=1):
-        sheet.cell(row=1, column=colno).value = heading
+    await asyncio.to_thread(wb.save, filepath)
 
-    # This time we use "start = 2" to skip the heading row.
-    for rowno, row in enumerate(data, start=2):
-        for colno, cell_value in enumerate(row, start=1):
-            sheet.cell(row=rowno, column=colno).value = cell_value
 
-    wb.save(filepath)
+async def export_to_csv(batches, headings, filepath):
+    """
+    Streams rows into a CSV file (same arguments as export_to_excel).
+
+    Much cheaper than xlsx for very large tables.
+    """
+
+    with open(filepath, "w", newline="", encoding="utf-8-sig") as file:
+        writer = csv.writer(file)
+        writer.writerow(headings)
+        async for rows in batches:
+            await asyncio.to_thread(writer.writerows, rows)
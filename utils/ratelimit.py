@@ -0,0 +1,184 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts up to `capacity`.
+
+    `acquire` waits in FIFO order until a token is available. `pause`
+    empties the bucket and blocks everyone for the given time, which is
+    how a `retry_after` from Telegram is honoured globally.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        now = time.monotonic()
+        if now < self._paused_until:
+            return False
+        self._refill(now)
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    async def acquire(self, tokens: float = 1):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+
+class _ExpiringState:
+    """Per-key limiter state kept in last-update order.
+
+    Every write moves the key to the end, so the entries that can expire
+    first are always at the head; each access drops expired heads, which
+    keeps memory proportional to the number of recently active keys at
+    O(1) amortised cost.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key, now: float):
+        while self._data:
+            head, (updated, _) = next(iter(self._data.items()))
+            if now - updated < self.ttl:
+                break
+            del self._data[head]
+        entry = self._data.get(key)
+        return entry[1] if entry else None
+
+    def set(self, key, value, now: float):
+        self._data[key] = (now, value)
+        self._data.move_to_end(key)
+
+    def __len__(self):
+        return len(self._data)
+
+
+TOKEN_BUCKET_SCRIPT = """
+local rate, capacity = tonumber(ARGV[1]), tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 't', 'u')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - updated) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 't', tostring(tokens), 'u', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(wait)
+"""
+
+SLIDING_WINDOW_SCRIPT = """
+local limit, window = tonumber(ARGV[1]), tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local current = math.floor(now / window)
+local elapsed = (now - current * window) / window
+local previous_count = tonumber(redis.call('GET', KEYS[1] .. ':' .. (current - 1))) or 0
+local current_key = KEYS[1] .. ':' .. current
+local count = tonumber(redis.call('GET', current_key)) or 0
+local estimate = previous_count * (1 - elapsed) + count
+if estimate >= limit then
+    return tostring((1 - elapsed) * window)
+end
+redis.call('INCR', current_key)
+redis.call('PEXPIRE', current_key, math.ceil(window * 2000))
+return '0'
+"""
+
+
+class TokenBucketLimiter:
+    """Per-key token bucket: `rate` requests per second with bursts up to `capacity`.
+
+    `hit` returns 0 when the request is allowed, otherwise the number of
+    seconds until it would be. With a `redis` client (redis.asyncio) the
+    buckets live in Redis and the limit holds across all replicas.
+    """
+
+    def __init__(self, name: str, rate: float, capacity: float = 1, redis=None):
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.redis = redis
+        # Bucket to'lib qolgach uning holatini saqlashning hojati yo'q
+        self._state = _ExpiringState(ttl=capacity / rate)
+        self._script = redis.register_script(TOKEN_BUCKET_SCRIPT) if redis is not None else None
+
+    async def hit(self, key) -> float:
+        if self._script is not None:
+            return float(await self._script(keys=[f"ratelimit:{self.name}:{key}"], args=[self.rate, self.capacity]))
+
+        now = time.monotonic()
+        state = self._state.get(key, now)
+        tokens, updated = state if state else (self.capacity, now)
+        tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        self._state.set(key, (tokens, now), now)
+        return wait
+
+
+class SlidingWindowLimiter:
+    """Per-key sliding-window counter: at most `limit` requests per `window` seconds.
+
+    Uses the two-bucket approximation (previous window weighted by how
+    much of it still overlaps), which is O(1) in time and memory per key.
+    Same return value and `redis` option as TokenBucketLimiter.
+    """
+
+    def __init__(self, name: str, limit: int, window: float, redis=None):
+        self.name = name
+        self.limit = limit
+        self.window = window
+        self.redis = redis
+        self._state = _ExpiringState(ttl=window * 2)
+        self._script = redis.register_script(SLIDING_WINDOW_SCRIPT) if redis is not None else None
+
+    async def hit(self, key) -> float:
+        if self._script is not None:
+            return float(await self._script(keys=[f"ratelimit:{self.name}:{key}"], args=[self.limit, self.window]))
+
+        now = time.monotonic()
+        current = int(now // self.window)
+        elapsed = (now - current * self.window) / self.window
+        window_id, count, previous_count = self._state.get(key, now) or (current, 0, 0)
+        if window_id != current:
+            previous_count = count if window_id == current - 1 else 0
+            count = 0
+        if previous_count * (1 - elapsed) + count >= self.limit:
+            self._state.set(key, (current, count, previous_count), now)
+            return (1 - elapsed) * self.window
+        self._state.set(key, (current, count + 1, previous_count), now)
+        return 0.0
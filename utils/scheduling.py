@@ -0,0 +1,2 @@
+class QueueFull(Exception):
+    """Raised by the voice and chat schedulers when their queue cannot take more jobs."""
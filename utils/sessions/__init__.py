@@ -0,0 +1,3 @@
+from .base import BaseSessionStore, UserSession  # noqa
+from .memory import MemorySessionStore  # noqa
+from .postgres import PostgresSessionStore  # noqa
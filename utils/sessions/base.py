@@ -0,0 +1,83 @@
+import time
+from typing import Optional
+
+
+ROLE_CODES = {"user": "u", "model": "m"}
+ROLE_NAMES = {code: role for role, code in ROLE_CODES.items()}
+
+
+class UserSession:
+    """One user's conversation with Gemini: plain-text history plus counters.
+
+    History is kept in the `{"role": ..., "parts": [...]}` shape accepted by
+    `GenerativeModel.start_chat(history=...)`, so the session holds no SDK
+    objects and its size can be measured.
+    """
+
+    def __init__(self, telegram_id: int, language: str, history: Optional[list[dict]] = None,
+                 message_count: int = 0, summary: str = ""):
+        self.telegram_id = telegram_id
+        self.language = language
+        self.history = history or []
+        self.message_count = message_count
+        # Compressed summary of turns that were dropped from `history`
+        self.summary = summary
+        self.last_active = time.monotonic()
+
+    @staticmethod
+    def turn(role: str, text: str) -> dict:
+        return {"role": role, "parts": [text]}
+
+    @property
+    def footprint(self) -> int:
+        """Approximate size of the history in characters."""
+        return len(self.summary) + sum(len(part) for turn in self.history for part in turn["parts"])
+
+    @property
+    def approx_tokens(self) -> int:
+        # Gemini averages roughly four characters per token
+        return self.footprint // 4
+
+
+def pack_turn(turn: dict) -> tuple[str, str]:
+    """Compact (role code, text) form of a turn used by the persistent backends."""
+    return ROLE_CODES[turn["role"]], "".join(turn["parts"])
+
+
+def unpack_turn(role_code: str, text: str) -> dict:
+    return UserSession.turn(ROLE_NAMES[role_code], text)
+
+
+class BaseSessionStore:
+    """Interface every session backend implements.
+
+    Backends persist history incrementally: `append` only writes the new
+    turns of one exchange, never the whole session.
+    """
+
+    async def get(self, telegram_id: int) -> Optional[UserSession]:
+        raise NotImplementedError
+
+    async def create(self, telegram_id: int, language: str) -> UserSession:
+        """Start a fresh session, replacing any existing one."""
+        raise NotImplementedError
+
+    async def append(self, session: UserSession, *turns: dict):
+        """Record a completed exchange (user turn and model turn); a no-op if the session is gone."""
+        raise NotImplementedError
+
+    async def compact(self, session: UserSession, summary: str, drop: int):
+        """Replace the `drop` oldest turns with `summary`; a no-op if the session is gone."""
+        raise NotImplementedError
+
+    async def delete(self, telegram_id: int) -> bool:
+        raise NotImplementedError
+
+    async def exists(self, telegram_id: int) -> bool:
+        return await self.get(telegram_id) is not None
+
+    def start(self):
+        """Start background maintenance, if the backend needs any."""
+
+    async def close(self):
+        pass
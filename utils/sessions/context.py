@@ -0,0 +1,69 @@
+import logging
+
+from .base import BaseSessionStore, UserSession
+
+
+SUMMARY_PROMPT = "Summary of our earlier conversation, use it as context:\n{summary}"
+SUMMARY_ACK = "Understood."
+
+
+def approx_tokens(turn: dict) -> int:
+    # Gemini averages roughly four characters per token
+    return sum(len(part) for part in turn["parts"]) // 4 + 1
+
+
+class ContextWindow:
+    """Keeps the history sent to Gemini under a token budget.
+
+    Only the most recent turns that fit in `token_budget` are sent. Once
+    at least `compact_after` turns have fallen out of the window they are
+    dropped from the store; when a `summarizer` is configured they are
+    first folded into the session's rolling summary, which is sent in
+    front of the window.
+    """
+
+    def __init__(self, store: BaseSessionStore, token_budget: int = 4000, summarizer=None, compact_after: int = 6):
+        self.store = store
+        self.token_budget = token_budget
+        self.summarizer = summarizer
+        self.compact_after = compact_after
+        self._compacting = set()
+
+    def _window_start(self, session: UserSession) -> int:
+        """Index of the first history turn that fits in the budget."""
+        budget = self.token_budget - len(session.summary) // 4
+        start = len(session.history)
+        # Walk back whole exchanges (user + model) so the window always starts with a user turn
+        while start >= 2:
+            cost = approx_tokens(session.history[start - 2]) + approx_tokens(session.history[start - 1])
+            if cost > budget and start < len(session.history):
+                break
+            budget -= cost
+            start -= 2
+        return start
+
+    def build(self, session: UserSession) -> list[dict]:
+        """History to pass to `GenerativeModel.start_chat`."""
+        history = session.history[self._window_start(session):]
+        if session.summary:
+            history = [
+                UserSession.turn("user", SUMMARY_PROMPT.format(summary=session.summary)),
+                UserSession.turn("model", SUMMARY_ACK),
+            ] + history
+        return history
+
+    async def compact(self, session: UserSession):
+        """Drop (and optionally summarise) turns that no longer fit in the window."""
+        drop = self._window_start(session)
+        if drop < self.compact_after or session.telegram_id in self._compacting:
+            return
+        self._compacting.add(session.telegram_id)
+        try:
+            summary = session.summary
+            if self.summarizer is not None:
+                summary = await self.summarizer(summary, session.history[:drop])
+            await self.store.compact(session, summary, drop)
+        except Exception as e:
+            logging.exception(f"Could not compact chat history of {session.telegram_id}: {e}")
+        finally:
+            self._compacting.discard(session.telegram_id)
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from .base import BaseSessionStore, UserSession
+
+
+class MemorySessionStore(BaseSessionStore):
+    """In-process session store bounded by size (LRU) and by idle time.
+
+    Sessions are kept in least-recently-used order, so both the LRU
+    eviction and the idle sweep only ever look at the head of the dict.
+    """
+
+    def __init__(self, max_size: int = 10_000, idle_ttl: float = 3600, sweep_interval: float = 60):
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self.sweep_interval = sweep_interval
+        self._sessions: OrderedDict[int, UserSession] = OrderedDict()
+        self._sweeper: Optional[asyncio.Task] = None
+
+    async def get(self, telegram_id: int) -> Optional[UserSession]:
+        session = self._sessions.get(telegram_id)
+        if session is None:
+            return None
+        if time.monotonic() - session.last_active > self.idle_ttl:
+            del self._sessions[telegram_id]
+            return None
+        session.last_active = time.monotonic()
+        self._sessions.move_to_end(telegram_id)
+        return session
+
+    async def create(self, telegram_id: int, language: str) -> UserSession:
+        self._sessions.pop(telegram_id, None)
+        session = UserSession(telegram_id=telegram_id, language=language)
+        self._sessions[telegram_id] = session
+        while len(self._sessions) > self.max_size:
+            self._sessions.popitem(last=False)
+        return session
+
+    async def append(self, session: UserSession, *turns: dict):
+        if self._sessions.get(session.telegram_id) is not session:
+            return
+        session.history.extend(turns)
+        session.message_count += 1
+        session.last_active = time.monotonic()
+
+    async def compact(self, session: UserSession, summary: str, drop: int):
+        if self._sessions.get(session.telegram_id) is not session:
+            return
+        session.summary = summary
+        del session.history[:drop]
+
+    async def delete(self, telegram_id: int) -> bool:
+        return self._sessions.pop(telegram_id, None) is not None
+
+    def sweep(self) -> int:
+        """Drop sessions idle for longer than `idle_ttl`; returns how many were removed."""
+        deadline = time.monotonic() - self.idle_ttl
+        removed = 0
+        while self._sessions:
+            telegram_id, session = next(iter(self._sessions.items()))
+            if session.last_active > deadline:
+                break
+            del self._sessions[telegram_id]
+            removed += 1
+        return removed
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "approx_tokens": sum(session.approx_tokens for session in self._sessions.values()),
+        }
+
+    async def _sweep_forever(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            removed = self.sweep()
+            if removed:
+                logging.info(f"Expired {removed} idle chat sessions, {self.stats()}")
+
+    def start(self):
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep_forever())
+
+    async def close(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
@@ -0,0 +1,71 @@
+import asyncio
+import logging
+from typing import Optional
+
+from .base import BaseSessionStore, UserSession, pack_turn, unpack_turn
+
+
+class PostgresSessionStore(BaseSessionStore):
+    """Sessions stored in the `chat_sessions` / `chat_turns` tables of the bot database.
+
+    Shared by every bot replica that talks to the same database; sessions
+    idle for longer than `idle_ttl` are removed by a background sweeper.
+    """
+
+    def __init__(self, db, idle_ttl: float = 3600, sweep_interval: float = 60):
+        self.db = db
+        self.idle_ttl = idle_ttl
+        self.sweep_interval = sweep_interval
+        self._sweeper: Optional[asyncio.Task] = None
+
+    async def get(self, telegram_id: int) -> Optional[UserSession]:
+        row = await self.db.select_chat_session(telegram_id, idle_seconds=self.idle_ttl)
+        if row is None:
+            return None
+        turns = await self.db.select_chat_turns(telegram_id)
+        return UserSession(
+            telegram_id=telegram_id,
+            language=row["language"],
+            history=[unpack_turn(turn["role"], turn["text"]) for turn in turns],
+            message_count=row["message_count"],
+            summary=row["summary"],
+        )
+
+    async def create(self, telegram_id: int, language: str) -> UserSession:
+        await self.db.create_chat_session(telegram_id, language)
+        return UserSession(telegram_id=telegram_id, language=language)
+
+    async def append(self, session: UserSession, *turns: dict):
+        if not await self.db.append_chat_turns(session.telegram_id, [pack_turn(turn) for turn in turns]):
+            # Sessiya javob kutilayotganda o'chirilgan (masalan /stop): yozadigan joy yo'q
+            return
+        session.history.extend(turns)
+        session.message_count += 1
+
+    async def compact(self, session: UserSession, summary: str, drop: int):
+        if not await self.db.compact_chat_session(session.telegram_id, summary, drop):
+            return
+        session.summary = summary
+        del session.history[:drop]
+
+    async def delete(self, telegram_id: int) -> bool:
+        return await self.db.delete_chat_session(telegram_id)
+
+    async def _sweep_forever(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                removed = await self.db.delete_idle_chat_sessions(idle_seconds=self.idle_ttl)
+                if removed:
+                    logging.info(f"Expired {removed} idle chat sessions")
+            except Exception as e:
+                logging.exception(f"Chat session sweep failed: {e}")
+
+    def start(self):
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep_forever())
+
+    async def close(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
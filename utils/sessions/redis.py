@@ -0,0 +1,93 @@
+import json
+from typing import Optional
+
+from redis import asyncio as aioredis
+
+from .base import BaseSessionStore, UserSession, pack_turn, unpack_turn
+
+# Sessiya o'chirilgan yoki muddati o'tgan bo'lsa hech narsa yozilmaydi (tilsiz "yarim" sessiya paydo bo'lmasin)
+APPEND_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return 0 end
+redis.call('RPUSH', KEYS[2], unpack(ARGV, 2))
+redis.call('HINCRBY', KEYS[1], 'message_count', 1)
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+return 1
+"""
+
+COMPACT_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return 0 end
+redis.call('LTRIM', KEYS[2], ARGV[1], -1)
+redis.call('HSET', KEYS[1], 'summary', ARGV[2])
+return 1
+"""
+
+class RedisSessionStore(BaseSessionStore):
+    """Sessions stored in any Redis-protocol server (Redis, Valkey, KeyDB, ...).
+
+    `chat:<id>` is a hash with the session metadata and `chat:<id>:turns`
+    a list of compact `["u"|"m", text]` JSON entries. Both keys carry an
+    idle TTL that is refreshed on every access, so no sweeper is needed.
+    `append` and `compact` are Lua scripts that do nothing once the session
+    has been deleted or has expired. An existing `redis` client (created
+    with `decode_responses=True`) can be passed instead of `url`.
+    """
+
+    def __init__(self, url: Optional[str] = None, idle_ttl: float = 3600, prefix: str = "chat", redis=None):
+        self.redis = redis if redis is not None else aioredis.from_url(url, decode_responses=True)
+        self.idle_ttl = int(idle_ttl)
+        self.prefix = prefix
+        self._append = self.redis.register_script(APPEND_SCRIPT)
+        self._compact = self.redis.register_script(COMPACT_SCRIPT)
+
+    def _keys(self, telegram_id: int) -> tuple[str, str]:
+        key = f"{self.prefix}:{telegram_id}"
+        return key, f"{key}:turns"
+
+    async def get(self, telegram_id: int) -> Optional[UserSession]:
+        meta_key, turns_key = self._keys(telegram_id)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hgetall(meta_key)
+            pipe.lrange(turns_key, 0, -1)
+            pipe.expire(meta_key, self.idle_ttl)
+            pipe.expire(turns_key, self.idle_ttl)
+            meta, turns, _, _ = await pipe.execute()
+        if "language" not in meta:
+            return None
+        return UserSession(
+            telegram_id=telegram_id,
+            language=meta["language"],
+            history=[unpack_turn(*json.loads(turn)) for turn in turns],
+            message_count=int(meta.get("message_count", 0)),
+            summary=meta.get("summary", ""),
+        )
+
+    async def create(self, telegram_id: int, language: str) -> UserSession:
+        meta_key, turns_key = self._keys(telegram_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(meta_key, turns_key)
+            pipe.hset(meta_key, mapping={"language": language, "message_count": 0})
+            pipe.expire(meta_key, self.idle_ttl)
+            await pipe.execute()
+        return UserSession(telegram_id=telegram_id, language=language)
+
+    async def append(self, session: UserSession, *turns: dict):
+        meta_key, turns_key = self._keys(session.telegram_id)
+        packed = [json.dumps(pack_turn(turn), ensure_ascii=False, separators=(",", ":")) for turn in turns]
+        if not await self._append(keys=[meta_key, turns_key], args=[self.idle_ttl, *packed]):
+            return
+        session.history.extend(turns)
+        session.message_count += 1
+
+    async def compact(self, session: UserSession, summary: str, drop: int):
+        meta_key, turns_key = self._keys(session.telegram_id)
+        if not await self._compact(keys=[meta_key, turns_key], args=[drop, summary]):
+            return
+        session.summary = summary
+        del session.history[:drop]
+
+    async def delete(self, telegram_id: int) -> bool:
+        return await self.redis.delete(*self._keys(telegram_id)) > 0
+
+    async def close(self):
+        await self.redis.aclose()
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import time
+
+from aiogram import types
+from aiogram.enums.parse_mode import ParseMode
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+
+from utils.markdown import MESSAGE_LIMIT, split_html, to_plain_text
+
+
+async def _retry(call):
+    """Await `call()`, waiting out Telegram flood limits instead of failing."""
+    while True:
+        try:
+            return await call()
+        except TelegramRetryAfter as e:
+            await asyncio.sleep(e.retry_after)
+
+
+async def _answer(message: types.Message, html: str, reply_markup=None) -> types.Message:
+    """Send `html`; if Telegram refuses it (markup or length), send it again as plain text."""
+    try:
+        return await _retry(lambda: message.answer(text=html, parse_mode=ParseMode.HTML, reply_markup=reply_markup))
+    except TelegramBadRequest as e:
+        logging.warning(f"Sending reply as plain text: {e}")
+        return await _retry(lambda: message.answer(text=to_plain_text(html), parse_mode=None, reply_markup=reply_markup))
+
+
+async def _edit(message: types.Message, html: str):
+    """Edit `message` to `html`, falling back to plain text like `_answer`."""
+    try:
+        await _retry(lambda: message.edit_text(text=html, parse_mode=ParseMode.HTML))
+    except TelegramBadRequest as e:
+        if "message is not modified" in str(e):
+            return
+        logging.warning(f"Editing reply as plain text: {e}")
+        await _retry(lambda: message.edit_text(text=to_plain_text(html), parse_mode=None))
+
+
+async def send_chunks(message: types.Message, chunks: list[str], reply_markup=None, placeholder: types.Message = None):
+    """Send a (possibly split) reply to the chat of `message`, in order.
+
+    Chunks are sent one after another and the last one carries
+    `reply_markup`. When a `placeholder` (the "thinking" message) is
+    given it is replaced: by a fresh message for a single chunk, or, for
+    several chunks, by editing the first chunk into it while the rest are
+    being sent (the placeholder already sits above them, so the edit can
+    run alongside; an edit can't attach a reply keyboard).
+    """
+    async def send(rest: list[str]):
+        *head, last = rest
+        for chunk in head:
+            await _answer(message, chunk)
+        await _answer(message, last, reply_markup)
+
+    if placeholder is None:
+        await send(chunks)
+    elif len(chunks) == 1:
+        await asyncio.gather(_delete(placeholder), send(chunks))
+    else:
+        await asyncio.gather(
+            _edit(placeholder, chunks[0]),
+            send(chunks[1:])
+        )
+
+
+async def _delete(message: types.Message):
+    try:
+        await message.delete()
+    except TelegramBadRequest as e:
+        logging.info(f"Could not delete message: {e}")
+
+
+class StreamingReply:
+    """Progressively edits Telegram messages while a response is being streamed.
+
+    Edits are coalesced: a new chunk only triggers an edit when at least
+    `edit_interval` seconds have passed since the previous one, so a fast
+    stream does not run into Telegram's edit rate limits. Chunks are fed
+    to an incremental `renderer` (see `utils.markdown.MarkdownRenderer`),
+    so each edit only renders the lines that arrived since the last one.
+    Once the rendered text outgrows one message it rolls over: the full
+    message is left as is and the answer continues in a new one.
+
+    A reply keyboard can't be added by editing, so `finish(reply_markup)`
+    sends the last chunk as a new message carrying the keyboard (and
+    deletes the edited one) unless that chunk is new anyway.
+    """
+
+    def __init__(self, message: types.Message, renderer, edit_interval: float = 1.0, limit: int = MESSAGE_LIMIT):
+        self.messages = [message]
+        self.renderer = renderer
+        self.edit_interval = edit_interval
+        self.limit = limit
+        self.text = ""
+        self._rendered = [None]
+        self._next_edit_at = 0.0
+        self._keyboard_at = None
+
+    async def feed(self, chunk: str):
+        """Append a chunk and edit the message if the edit window is open."""
+        self.text += chunk
+        self.renderer.feed(chunk)
+        if time.monotonic() >= self._next_edit_at:
+            await self._sync()
+
+    async def finish(self, reply_markup=None):
+        """Flush the fully rendered text; the last message gets `reply_markup`."""
+        while True:
+            try:
+                return await self._sync(final=True, reply_markup=reply_markup)
+            except TelegramRetryAfter as e:
+                await asyncio.sleep(e.retry_after)
+
+    async def _sync(self, final: bool = False, reply_markup=None):
+        html = self.renderer.html
+        if not html.strip():
+            return
+        try:
+            chunks = split_html(html, self.limit)
+            for index, chunk in enumerate(chunks):
+                await self._deliver(index, chunk, final, reply_markup if index == len(chunks) - 1 else None)
+            self._next_edit_at = time.monotonic() + self.edit_interval
+        except TelegramRetryAfter as e:
+            self._next_edit_at = time.monotonic() + e.retry_after
+            if final:
+                raise
+        except TelegramBadRequest as e:
+            if final:
+                raise
+            logging.info(f"Skipping intermediate stream edit: {e}")
+
+    async def _deliver(self, index: int, html: str, final: bool, reply_markup=None):
+        # Yakuniy matn Telegram qabul qilmasa ham yo'qolmaydi - oddiy matn sifatida yuboriladi
+        if index == len(self.messages):
+            if final:
+                message = await _answer(self.messages[0], html, reply_markup)
+                self._keyboard_at = index if reply_markup is not None else None
+            else:
+                message = await self.messages[0].answer(text=html, parse_mode=ParseMode.HTML)
+            self.messages.append(message)
+            self._rendered.append(html)
+            return
+        if reply_markup is not None and self._keyboard_at != index:
+            # Tahrirlab bo'lmaydi: oxirgi bo'lak klaviatura bilan qayta yuboriladi, eskisi o'chiriladi
+            previous = self.messages[index]
+            self.messages[index] = await _answer(previous, html, reply_markup)
+            self._rendered[index] = html
+            self._keyboard_at = index
+            await _delete(previous)
+            return
+        if html == self._rendered[index]:
+            return
+        if final:
+            await _edit(self.messages[index], html)
+        else:
+            try:
+                await self.messages[index].edit_text(text=html, parse_mode=ParseMode.HTML)
+            except TelegramBadRequest as e:
+                if "message is not modified" not in str(e):
+                    raise
+        self._rendered[index] = html
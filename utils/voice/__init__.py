@@ -0,0 +1,3 @@
+from .backends import TranscriptionBackend, AssemblyAIBackend, LocalWhisperBackend  # noqa
+from .processor import VoiceProcessor  # noqa
+from .cache import TranscriptCache  # noqa
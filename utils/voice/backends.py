@@ -0,0 +1,122 @@
+import asyncio
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import aiohttp
+
+
+class TranscriptionBackend:
+    """Turns raw voice-note bytes (OGG/Opus from Telegram) into text."""
+
+    name = "base"
+
+    async def transcribe(self, audio: bytes, language: str) -> Optional[str]:
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class AssemblyAIBackend(TranscriptionBackend):
+    """AssemblyAI REST API over aiohttp; `base_url` can point at a local stub server."""
+
+    name = "assemblyai"
+
+    def __init__(self, api_key: str, base_url: str = "https://api.assemblyai.com", poll_interval: float = 1.0):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.poll_interval = poll_interval
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(headers={"authorization": self.api_key})
+        return self._session
+
+    @staticmethod
+    def language_code(language: str) -> Optional[str]:
+        if language in ["en", "eng"]:
+            return "en"
+        elif language == "ru":
+            return "ru"
+        return None
+
+    async def _request(self, method: str, path: str, **kwargs) -> dict:
+        async with self.session.request(method, f"{self.base_url}{path}", **kwargs) as response:
+            response.raise_for_status()
+            return await response.json()
+
+    async def transcribe(self, audio: bytes, language: str) -> Optional[str]:
+        upload = await self._request("POST", "/v2/upload", data=audio)
+
+        payload = {"audio_url": upload["upload_url"]}
+        language_code = self.language_code(language)
+        if language_code:
+            payload["language_code"] = language_code
+        transcript = await self._request("POST", "/v2/transcript", json=payload)
+
+        while transcript["status"] not in ("completed", "error"):
+            await asyncio.sleep(self.poll_interval)
+            transcript = await self._request("GET", f"/v2/transcript/{transcript['id']}")
+
+        if transcript["status"] == "error":
+            raise Exception(f"Transcription failed: {transcript.get('error')}")
+        return transcript["text"]
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+
+# Each worker process of LocalWhisperBackend loads its own model once
+_whisper_model = None
+
+
+def _init_whisper_worker(model_size: str, compute_type: str):
+    global _whisper_model
+    from faster_whisper import WhisperModel
+
+    _whisper_model = WhisperModel(model_size, device="cpu", compute_type=compute_type, cpu_threads=1)
+
+
+def _whisper_transcribe(audio: bytes, language: Optional[str]) -> str:
+    import numpy as np
+    from pydub import AudioSegment
+
+    # ffmpeg (pydub orqali) OGG/Opus ni 16 kHz mono PCM ga aylantiradi
+    segment = AudioSegment.from_file(io.BytesIO(audio)).set_channels(1).set_frame_rate(16000).set_sample_width(2)
+    samples = np.frombuffer(segment.raw_data, dtype=np.int16).astype(np.float32) / 32768.0
+    segments, _ = _whisper_model.transcribe(samples, language=language, beam_size=1)
+    return " ".join(part.text.strip() for part in segments)
+
+
+class LocalWhisperBackend(TranscriptionBackend):
+    """On-box speech-to-text with faster-whisper running in a process pool.
+
+    Audio is decoded with pydub/ffmpeg and transcribed on the CPU in
+    `workers` separate processes, so neither decoding nor inference ever
+    touches the event loop. Requires the optional `faster-whisper` package.
+    """
+
+    name = "local"
+
+    LANGUAGES = {"uz": "uz", "ru": "ru", "en": "en", "eng": "en", "tr": "tr"}
+
+    def __init__(self, model_size: str = "base", workers: int = 2, compute_type: str = "int8"):
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_whisper_worker,
+            initargs=(model_size, compute_type),
+        )
+
+    async def transcribe(self, audio: bytes, language: str) -> Optional[str]:
+        loop = asyncio.get_running_loop()
+        text = await loop.run_in_executor(self._executor, _whisper_transcribe, audio, self.LANGUAGES.get(language))
+        return text or None
+
+    async def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,35 @@
+from typing import Optional
+
+from utils.cache import TTLCache, MISSING
+
+
+class TranscriptCache:
+    """Transcripts keyed by Telegram's `file_unique_id` and the user's language.
+
+    The same audio keeps its `file_unique_id` when it is forwarded or
+    re-sent, so a hit skips both the download and the transcription.
+    Lookups go to an in-memory LRU first and then, when `db` is given,
+    to the `voice_transcripts` table, which survives restarts and is
+    shared between replicas.
+    """
+
+    def __init__(self, db=None, maxsize: int = 5000, ttl: float = 86400):
+        self.db = db
+        self.memory = TTLCache("voice_transcripts", maxsize=maxsize, ttl=ttl)
+
+    async def get(self, file_unique_id: str, language: str) -> Optional[str]:
+        key = (file_unique_id, language)
+        text = self.memory.get(key)
+        if text is not MISSING:
+            return text
+        if self.db is None:
+            return None
+        text = await self.db.select_voice_transcript(file_unique_id, language)
+        if text is not None:
+            self.memory.set(key, text)
+        return text
+
+    async def set(self, file_unique_id: str, language: str, text: str):
+        self.memory.set((file_unique_id, language), text)
+        if self.db is not None:
+            await self.db.add_voice_transcript(file_unique_id, language, text)
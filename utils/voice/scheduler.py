@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable
+
+from utils.metrics import metrics
+from utils.scheduling import QueueFull
+
+
+class VoiceScheduler:
+    """Runs voice jobs on a fixed pool of workers with a fair per-user queue.
+
+    Each user has their own FIFO; workers serve users round-robin, so one
+    user sending ten voice notes cannot push everybody else back. The
+    total queue and each user's share of it are bounded (backpressure),
+    and jobs are always released by the worker that ran them, whatever
+    they raise. Queue wait and processing time are recorded in the
+    `voice_queue_wait_seconds` / `voice_processing_seconds` histograms.
+    """
+
+    def __init__(self, workers: int = 3, max_queue: int = 50, max_per_user: int = 3):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_per_user = max_per_user
+        self.busy = 0
+        self._queues: dict[int, deque] = {}
+        self._order: deque[int] = deque()
+        self._pending = 0
+        self._ready = asyncio.Semaphore(0)
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def queue_depth(self) -> int:
+        return self._pending
+
+    def submit(self, user_id: int, job: Callable[[], Awaitable]) -> tuple[int, asyncio.Future]:
+        """Queue `job` for `user_id`.
+
+        Returns the job's position in the queue (0 when a worker picks it
+        up right away) and a future with the job's result.
+        """
+        queue = self._queues.get(user_id)
+        if self._pending >= self.max_queue or (queue and len(queue) >= self.max_per_user):
+            raise QueueFull()
+
+        future = asyncio.get_running_loop().create_future()
+        if queue is None:
+            queue = self._queues[user_id] = deque()
+            self._order.append(user_id)
+        queue.append((job, future, time.monotonic()))
+        self._pending += 1
+        self._ready.release()
+
+        # Round-robin: every other user gets up to as many turns before ours as we have queued jobs
+        turn = len(queue)
+        ahead = sum(min(len(other), turn) for uid, other in self._queues.items() if uid != user_id) + turn - 1
+        position = max(0, ahead - (self.workers - self.busy) + 1)
+        return position, future
+
+    def _next_job(self):
+        user_id = self._order.popleft()
+        queue = self._queues[user_id]
+        job = queue.popleft()
+        if queue:
+            self._order.append(user_id)
+        else:
+            del self._queues[user_id]
+        self._pending -= 1
+        return job
+
+    async def _worker(self):
+        while True:
+            await self._ready.acquire()
+            job, future, enqueued_at = self._next_job()
+            if future.cancelled():
+                continue
+            started = time.monotonic()
+            metrics.histogram("voice_queue_wait_seconds").observe(started - enqueued_at)
+            self.busy += 1
+            try:
+                future.set_result(await job())
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            finally:
+                self.busy -= 1
+                metrics.histogram("voice_processing_seconds").observe(time.monotonic() - started)
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        if self._pending:
+            logging.info(f"Dropping {self._pending} queued voice jobs")
@@ -0,0 +1,67 @@
+import asyncio
+import hmac
+import logging
+from typing import Optional
+
+from aiogram import Bot, Dispatcher
+from aiohttp import web
+
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class WebhookServer:
+    """Receives Telegram webhooks and processes them through a bounded queue.
+
+    The HTTP handler only checks the secret token and enqueues the update,
+    so Telegram gets its 200 immediately; a fixed pool of workers feeds
+    updates to the dispatcher. When the queue is full the request is
+    answered with 503 and Telegram redelivers it later.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, secret_token: str, workers: int = 32, queue_size: int = 1000):
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.secret_token = secret_token
+        self.workers = workers
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._tasks: list[asyncio.Task] = []
+
+    async def handle(self, request: web.Request) -> web.Response:
+        token = request.headers.get(SECRET_HEADER, "")
+        if not hmac.compare_digest(token, self.secret_token):
+            return web.Response(status=401)
+        try:
+            self.queue.put_nowait(await request.json())
+        except asyncio.QueueFull:
+            logging.warning("Webhook queue is full, asking Telegram to retry")
+            return web.Response(status=503)
+        return web.Response()
+
+    async def _worker(self):
+        while True:
+            update = await self.queue.get()
+            try:
+                await self.dispatcher.feed_webhook_update(self.bot, update)
+            except Exception as e:
+                logging.exception(f"Webhook update failed: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def start(self, *_):
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self, *_, drain_timeout: Optional[float] = 10):
+        """Let queued updates finish (up to `drain_timeout` seconds), then stop the workers."""
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logging.warning(f"Dropping {self.queue.qsize()} unprocessed webhook updates")
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    def setup(self, app: web.Application, path: str):
+        app.router.add_post(path, self.handle)
+        app.on_startup.append(self.start)
+        app.on_shutdown.append(self.close)